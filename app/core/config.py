@@ -9,6 +9,40 @@ class Settings(BaseSettings):
     MAX_IMAGE_SIZE_MB: int = 5
     ALLOWED_IMAGE_TYPES: Tuple[str, ...] = ("image/jpeg", "image/png", "image/webp")
     BASE_URL: Optional[AnyUrl] = None
+    PLANO_VALIDACAO_CACHE_TAMANHO: int = 512
+    PLANO_VALIDACAO_CACHE_TTL: int = 300
+    SNAPSHOT_PUBLICO_CACHE_TAMANHO: int = 1024
+    SNAPSHOT_PUBLICO_CACHE_TTL: int = 300
+    RESPOSTAS_MAX_THREADS: int = 10
+    RESPOSTAS_LOTE_MAX_ITENS: int = 1000
+    RESPOSTAS_LOTE_MAX_BYTES_ITEM: int = 256 * 1024
+    RESPOSTAS_LOTE_CHUNK: int = 500
+    IDENTIFICADORES_CACHE_FORMULARIOS: int = 256
+    IDENTIFICADORES_LIMITE_EXATO: int = 50000
+    IDENTIFICADORES_CACHE_TTL: int = 600
+    INGESTAO_ASSINCRONA: bool = False
+    INGESTAO_JOURNAL: str = "data/ingestao.journal"
+    INGESTAO_FILA_MAX: int = 10000
+    INGESTAO_LOTE_MAX: int = 500
+    INGESTAO_INTERVALO_MS: int = 200
+    INGESTAO_TENTATIVAS: int = 3
+    INGESTAO_DEAD_LETTER: str = "data/ingestao.dead"
+    WS_AGREGADOS_INTERVALO_MS: int = 1000
+    WS_AGREGADOS_RESSINCRONIZAR_S: int = 60
+    EXPORT_JOBS_DIR: str = "data/exports"
+    EXPORT_JOBS_MAX_CONCORRENTES: int = 2
+    EXPORT_JOBS_FILA_MAX: int = 20
+    EXPORT_JOBS_TTL: int = 3600
+    EXPORT_JOBS_PROGRESSO_LINHAS: int = 1000
+    EXPORT_LOTE_MAX_FORMULARIOS: int = 100
+    EXPORT_LOTE_MAX_CURSORES: int = 4
+    EXPORT_LOTE_ESPERA_CURSOR_S: int = 30
+    EXPORT_CACHE_DIR: str = "data/export_cache"
+    EXPORT_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    EXPORT_CURSOR_MARGEM_S: int = 60
+    SERIE_CACHE_TAMANHO: int = 256
+    SERIE_MARGEM_S: int = 60
+    CROSSTAB_STATEMENT_TIMEOUT_MS: int = 15000
 
     def ensure_media_dir(self) -> None:
         os.makedirs(self.MEDIA_ROOT, exist_ok=True)
@@ -1,5 +1,12 @@
 from .user import criar_usuario, buscar_usuario_por_email, buscar_usuario_por_id, buscar_usuario_por_username, listar_usuarios, atualizar_usuario, deletar_usuario, existe_admin, deletar_me
 from .grupo import get_grupo_admin_id, existe_grupo_admin, criar_grupo
-from .forms import criar_formulario, listar_formularios, buscar_formulario_por_id, atualizar_formulario_parcial, deletar_formulario, restaurar_formulario, obter_formulario_publico_por_slug
+from .forms import criar_formulario, listar_formularios, buscar_formulario_por_id, atualizar_formulario_parcial, deletar_formulario, restaurar_formulario, obter_formulario_publico_por_slug, invalidar_caches_formulario
 from .permissao import buscar_acl, tem_permissao_formulario, grant_all, tem_permissao
-from .repostas import criar, listar_por_formulario, buscar_por_id, deletar, listar_por_formulario_ws
\ No newline at end of file
+from .repostas import criar, listar_por_formulario, buscar_por_id, deletar, listar_por_formulario_ws
+from .plano_validacao import obter_plano_validacao, obter_plano_validacao_por_slug, invalidar_plano_validacao
+from .snapshot_publico import obter_snapshot_publico, aquecer_snapshots_publicos, invalidar_snapshot_publico
+from .grafo_formulario import carregar_grafo_formulario, opcoes_grafo_formulario
+from .analise import analisar_formulario, cruzar_perguntas, crosstab_csv
+from .estatisticas import registrar_estatisticas, descontar_estatisticas, recalcular_extremos, zerar_estatisticas, reconstruir_estatisticas, ler_estatisticas
+from .serie import serie_formulario, invalidar_cache_serie
+from .busca import buscar_respostas
@@ -0,0 +1,327 @@
+# app/crud/analise.py
+import csv
+import io
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from fastapi import HTTPException, status
+from sqlalchemy import String, case, cast, distinct, func, literal, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, aliased
+from app import models, schemas
+from app.core.config import settings
+from app.crud.forms import contar_respostas_export, normalizar_periodo
+
+TIPOS_DISTRIBUICAO = (
+    models.TipoPergunta.multipla_escolha,
+    models.TipoPergunta.caixa_selecao,
+    models.TipoPergunta.multipla_escolha_personalizada,
+)
+
+
+def _perguntas(db: Session, formulario_id: UUID, tipos, apenas_ativas: bool) -> dict:
+    P = models.Pergunta
+    q = db.query(P).filter(P.formulario_id == formulario_id, P.tipo.in_(tipos))
+    if apenas_ativas:
+        q = q.filter(P.ativa == True)
+    return {p.id: p for p in q.order_by(P.ordem_exibicao.nulls_last(), P.id)}
+
+
+def _itens_no_periodo(db: Session, colunas, formulario_id: UUID, inicio: Optional[datetime], fim: Optional[datetime]):
+    """Query sobre respostas_itens ⨝ respostas do formulário, filtrada pelo período de criação da resposta."""
+    R, RI = models.Resposta, models.RespostaItem
+    q = db.query(*colunas).join(R, R.id == RI.resposta_id).filter(R.formulario_id == formulario_id)
+    if inicio:
+        q = q.filter(R.criado_em >= inicio)
+    if fim:
+        q = q.filter(R.criado_em < fim)
+    return q
+
+
+def _nps(db: Session, formulario_id: UUID, inicio, fim, apenas_ativas: bool) -> list:
+    """Classifica cada nota pela posição relativa na escala da pergunta, equivalente a 9–10/7–8/0–6 na escala 0–10."""
+    P, RI = models.Pergunta, models.RespostaItem
+    perguntas = _perguntas(db, formulario_id, [models.TipoPergunta.nps], apenas_ativas)
+    if not perguntas:
+        return []
+    amplitude = P.escala_max - P.escala_min
+    relativo = (RI.valor_numero - P.escala_min) * 10
+    linhas = (
+        _itens_no_periodo(
+            db,
+            [
+                RI.pergunta_id,
+                func.count(),
+                func.count().filter(relativo >= 9 * amplitude),
+                func.count().filter(relativo >= 7 * amplitude, relativo < 9 * amplitude),
+            ],
+            formulario_id, inicio, fim,
+        )
+        .join(P, P.id == RI.pergunta_id)
+        .filter(RI.pergunta_id.in_(list(perguntas)), RI.valor_numero.isnot(None))
+        .group_by(RI.pergunta_id)
+        .all()
+    )
+    por_pergunta = {pid: (total, promotores, neutros) for pid, total, promotores, neutros in linhas}
+
+    saida = []
+    for pid, p in perguntas.items():
+        total, promotores, neutros = por_pergunta.get(pid, (0, 0, 0))
+        detratores = total - promotores - neutros
+        saida.append(schemas.NpsPerguntaOut(
+            pergunta_id=pid,
+            texto=p.texto,
+            escala_min=p.escala_min,
+            escala_max=p.escala_max,
+            total=total,
+            promotores=promotores,
+            neutros=neutros,
+            detratores=detratores,
+            nps=round((promotores - detratores) * 100 / total, 2) if total else None,
+        ))
+    return saida
+
+
+def _distribuicoes(db: Session, formulario_id: UUID, inicio, fim, apenas_ativas: bool) -> list:
+    """Conta itens por (pergunta, opção); todas as opções cadastradas aparecem, inclusive com zero."""
+    RI, O = models.RespostaItem, models.Opcao
+    perguntas = _perguntas(db, formulario_id, TIPOS_DISTRIBUICAO, apenas_ativas)
+    if not perguntas:
+        return []
+    ids = list(perguntas)
+
+    contagens = (
+        _itens_no_periodo(db, [RI.pergunta_id, RI.valor_opcao_id, func.count()], formulario_id, inicio, fim)
+        .filter(RI.pergunta_id.in_(ids), (RI.valor_opcao_id.isnot(None)) | (RI.valor_opcao_texto.isnot(None)))
+        .group_by(RI.pergunta_id, RI.valor_opcao_id)
+        .all()
+    )
+    respondentes = dict(
+        _itens_no_periodo(db, [RI.pergunta_id, func.count(distinct(RI.resposta_id))], formulario_id, inicio, fim)
+        .filter(RI.pergunta_id.in_(ids), (RI.valor_opcao_id.isnot(None)) | (RI.valor_opcao_texto.isnot(None)))
+        .group_by(RI.pergunta_id)
+        .all()
+    )
+    opcoes = defaultdict(list)
+    for oid, pid, texto in db.query(O.id, O.pergunta_id, O.texto).filter(O.pergunta_id.in_(ids)).order_by(O.ordem, O.id):
+        opcoes[pid].append((oid, texto))
+
+    por_opcao = {(pid, oid): total for pid, oid, total in contagens}
+    saida = []
+    for pid, p in perguntas.items():
+        cadastradas = {oid for oid, _ in opcoes[pid]}
+        saida.append(schemas.DistribuicaoOpcoesOut(
+            pergunta_id=pid,
+            texto=p.texto,
+            tipo=p.tipo.value,
+            respostas=respondentes.get(pid, 0),
+            opcoes=[
+                schemas.ContagemOpcaoOut(opcao_id=oid, texto=texto, total=por_opcao.get((pid, oid), 0))
+                for oid, texto in opcoes[pid]
+            ],
+            outros=sum(t for (q, oid), t in por_opcao.items() if q == pid and oid not in cadastradas),
+        ))
+    return saida
+
+
+def _numeros(db: Session, formulario_id: UUID, inicio, fim, apenas_ativas: bool) -> list:
+    RI = models.RespostaItem
+    perguntas = _perguntas(db, formulario_id, [models.TipoPergunta.numero], apenas_ativas)
+    if not perguntas:
+        return []
+    valor = RI.valor_numero
+    linhas = (
+        _itens_no_periodo(
+            db,
+            [
+                RI.pergunta_id,
+                func.count(valor),
+                func.min(valor),
+                func.max(valor),
+                func.avg(valor),
+                func.percentile_cont(0.5).within_group(valor),
+                func.stddev_samp(valor),
+            ],
+            formulario_id, inicio, fim,
+        )
+        .filter(RI.pergunta_id.in_(list(perguntas)), valor.isnot(None))
+        .group_by(RI.pergunta_id)
+        .all()
+    )
+    por_pergunta = {linha[0]: linha[1:] for linha in linhas}
+
+    def _f(v):
+        return float(v) if v is not None else None
+
+    saida = []
+    for pid, p in perguntas.items():
+        total, minimo, maximo, media, mediana, desvio = por_pergunta.get(pid, (0, None, None, None, None, None))
+        saida.append(schemas.ResumoNumericoOut(
+            pergunta_id=pid,
+            texto=p.texto,
+            total=total,
+            minimo=_f(minimo),
+            maximo=_f(maximo),
+            media=_f(media),
+            mediana=_f(mediana),
+            desvio_padrao=_f(desvio),
+        ))
+    return saida
+
+
+def analisar_formulario(
+    db: Session,
+    formulario_id: UUID,
+    inicio: Optional[datetime],
+    fim: Optional[datetime],
+    fuso: str,
+    apenas_ativas: bool = False,
+) -> schemas.AnaliseFormularioOut:
+    """Calcula NPS, distribuição de opções e resumos numéricos com GROUP BY no banco, sem carregar respostas no ORM."""
+    _, inicio, fim = normalizar_periodo(fuso, inicio, fim)
+    existe = db.query(models.Formulario.id).filter(models.Formulario.id == formulario_id).first()
+    if not existe:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Formulário não encontrado")
+
+    return schemas.AnaliseFormularioOut(
+        formulario_id=formulario_id,
+        inicio=inicio,
+        fim=fim,
+        total_respostas=contar_respostas_export(db, formulario_id, inicio, fim),
+        nps=_nps(db, formulario_id, inicio, fim, apenas_ativas),
+        distribuicoes=_distribuicoes(db, formulario_id, inicio, fim, apenas_ativas),
+        numeros=_numeros(db, formulario_id, inicio, fim, apenas_ativas),
+    )
+
+
+CATEGORIAS_NPS = (("promotores", "Promotores"), ("neutros", "Neutros"), ("detratores", "Detratores"))
+CATEGORIA_OUTROS = "outros"
+# código SQLSTATE de query_canceled (statement_timeout)
+PG_QUERY_CANCELED = "57014"
+
+
+def _eixo_crosstab(db: Session, formulario_id: UUID, pergunta_id: UUID, item) -> tuple:
+    """Resolve a pergunta de um eixo e retorna (pergunta, expressão SQL da categoria do item, filtro do item)."""
+    pergunta = (
+        db.query(models.Pergunta)
+        .filter(models.Pergunta.id == pergunta_id, models.Pergunta.formulario_id == formulario_id)
+        .first()
+    )
+    if not pergunta:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Pergunta não encontrada no formulário: {pergunta_id}")
+    if pergunta.tipo in TIPOS_DISTRIBUICAO:
+        categoria = case((item.valor_opcao_id.isnot(None), cast(item.valor_opcao_id, String)), else_=literal(CATEGORIA_OUTROS))
+        return pergunta, categoria, (item.valor_opcao_id.isnot(None)) | (item.valor_opcao_texto.isnot(None))
+    if pergunta.tipo == models.TipoPergunta.nps:
+        amplitude = pergunta.escala_max - pergunta.escala_min
+        relativo = (item.valor_numero - pergunta.escala_min) * 10
+        categoria = case(
+            (relativo >= 9 * amplitude, literal("promotores")),
+            (relativo >= 7 * amplitude, literal("neutros")),
+            else_=literal("detratores"),
+        )
+        return pergunta, categoria, item.valor_numero.isnot(None)
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Cruzamento aceita apenas perguntas de múltipla escolha, caixa de seleção ou NPS",
+    )
+
+
+def _categorias(db: Session, pergunta: models.Pergunta, presentes: set) -> list:
+    if pergunta.tipo == models.TipoPergunta.nps:
+        return [schemas.CategoriaCrosstabOut(chave=c, rotulo=r) for c, r in CATEGORIAS_NPS]
+    O = models.Opcao
+    opcoes = db.query(O.id, O.texto).filter(O.pergunta_id == pergunta.id).order_by(O.ordem, O.id).all()
+    categorias = [schemas.CategoriaCrosstabOut(chave=str(oid), rotulo=texto) for oid, texto in opcoes]
+    cadastradas = {c.chave for c in categorias}
+    # valores livres e opções removidas entram como "Outros"
+    if presentes - cadastradas:
+        categorias.append(schemas.CategoriaCrosstabOut(chave=CATEGORIA_OUTROS, rotulo="Outros"))
+    return categorias
+
+
+def cruzar_perguntas(
+    db: Session,
+    formulario_id: UUID,
+    linha_id: UUID,
+    coluna_id: UUID,
+    inicio: Optional[datetime],
+    fim: Optional[datetime],
+    fuso: str,
+) -> schemas.CrosstabOut:
+    """Tabela cruzada entre duas perguntas com self-join de respostas_itens por resposta, agregada no banco.
+
+    Cada célula conta as respostas que marcaram a categoria da linha e a da coluna. A matriz é densa:
+    todas as opções cadastradas aparecem, inclusive com zero. A consulta roda com statement_timeout.
+    """
+    _, inicio, fim = normalizar_periodo(fuso, inicio, fim)
+    R, A, B = models.Resposta, aliased(models.RespostaItem), aliased(models.RespostaItem)
+    linha, cat_linha, filtro_linha = _eixo_crosstab(db, formulario_id, linha_id, A)
+    coluna, cat_coluna, filtro_coluna = _eixo_crosstab(db, formulario_id, coluna_id, B)
+
+    q = (
+        db.query(cat_linha, cat_coluna, func.count())
+        .select_from(R)
+        .join(A, A.resposta_id == R.id)
+        .join(B, B.resposta_id == R.id)
+        .filter(R.formulario_id == formulario_id, A.pergunta_id == linha.id, B.pergunta_id == coluna.id, filtro_linha, filtro_coluna)
+    )
+    if inicio:
+        q = q.filter(R.criado_em >= inicio)
+    if fim:
+        q = q.filter(R.criado_em < fim)
+
+    db.execute(text("SELECT set_config('statement_timeout', :ms, true)"), {"ms": str(settings.CROSSTAB_STATEMENT_TIMEOUT_MS)})
+    try:
+        contagens = q.group_by(cat_linha, cat_coluna).all()
+    except OperationalError as e:
+        db.rollback()
+        if getattr(e.orig, "pgcode", None) == PG_QUERY_CANCELED:
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Cruzamento excedeu o tempo limite; reduza o período")
+        raise
+
+    linhas = _categorias(db, linha, {l for l, _, _ in contagens})
+    colunas = _categorias(db, coluna, {c for _, c, _ in contagens})
+    pos_linha = {c.chave: i for i, c in enumerate(linhas)}
+    pos_coluna = {c.chave: j for j, c in enumerate(colunas)}
+    celulas = [[0] * len(colunas) for _ in linhas]
+    for l, c, total in contagens:
+        i = pos_linha.get(l, pos_linha.get(CATEGORIA_OUTROS))
+        j = pos_coluna.get(c, pos_coluna.get(CATEGORIA_OUTROS))
+        celulas[i][j] += total
+
+    nps_linhas = None
+    if coluna.tipo == models.TipoPergunta.nps:
+        nps_linhas = []
+        for linha_celulas in celulas:
+            promotores, _, detratores = linha_celulas
+            total = sum(linha_celulas)
+            nps_linhas.append(round((promotores - detratores) * 100 / total, 2) if total else None)
+
+    return schemas.CrosstabOut(
+        formulario_id=formulario_id,
+        inicio=inicio,
+        fim=fim,
+        linha=schemas.EixoCrosstabOut(pergunta_id=linha.id, texto=linha.texto, tipo=linha.tipo.value, categorias=linhas),
+        coluna=schemas.EixoCrosstabOut(pergunta_id=coluna.id, texto=coluna.texto, tipo=coluna.tipo.value, categorias=colunas),
+        celulas=celulas,
+        total_linhas=[sum(l) for l in celulas],
+        total_colunas=[sum(l[j] for l in celulas) for j in range(len(colunas))],
+        nps_linhas=nps_linhas,
+    )
+
+
+def crosstab_csv(tabela: schemas.CrosstabOut, separador: str = ",") -> str:
+    """Serializa a tabela cruzada em CSV: rótulos da linha na primeira coluna, totais na última coluna e linha."""
+    if len(separador or "") != 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Separador deve ter exatamente um caractere")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=separador, quoting=csv.QUOTE_MINIMAL, lineterminator="\n")
+    extra = ["NPS"] if tabela.nps_linhas is not None else []
+    writer.writerow([f"{tabela.linha.texto} / {tabela.coluna.texto}", *[c.rotulo for c in tabela.coluna.categorias], "Total", *extra])
+    for i, categoria in enumerate(tabela.linha.categorias):
+        nps = [tabela.nps_linhas[i] if tabela.nps_linhas[i] is not None else ""] if extra else []
+        writer.writerow([categoria.rotulo, *tabela.celulas[i], tabela.total_linhas[i], *nps])
+    writer.writerow(["Total", *tabela.total_colunas, sum(tabela.total_linhas), *([""] if extra else [])])
+    return buffer.getvalue()
@@ -0,0 +1,88 @@
+# app/crud/busca.py
+import html
+from uuid import UUID
+from fastapi import HTTPException, status
+from sqlalchemy import func, literal_column
+from sqlalchemy.orm import Session
+from app import models, schemas
+
+# precisa ser idêntico à expressão do índice ix_respostas_itens_busca para o planner usá-lo
+CONFIG_BUSCA = literal_column("'portuguese'::regconfig")
+TIPOS_TEXTO = (models.TipoPergunta.texto_simples, models.TipoPergunta.texto_longo)
+
+# delimitadores improváveis no texto: o trecho é escapado antes de virar <mark>
+_INICIO_MARCA = "\x02"
+_FIM_MARCA = "\x03"
+OPCOES_TRECHO = f"StartSel={_INICIO_MARCA}, StopSel={_FIM_MARCA}, MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=\" … \""
+
+
+def _trecho_html(trecho: str) -> str:
+    return html.escape(trecho or "").replace(_INICIO_MARCA, "<mark>").replace(_FIM_MARCA, "</mark>")
+
+
+def buscar_respostas(db: Session, formulario_id: UUID, q: str, pagina: int = 1, por_pagina: int = 20) -> schemas.BuscaRespostasOut:
+    """Busca textual em português nas respostas de texto do formulário, ordenada por relevância.
+
+    Usa `websearch_to_tsquery` (aspas, OR e -termo) contra o índice GIN de `to_tsvector` em respostas_itens.
+    """
+    q = (q or "").strip()
+    if not q:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Informe o termo de busca")
+    existe = db.query(models.Formulario.id).filter(models.Formulario.id == formulario_id).first()
+    if not existe:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Formulário não encontrado")
+
+    R, RI, P = models.Resposta, models.RespostaItem, models.Pergunta
+    documento = func.to_tsvector(CONFIG_BUSCA, RI.valor_texto)
+    consulta = func.websearch_to_tsquery(CONFIG_BUSCA, q)
+    rank = func.ts_rank_cd(documento, consulta)
+
+    def _base(colunas):
+        return (
+            db.query(*colunas)
+            .select_from(RI)
+            .join(R, R.id == RI.resposta_id)
+            .join(P, P.id == RI.pergunta_id)
+            .filter(
+                R.formulario_id == formulario_id,
+                P.tipo.in_(TIPOS_TEXTO),
+                RI.valor_texto.isnot(None),
+                documento.op("@@")(consulta),
+            )
+        )
+
+    total = _base([func.count()]).scalar()
+    linhas = (
+        _base([
+            RI.resposta_id,
+            RI.id,
+            RI.pergunta_id,
+            P.texto,
+            R.criado_em,
+            rank,
+            func.ts_headline(CONFIG_BUSCA, RI.valor_texto, consulta, OPCOES_TRECHO),
+        ])
+        .order_by(rank.desc(), R.criado_em.desc(), RI.id)
+        .offset((pagina - 1) * por_pagina)
+        .limit(por_pagina)
+        .all()
+    )
+    return schemas.BuscaRespostasOut(
+        formulario_id=formulario_id,
+        q=q,
+        pagina=pagina,
+        por_pagina=por_pagina,
+        total=total,
+        resultados=[
+            schemas.BuscaRespostaItemOut(
+                resposta_id=rid,
+                item_id=iid,
+                pergunta_id=pid,
+                pergunta_texto=texto,
+                criado_em=criado_em,
+                rank=float(r),
+                trecho=_trecho_html(trecho),
+            )
+            for rid, iid, pid, texto, criado_em, r, trecho in linhas
+        ],
+    )
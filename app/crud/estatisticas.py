@@ -0,0 +1,230 @@
+# app/crud/estatisticas.py
+from typing import Iterable, List, Optional
+from uuid import UUID
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app import models, schemas
+
+TABELAS_ESTATISTICAS = ("respostas_stats_dia", "respostas_stats_opcoes", "respostas_stats_nps", "respostas_stats_numeros")
+
+FILTRO_RESPOSTAS = "r.id = ANY(%(ids)s::uuid[])"
+FILTRO_FORMULARIO = "r.formulario_id = %(formulario_id)s::uuid"
+FILTRO_TODAS = "TRUE"
+
+# posição relativa na escala da pergunta: equivale a 9–10 / 7–8 / 0–6 na escala 0–10
+_RELATIVO = "(i.valor_numero - p.escala_min) * 10"
+_AMPLITUDE = "(p.escala_max - p.escala_min)"
+
+
+def _sql_estatisticas(filtro: str, sinal: int) -> List[str]:
+    """Upserts que somam (sinal 1) ou subtraem (sinal -1) as respostas selecionadas por `filtro` nos rollups."""
+    numeros_conflito = (
+        "minimo = LEAST(respostas_stats_numeros.minimo, EXCLUDED.minimo), "
+        "maximo = GREATEST(respostas_stats_numeros.maximo, EXCLUDED.maximo)"
+        if sinal > 0 else
+        # extremos não podem ser descontados; são recalculados por recalcular_extremos após a exclusão
+        "minimo = respostas_stats_numeros.minimo, maximo = respostas_stats_numeros.maximo"
+    )
+    return [
+        f"""
+        INSERT INTO respostas_stats_dia (formulario_id, dia, total)
+        SELECT r.formulario_id, (r.criado_em AT TIME ZONE 'UTC')::date, {sinal} * count(*)
+        FROM respostas r
+        WHERE {filtro}
+        GROUP BY 1, 2
+        ON CONFLICT (formulario_id, dia) DO UPDATE SET total = respostas_stats_dia.total + EXCLUDED.total
+        """,
+        f"""
+        INSERT INTO respostas_stats_opcoes (pergunta_id, opcao_id, formulario_id, total)
+        SELECT i.pergunta_id, i.valor_opcao_id, r.formulario_id, {sinal} * count(*)
+        FROM respostas r JOIN respostas_itens i ON i.resposta_id = r.id
+        WHERE {filtro} AND i.valor_opcao_id IS NOT NULL
+        GROUP BY 1, 2, 3
+        ON CONFLICT (pergunta_id, opcao_id) DO UPDATE SET total = respostas_stats_opcoes.total + EXCLUDED.total
+        """,
+        f"""
+        INSERT INTO respostas_stats_nps (pergunta_id, formulario_id, promotores, neutros, detratores)
+        SELECT
+            i.pergunta_id,
+            r.formulario_id,
+            {sinal} * count(*) FILTER (WHERE {_RELATIVO} >= 9 * {_AMPLITUDE}),
+            {sinal} * count(*) FILTER (WHERE {_RELATIVO} >= 7 * {_AMPLITUDE} AND {_RELATIVO} < 9 * {_AMPLITUDE}),
+            {sinal} * count(*) FILTER (WHERE {_RELATIVO} < 7 * {_AMPLITUDE})
+        FROM respostas r
+        JOIN respostas_itens i ON i.resposta_id = r.id
+        JOIN perguntas p ON p.id = i.pergunta_id
+        WHERE {filtro} AND p.tipo = 'nps' AND i.valor_numero IS NOT NULL
+        GROUP BY 1, 2
+        ON CONFLICT (pergunta_id) DO UPDATE SET
+            promotores = respostas_stats_nps.promotores + EXCLUDED.promotores,
+            neutros = respostas_stats_nps.neutros + EXCLUDED.neutros,
+            detratores = respostas_stats_nps.detratores + EXCLUDED.detratores
+        """,
+        f"""
+        INSERT INTO respostas_stats_numeros (pergunta_id, formulario_id, total, soma, minimo, maximo)
+        SELECT
+            i.pergunta_id, r.formulario_id,
+            {sinal} * count(*), {sinal} * sum(i.valor_numero), min(i.valor_numero), max(i.valor_numero)
+        FROM respostas r
+        JOIN respostas_itens i ON i.resposta_id = r.id
+        JOIN perguntas p ON p.id = i.pergunta_id
+        WHERE {filtro} AND p.tipo = 'numero' AND i.valor_numero IS NOT NULL
+        GROUP BY 1, 2
+        ON CONFLICT (pergunta_id) DO UPDATE SET
+            total = respostas_stats_numeros.total + EXCLUDED.total,
+            soma = respostas_stats_numeros.soma + EXCLUDED.soma,
+            {numeros_conflito}
+        RETURNING pergunta_id
+        """,
+    ]
+
+
+# linhas que um desconto deixou zeradas; rodam antes do DELETE das respostas, que ainda indicam os formulários
+_FORMULARIOS_AFETADOS = "formulario_id IN (SELECT r.formulario_id FROM respostas r WHERE r.id = ANY(%(ids)s::uuid[]))"
+_SQL_PODAR_ZERADAS = [
+    f"DELETE FROM respostas_stats_dia WHERE {_FORMULARIOS_AFETADOS} AND total = 0",
+    f"DELETE FROM respostas_stats_opcoes WHERE {_FORMULARIOS_AFETADOS} AND total = 0",
+    f"DELETE FROM respostas_stats_nps WHERE {_FORMULARIOS_AFETADOS} AND promotores = 0 AND neutros = 0 AND detratores = 0",
+    f"DELETE FROM respostas_stats_numeros WHERE {_FORMULARIOS_AFETADOS} AND total = 0",
+]
+
+
+def aplicar_estatisticas(cur, resposta_ids: Iterable, sinal: int = 1) -> List[str]:
+    """Soma ou desconta as respostas nos rollups usando o cursor DBAPI da transação corrente.
+
+    Deve rodar na mesma transação da gravação (após inserir) ou da exclusão (antes de apagar).
+    Ao descontar, remove as linhas que ficaram zeradas. Retorna as perguntas numéricas afetadas, cujos
+    extremos precisam ser recalculados após uma exclusão.
+    """
+    ids = [str(i) for i in resposta_ids]
+    if not ids:
+        return []
+    numericas: List[str] = []
+    for sql in _sql_estatisticas(FILTRO_RESPOSTAS, sinal):
+        cur.execute(sql, {"ids": ids})
+        if "RETURNING" in sql:
+            numericas = [str(r[0]) for r in cur.fetchall()]
+    if sinal < 0:
+        for sql in _SQL_PODAR_ZERADAS:
+            cur.execute(sql, {"ids": ids})
+    return numericas
+
+
+def _cursor(db: Session):
+    """Cursor DBAPI na transação da sessão; use com `with` para fechá-lo ao final."""
+    return db.connection().connection.cursor()
+
+
+def registrar_estatisticas(db: Session, resposta_ids: Iterable) -> None:
+    """Soma respostas recém-inseridas (ainda não commitadas) nos rollups."""
+    with _cursor(db) as cur:
+        aplicar_estatisticas(cur, resposta_ids, 1)
+
+
+def descontar_estatisticas(db: Session, resposta_ids: Iterable) -> List[str]:
+    """Desconta respostas que serão apagadas; chame antes do DELETE e depois `recalcular_extremos`."""
+    with _cursor(db) as cur:
+        return aplicar_estatisticas(cur, resposta_ids, -1)
+
+
+def recalcular_extremos(db: Session, pergunta_ids: List[str]) -> None:
+    """Recalcula mínimo e máximo das perguntas numéricas pelo índice (pergunta_id, valor_numero)."""
+    if not pergunta_ids:
+        return
+    with _cursor(db) as cur:
+        cur.execute(
+            """
+            UPDATE respostas_stats_numeros n SET
+                minimo = (SELECT min(i.valor_numero) FROM respostas_itens i WHERE i.pergunta_id = n.pergunta_id),
+                maximo = (SELECT max(i.valor_numero) FROM respostas_itens i WHERE i.pergunta_id = n.pergunta_id)
+            WHERE n.pergunta_id = ANY(%(perguntas)s::uuid[])
+            """,
+            {"perguntas": pergunta_ids},
+        )
+
+
+def zerar_estatisticas(db: Session, formulario_id: UUID) -> None:
+    """Remove os rollups do formulário (usado quando todas as respostas são apagadas)."""
+    with _cursor(db) as cur:
+        _zerar(cur, formulario_id)
+
+
+def _zerar(cur, formulario_id: UUID) -> None:
+    for tabela in TABELAS_ESTATISTICAS:
+        cur.execute(f"DELETE FROM {tabela} WHERE formulario_id = %(formulario_id)s::uuid", {"formulario_id": str(formulario_id)})
+
+
+def reconstruir_estatisticas(db: Session, formulario_id: Optional[UUID] = None) -> None:
+    """Recalcula os rollups a partir de respostas_itens, para um formulário ou para todos.
+
+    As tabelas de rollup ficam bloqueadas para escrita durante a reconstrução: gravações concorrentes esperam e
+    somam suas respostas depois, sobre o resultado reconstruído, sem contagem dupla nem perda.
+    """
+    with _cursor(db) as cur:
+        cur.execute(f"LOCK TABLE {', '.join(TABELAS_ESTATISTICAS)} IN EXCLUSIVE MODE")
+        if formulario_id is None:
+            for tabela in TABELAS_ESTATISTICAS:
+                cur.execute(f"DELETE FROM {tabela}")
+            filtro, params = FILTRO_TODAS, {}
+        else:
+            _zerar(cur, formulario_id)
+            filtro, params = FILTRO_FORMULARIO, {"formulario_id": str(formulario_id)}
+        for sql in _sql_estatisticas(filtro, 1):
+            cur.execute(sql, params)
+    db.commit()
+
+
+def ler_estatisticas(db: Session, formulario_id: UUID) -> schemas.EstatisticasFormularioOut:
+    """Lê os indicadores principais direto dos rollups, com custo independente do volume de respostas."""
+    existe = db.query(models.Formulario.id).filter(models.Formulario.id == formulario_id).first()
+    if not existe:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Formulário não encontrado")
+    dias = (
+        db.query(models.RespostasStatsDia.dia, models.RespostasStatsDia.total)
+        .filter(models.RespostasStatsDia.formulario_id == formulario_id, models.RespostasStatsDia.total != 0)
+        .order_by(models.RespostasStatsDia.dia)
+        .all()
+    )
+    total_respostas = (
+        db.query(func.coalesce(func.sum(models.RespostasStatsDia.total), 0))
+        .filter(models.RespostasStatsDia.formulario_id == formulario_id)
+        .scalar()
+    )
+    nps = db.query(models.RespostasStatsNps).filter(models.RespostasStatsNps.formulario_id == formulario_id).all()
+    opcoes = (
+        db.query(models.RespostasStatsOpcao)
+        .filter(models.RespostasStatsOpcao.formulario_id == formulario_id, models.RespostasStatsOpcao.total != 0)
+        .all()
+    )
+    numeros = db.query(models.RespostasStatsNumero).filter(models.RespostasStatsNumero.formulario_id == formulario_id).all()
+
+    def _nps(n: models.RespostasStatsNps) -> schemas.NpsEstatisticaOut:
+        total = n.promotores + n.neutros + n.detratores
+        return schemas.NpsEstatisticaOut(
+            pergunta_id=n.pergunta_id,
+            total=total,
+            promotores=n.promotores,
+            neutros=n.neutros,
+            detratores=n.detratores,
+            nps=round((n.promotores - n.detratores) * 100 / total, 2) if total else None,
+        )
+
+    return schemas.EstatisticasFormularioOut(
+        formulario_id=formulario_id,
+        total_respostas=total_respostas,
+        por_dia=[schemas.ContagemDiaOut(dia=dia, total=total) for dia, total in dias],
+        nps=[_nps(n) for n in nps],
+        opcoes=[schemas.ContagemOpcaoEstatisticaOut(pergunta_id=o.pergunta_id, opcao_id=o.opcao_id, total=o.total) for o in opcoes],
+        numeros=[
+            schemas.NumeroEstatisticaOut(
+                pergunta_id=n.pergunta_id,
+                total=n.total,
+                soma=n.soma,
+                media=n.soma / n.total if n.total else None,
+                minimo=n.minimo,
+                maximo=n.maximo,
+            )
+            for n in numeros
+        ],
+    )
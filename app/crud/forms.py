@@ -1,19 +1,27 @@
 import anyio
 from fastapi import Depends, HTTPException, status
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload, selectinload, with_loader_criteria
+from sqlalchemy import and_, func, select, tuple_
+from sqlalchemy.orm import Session
 from app import models, schemas, crud
 from uuid import uuid4, UUID
 from app.dependencies.auth import get_current_user
 from app.websockets.notificadores_forms import notificar_formulario_criado, notificar_formulario_apagado, notificar_formulario_atualizado
-from datetime import datetime
-from typing import Optional, Iterable, Dict, Any, Set
-import io, csv, json
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Iterable, Dict, Any, Set, Callable
+import io, csv, json, tempfile, threading
 import pytz
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from openpyxl import Workbook
-from app.schemas.exportacao import ExportRow
-from app.utils.exportacao import resposta_para_export_row
+from app.utils.exportacao import LayoutExport, montar_layout_export, pivotar_linhas_export, codificar_cursor, decodificar_cursor
+from app.utils.exportacao_colunar import schema_arrow, escrever_parquet, stream_arrow
+from app.utils.compressao import ARQUIVOS_COMPRIMIDOS, comprimir_stream, escolher_compressao
+from app.services.exportacao import montar_consulta_copy, stream_copy_csv, stream_zip
+from app.core.config import settings
+from app.services.cache_exportacao import cache_exportacoes, invalidar_cache_exportacao
+from app.services.agregados_ws import recarregar_agregados
+from app.crud.plano_validacao import invalidar_plano_validacao
+from app.crud.snapshot_publico import invalidar_snapshot_publico
+from app.crud.grafo_formulario import carregar_grafo_formulario, opcoes_grafo_formulario
 
 
 TIPOS_COM_OPCOES = {
@@ -22,6 +30,26 @@ TIPOS_COM_OPCOES = {
     models.TipoPergunta.multipla_escolha_personalizada,
 }
 
+EXPORT_CHUNK_BYTES = 64 * 1024
+FORMATOS_EXPORT = {
+    "csv": ("csv", "text/csv"),
+    "ndjson": ("ndjson", "application/x-ndjson"),
+    "xlsx": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "arrow": ("arrows", "application/vnd.apache.arrow.stream"),
+}
+FORMATOS_COLUNARES = {"parquet", "arrow"}
+# xlsx, parquet e arrow já saem comprimidos; só os formatos texto são comprimidos via Accept-Encoding
+FORMATOS_COMPRIMIVEIS = {"csv", "ndjson"}
+# formatos que podem ser gerados em streaming, sem arquivo temporário, dentro do ZIP da exportação em lote
+FORMATOS_LOTE = {"csv", "ndjson", "arrow"}
+EXPORT_YIELD_PER = 2000
+XLSX_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+PARQUET_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+# limita os cursores de exportação em lote abertos ao mesmo tempo no processo
+_cursores_lote = threading.BoundedSemaphore(settings.EXPORT_LOTE_MAX_CURSORES)
+
 def criar_formulario(db: Session, dados: schemas.FormularioCreate, usuario: models.Usuario = Depends(get_current_user)):
     """Cria um formulário com perguntas e garante ACL total para o grupo do criador e para o grupo admin."""
     formulario = models.Formulario(
@@ -98,6 +126,7 @@ def listar_formularios(db: Session, grupo_id: UUID, incluir_inativos: bool = Fal
             models.FormularioPermissao.grupo_id == grupo_id,
             models.FormularioPermissao.pode_ver.is_(True),
         )
+        .options(*opcoes_grafo_formulario(apenas_ativas=False))
     )
     if not incluir_inativos:
         query = query.filter(models.Formulario.ativo == True)
@@ -111,15 +140,18 @@ def obter_formulario_por_id(db: Session, formulario_id: str):
     )
 
 def buscar_formulario_por_id(db: Session, formulario_id: str):
-    return (
-        db.query(models.Formulario)
-        .options(selectinload(models.Formulario.perguntas)
-                 .selectinload(models.Pergunta.opcoes),
-                 selectinload(models.Formulario.blocos)
-        )
-        .filter(models.Formulario.id == formulario_id, models.Pergunta.ativa==True)
-        .first()
-    )
+    """Retorna o formulário com blocos, perguntas ativas e opções."""
+    return carregar_grafo_formulario(db, formulario_id=formulario_id)
+
+def invalidar_caches_formulario(formulario_id) -> None:
+    """Descarta o plano de validação, o snapshot público e as exportações em cache após alterações no formulário."""
+    invalidar_plano_validacao(formulario_id)
+    invalidar_snapshot_publico(formulario_id)
+    from app.crud.serie import invalidar_cache_serie  # app.crud.serie importa este módulo
+
+    invalidar_cache_exportacao(formulario_id)
+    recarregar_agregados(formulario_id)
+    invalidar_cache_serie(formulario_id)
 
 BOOL_TRUE = {"true", "1", "t", "yes", "y"}
 def _to_bool(v):
@@ -142,16 +174,7 @@ def atualizar_formulario_parcial(db, payload: dict):
     except Exception:
         return None
 
-    formulario = (
-        db.query(models.Formulario)
-        .options(
-            selectinload(models.Formulario.perguntas)
-            .selectinload(models.Pergunta.opcoes),
-            selectinload(models.Formulario.blocos)
-        )
-        .filter(models.Formulario.id == formulario_id)
-        .first()
-    )
+    formulario = carregar_grafo_formulario(db, formulario_id=formulario_id, apenas_ativas=False)
     if not formulario or not formulario.ativo:
         return None
 
@@ -288,21 +311,11 @@ def atualizar_formulario_parcial(db, payload: dict):
         db.rollback()
         raise
     else:
+        invalidar_caches_formulario(formulario_id)
         anyio.from_thread.run(notificar_formulario_atualizado, str(formulario_id))
 
 
-    formulario = (
-        db.query(models.Formulario)
-        .options(
-            with_loader_criteria(models.Pergunta, models.Pergunta.ativa == True),
-            selectinload(models.Formulario.perguntas)
-            .selectinload(models.Pergunta.opcoes),
-            selectinload(models.Formulario.blocos)
-        )
-        .filter(models.Formulario.id == formulario_id)
-        .first()
-    )
-    return formulario
+    return carregar_grafo_formulario(db, formulario_id=formulario_id)
 
 def adicionar_pergunta(db: Session, dados: dict) -> models.Pergunta:
     nova = models.Pergunta(**dados)
@@ -320,6 +333,7 @@ def deletar_formulario(db: Session, formulario_id: UUID) -> bool:
         return False
     form.ativo = False
     db.commit()
+    invalidar_caches_formulario(formulario_id)
     anyio.from_thread.run(notificar_formulario_apagado, str(formulario_id))
 
     return True
@@ -332,115 +346,142 @@ def restaurar_formulario(db: Session, formulario_id: UUID) -> bool:
         return False
     form.ativo = True
     db.commit()
+    invalidar_caches_formulario(formulario_id)
     return True
 
 def obter_formulario_publico_por_slug(db: Session, slug: str) -> models.Formulario | None:
     """Retorna um formulário publicado com perguntas ativas e ordenadas pelo slug público."""
-    return(
-        db.query(models.Formulario)
-        .options(selectinload(models.Formulario.perguntas)
-                 .selectinload(models.Pergunta.opcoes),
-                 selectinload(models.Formulario.blocos)
-        )
-        .filter(models.Formulario.slug_publico == slug, models.Pergunta.ativa==True)
-        .first()
+    return carregar_grafo_formulario(db, slug=slug)
+
+def _layout_export(db: Session, formulario_id: UUID, apenas_ativas: bool = False) -> LayoutExport:
+    """Define as colunas da exportação pelo esquema: ordem dos blocos, depois `ordem_exibicao` das perguntas."""
+    P, B = models.Pergunta, models.Bloco
+    q = (
+        db.query(P.id, P.texto, P.tipo)
+        .join(B, B.id == P.bloco_id)
+        .filter(P.formulario_id == formulario_id)
+        .order_by(B.ordem.asc(), P.ordem_exibicao.asc().nulls_last(), P.id.asc())
     )
+    if apenas_ativas:
+        q = q.filter(P.ativa.is_(True))
+    return montar_layout_export(q.all())
 
 def _iter_export_rows(
     db: Session,
     formulario_id: UUID,
+    layout: LayoutExport,
     inicio: Optional[datetime],
     fim: Optional[datetime],
-    perguntas_ids_permitidas: Optional[Set[str]] = None,
-) -> Iterable[ExportRow]:
-    """Itera respostas do formulário aplicando filtros temporais e (opcionalmente) filtra colunas por IDs de perguntas permitidas."""
-    q = (
-        db.query(models.Resposta)
-        .filter(models.Resposta.formulario_id == formulario_id)
-        .order_by(models.Resposta.criado_em.asc())
+    tz=None,
+    apenas_ativas: bool = False,
+    desde: Optional[tuple] = None,
+    ate: Optional[tuple] = None,
+    formatar_data: bool = True,
+) -> Iterable[list]:
+    """Itera respostas do formulário em uma única query (cursor no servidor) sobre respostas e itens, pivotando em Python.
+
+    O valor tipado é resolvido no SQL e `apenas_ativas` restringe os itens às perguntas ativas na condição do join.
+    `desde` (exclusivo) e `ate` (inclusivo) são chaves (criado_em, id) para exportação incremental.
+    """
+    R, RI, O = models.Resposta, models.RespostaItem, models.Opcao
+
+    condicao_itens = RI.resposta_id == R.id
+    if apenas_ativas:
+        perguntas_ativas = select(models.Pergunta.id).where(
+            models.Pergunta.formulario_id == formulario_id, models.Pergunta.ativa.is_(True)
+        )
+        condicao_itens = and_(condicao_itens, RI.pergunta_id.in_(perguntas_ativas))
+
+    stmt = (
+        select(
+            R.id,
+            R.criado_em,
+            RI.pergunta_id,
+            func.coalesce(RI.valor_opcao_texto, O.texto, RI.valor_texto).label("valor_texto"),
+            RI.valor_numero,
+            RI.valor_data,
+        )
+        .select_from(R)
+        .outerjoin(RI, condicao_itens)
+        .outerjoin(O, O.id == RI.valor_opcao_id)
+        .where(R.formulario_id == formulario_id)
+        # valores múltiplos na ordem das opções, igual ao string_agg do modo copy
+        .order_by(R.criado_em.asc(), R.id.asc(), O.ordem.asc().nulls_last(), RI.id.asc())
     )
     if inicio:
-        q = q.filter(models.Resposta.criado_em >= inicio)
+        stmt = stmt.where(R.criado_em >= inicio)
     if fim:
-        q = q.filter(models.Resposta.criado_em < fim)
-    for resp in q.yield_per(500):
-        row = resposta_para_export_row(resp)
-        if perguntas_ids_permitidas is not None:
-            row.dados = {k: v for k, v in row.dados.items() if k in perguntas_ids_permitidas}
-        yield row
-
-def _csv_header_from_row(row: ExportRow) -> list[str]:
-    """Constrói cabeçalho padronizado para CSV/XLSX a partir de um ExportRow."""
-    cols = ["id", "criado_em"]
-    cols.extend(sorted(row.dados.keys()))
-    return cols
-
-async def _stream_csv(rows: Iterable[ExportRow], sep: str) -> Iterable[bytes]:
-    """Gera CSV em streaming a partir de ExportRow."""
-    it = iter(rows)
-    try:
-        first = next(it)
-    except StopIteration:
-        buffer = io.StringIO()
-        writer = csv.writer(buffer, delimiter=sep, quoting=csv.QUOTE_MINIMAL)
-        writer.writerow(["id", "criado_em"])
-        yield buffer.getvalue().encode("utf-8")
-        return
-
-    header = _csv_header_from_row(first)
+        stmt = stmt.where(R.criado_em < fim)
+    if desde:
+        stmt = stmt.where(tuple_(R.criado_em, R.id) > tuple_(*desde))
+    if ate:
+        stmt = stmt.where(tuple_(R.criado_em, R.id) <= tuple_(*ate))
+
+    linhas = db.execute(stmt.execution_options(yield_per=EXPORT_YIELD_PER))
+    return pivotar_linhas_export(linhas, layout, tz, formatar_data=formatar_data)
+
+def _stream_csv(rows: Iterable[list], colunas: list[str], sep: str) -> Iterable[bytes]:
+    """Gera CSV em streaming a partir das linhas já ordenadas conforme `colunas`."""
     buffer = io.StringIO()
     writer = csv.writer(buffer, delimiter=sep, quoting=csv.QUOTE_MINIMAL)
-    writer.writerow(header)
-    writer.writerow([first.id, first.criado_em.isoformat(), *[first.dados.get(k, "") for k in header[2:]]])
+    writer.writerow(colunas)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
     yield buffer.getvalue().encode("utf-8")
-    buffer.seek(0)
-    buffer.truncate(0)
 
-    for row in it:
-        writer.writerow([row.id, row.criado_em.isoformat(), *[row.dados.get(k, "") for k in header[2:]]])
-        yield buffer.getvalue().encode("utf-8")
-        buffer.seek(0)
-        buffer.truncate(0)
+def _stream_ndjson(rows: Iterable[list], colunas: list[str]) -> Iterable[bytes]:
+    """Gera NDJSON em streaming, um objeto por resposta com as chaves de `colunas`."""
+    for row in rows:
+        yield (json.dumps(dict(zip(colunas, row)), ensure_ascii=False, default=str) + "\n").encode("utf-8")
 
-async def _stream_ndjson(rows: Iterable[ExportRow]) -> Iterable[bytes]:
-    """Gera NDJSON em streaming a partir de ExportRow."""
+def _escrever_xlsx(rows: Iterable[list], colunas: list[str], destino) -> None:
+    """Grava a planilha XLSX em modo write-only, linha a linha, no caminho ou arquivo `destino`."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Respostas")
+    ws.append(colunas)
     for row in rows:
-        payload = {"id": row.id, "criado_em": row.criado_em.isoformat(), **row.dados}
-        yield (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
-
-def _gerar_xlsx(rows: Iterable[ExportRow]) -> io.BytesIO:
-    """Gera planilha XLSX em memória com base em ExportRow."""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Respostas"
-
-    rows_list = list(rows)
-    if not rows_list:
-        ws.append(["id", "criado_em"])
-    else:
-        header = _csv_header_from_row(rows_list[0])
-        ws.append(header)
-        for r in rows_list:
-            ws.append([r.id, r.criado_em.isoformat(), *[r.dados.get(k, "") for k in header[2:]]])
+        ws.append(row)
+    wb.save(destino)
 
-    buf = io.BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-    return buf
+def _gerar_xlsx(rows: Iterable[list], colunas: list[str]) -> tempfile.SpooledTemporaryFile:
+    """Gera planilha XLSX em modo write-only, gravando linha a linha em arquivo temporário."""
+    arquivo = tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_MAX_BYTES)
+    try:
+        _escrever_xlsx(rows, colunas, arquivo)
+    except Exception:
+        arquivo.close()
+        raise
+    arquivo.seek(0)
+    return arquivo
 
-# app/crud/forms.py
+def _gerar_parquet(rows: Iterable[list], schema) -> tempfile.SpooledTemporaryFile:
+    """Gera Parquet em arquivo temporário; o rodapé do formato só é conhecido ao final da escrita."""
+    arquivo = tempfile.SpooledTemporaryFile(max_size=PARQUET_SPOOL_MAX_BYTES)
+    try:
+        escrever_parquet(rows, schema, arquivo)
+    except Exception:
+        arquivo.close()
+        raise
+    arquivo.seek(0)
+    return arquivo
 
-def exportar_respostas(
-    db: Session,
-    formulario_id: UUID,
-    inicio: Optional[datetime],
-    fim: Optional[datetime],
-    formato: str,
-    fuso: str,
-    separador: str,
-    apenas_ativas: bool = False,
-):
-    """Exporta respostas de um formulário nos formatos CSV, NDJSON ou XLSX."""
+def _iterar_arquivo(arquivo, tamanho: int = EXPORT_CHUNK_BYTES) -> Iterable[bytes]:
+    """Lê o arquivo em blocos para o StreamingResponse e o fecha ao final."""
+    try:
+        while True:
+            chunk = arquivo.read(tamanho)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        arquivo.close()
+
+def normalizar_periodo(fuso: str, inicio: Optional[datetime], fim: Optional[datetime]):
+    """Valida o fuso e o aplica a `inicio`/`fim` sem timezone."""
     try:
         tz = pytz.timezone(fuso)
     except Exception:
@@ -450,7 +491,34 @@ def exportar_respostas(
         inicio = tz.localize(inicio)
     if fim and fim.tzinfo is None:
         fim = tz.localize(fim)
+    return tz, inicio, fim
+
+def _ultima_chave_export(
+    db: Session,
+    formulario_id: UUID,
+    inicio: Optional[datetime],
+    fim: Optional[datetime],
+    desde: Optional[tuple] = None,
+    limite: Optional[datetime] = None,
+) -> Optional[tuple]:
+    """Retorna a chave (criado_em, id) da última resposta que a exportação incluirá, usando o índice keyset.
+
+    Com `limite`, só considera respostas criadas antes dele.
+    """
+    R = models.Resposta
+    q = db.query(R.criado_em, R.id).filter(R.formulario_id == formulario_id)
+    if limite:
+        q = q.filter(R.criado_em < limite)
+    if inicio:
+        q = q.filter(R.criado_em >= inicio)
+    if fim:
+        q = q.filter(R.criado_em < fim)
+    if desde:
+        q = q.filter(tuple_(R.criado_em, R.id) > tuple_(*desde))
+    ultima = q.order_by(R.criado_em.desc(), R.id.desc()).first()
+    return tuple(ultima) if ultima else None
 
+def _garantir_respostas(db: Session, formulario_id: UUID) -> None:
     existe = (
         db.query(models.Resposta.id)
         .filter(models.Resposta.formulario_id == formulario_id)
@@ -460,34 +528,271 @@ def exportar_respostas(
     if not existe:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Formulário não encontrado ou sem respostas")
 
-    perguntas_ativas_ids: Optional[Set[str]] = None
-    if apenas_ativas:
-        perguntas_ativas_ids = {
-            str(pid)
-            for (pid,) in db.query(models.Pergunta.id)
-            .filter(models.Pergunta.formulario_id == formulario_id, models.Pergunta.ativa.is_(True))
-            .all()
-        }
+def validar_exportacao(db: Session, formulario_id: UUID, consulta: schemas.ExportQuery) -> None:
+    """Valida os parâmetros de uma exportação em segundo plano antes de enfileirá-la."""
+    normalizar_periodo(consulta.fuso, consulta.inicio, consulta.fim)
+    if len(consulta.separador or "") != 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Separador deve ter exatamente um caractere")
+    _garantir_respostas(db, formulario_id)
 
-    rows = _iter_export_rows(db, formulario_id, inicio, fim, perguntas_ids_permitidas=perguntas_ativas_ids)
+def contar_respostas_export(db: Session, formulario_id: UUID, inicio: Optional[datetime], fim: Optional[datetime]) -> int:
+    q = db.query(func.count(models.Resposta.id)).filter(models.Resposta.formulario_id == formulario_id)
+    if inicio:
+        q = q.filter(models.Resposta.criado_em >= inicio)
+    if fim:
+        q = q.filter(models.Resposta.criado_em < fim)
+    return q.scalar() or 0
+
+def gerar_arquivo_exportacao(
+    db: Session,
+    formulario_id: UUID,
+    consulta: schemas.ExportQuery,
+    destino: str,
+    progresso: Optional[Callable[[int, int], None]] = None,
+    intervalo_progresso: int = 1000,
+) -> int:
+    """Grava a exportação completa em `destino` e retorna o número de respostas exportadas.
+
+    `progresso(feitas, total)` é chamado a cada `intervalo_progresso` respostas e ao final.
+    """
+    tz, inicio, fim = normalizar_periodo(consulta.fuso, consulta.inicio, consulta.fim)
+    total = contar_respostas_export(db, formulario_id, inicio, fim)
+    layout = _layout_export(db, formulario_id, consulta.apenas_ativas)
+    feitas = 0
+
+    def _contadas(rows):
+        nonlocal feitas
+        for row in rows:
+            feitas += 1
+            if progresso and feitas % intervalo_progresso == 0:
+                progresso(feitas, total)
+            yield row
+
+    colunar = consulta.formato in FORMATOS_COLUNARES
+    schema = schema_arrow(layout, tz) if colunar else None
+    rows = _contadas(_iter_export_rows(
+        db, formulario_id, layout, inicio, fim, tz=tz, apenas_ativas=consulta.apenas_ativas, formatar_data=not colunar,
+    ))
+    if consulta.formato == "xlsx":
+        _escrever_xlsx(rows, layout.colunas, destino)
+    elif consulta.formato == "parquet":
+        escrever_parquet(rows, schema, destino)
+    elif consulta.formato == "arrow":
+        with open(destino, "wb") as out:
+            for parte in stream_arrow(rows, schema):
+                out.write(parte)
+    else:
+        partes = _stream_csv(rows, layout.colunas, consulta.separador) if consulta.formato == "csv" else _stream_ndjson(rows, layout.colunas)
+        with open(destino, "wb") as out:
+            for parte in partes:
+                out.write(parte)
+    if progresso:
+        progresso(feitas, total)
+    return feitas
+
+def exportar_respostas(
+    db: Session,
+    formulario_id: UUID,
+    inicio: Optional[datetime],
+    fim: Optional[datetime],
+    formato: str,
+    fuso: str,
+    separador: str,
+    apenas_ativas: bool = False,
+    modo: str = "padrao",
+    desde: Optional[str] = None,
+    compressao: Optional[str] = None,
+    accept_encoding: Optional[str] = None,
+):
+    """Exporta respostas de um formulário nos formatos CSV, NDJSON, XLSX, Parquet ou Arrow (IPC stream).
+
+    Com `modo=copy` (apenas CSV), o pivot é feito pelo Postgres e a saída de COPY TO STDOUT é repassada em blocos.
+    Com `desde`, exporta só as respostas posteriores ao cursor; o cursor para a próxima chamada vai no
+    cabeçalho `X-Proximo-Cursor`. A exportação é limitada à última resposta criada até EXPORT_CURSOR_MARGEM_S
+    segundos antes da requisição: `criado_em` é definido na validação e respostas mais recentes ainda podem
+    estar sendo gravadas (ex.: ingestão assíncrona), então só entram na próxima exportação.
+    CSV e NDJSON são comprimidos em trânsito (Content-Encoding) conforme o `Accept-Encoding`; com `compressao`
+    o download vira um arquivo comprimido (.gz/.zst) em qualquer formato. Exportações completas (sem `desde`)
+    são gravadas no cache em disco e repetições com a mesma marca d'água de respostas saem de lá via FileResponse.
+    """
+    tz, inicio, fim = normalizar_periodo(fuso, inicio, fim)
+    _garantir_respostas(db, formulario_id)
 
     formato = (formato or "").lower()  # robustez
-    if formato == "csv":
-        filename = f"form_{formulario_id}_respostas.csv"
-        generator = _stream_csv(rows, separador)
-        return StreamingResponse(generator, media_type="text/csv",
-                                 headers={"Content-Disposition": f'attachment; filename="{filename}"'})
-
-    if formato == "ndjson":
-        filename = f"form_{formulario_id}_respostas.ndjson"
-        generator = _stream_ndjson(rows)
-        return StreamingResponse(generator, media_type="application/x-ndjson",
-                                 headers={"Content-Disposition": f'attachment; filename="{filename}"'})
-
-    if formato == "xlsx":
-        filename = f"form_{formulario_id}_respostas.xlsx"
-        buf = _gerar_xlsx(rows)
-        return StreamingResponse(buf, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                 headers={"Content-Disposition": f'attachment; filename="{filename}"'})
-
-    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Formato inválido; use csv, ndjson ou xlsx")
+    modo = (modo or "padrao").lower()
+    if modo not in ("padrao", "copy"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Modo inválido; use padrao ou copy")
+    if len(separador or "") != 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Separador deve ter exatamente um caractere")
+    # o DELIMITER do COPY exige um único byte; validado antes de o cabeçalho começar a ser transmitido
+    if modo == "copy" and len(separador.encode("utf-8")) != 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No modo copy o separador deve ser um caractere ASCII")
+    if formato not in FORMATOS_EXPORT:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Formato inválido; use csv, ndjson, xlsx, parquet ou arrow")
+    codificacao, explicita = escolher_compressao(compressao, accept_encoding)
+
+    chave_desde = decodificar_cursor(desde) if desde else None
+    limite = datetime.now(timezone.utc) - timedelta(seconds=settings.EXPORT_CURSOR_MARGEM_S)
+    ate = _ultima_chave_export(db, formulario_id, inicio, fim, chave_desde, limite)
+    proximo_cursor = codificar_cursor(*ate) if ate else desde
+    cabecalhos_cursor = {"X-Proximo-Cursor": proximo_cursor} if proximo_cursor else {}
+    if ate is None:
+        # nada assentado após o cursor (ou, sem cursor, antes do limite): a exportação sai vazia
+        ate = chave_desde or (limite, UUID(int=0))
+
+    layout = _layout_export(db, formulario_id, apenas_ativas)
+    if modo == "copy" and formato != "csv":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="modo=copy suporta apenas formato csv")
+
+    ext, media_type = FORMATOS_EXPORT[formato]
+    headers = dict(cabecalhos_cursor)
+    comprimir = bool(codificacao) and (explicita or formato in FORMATOS_COMPRIMIVEIS)
+    if codificacao and explicita:
+        # arquivo comprimido para download (ex.: .csv.gz), sem Content-Encoding
+        ext_comp, media_type = ARQUIVOS_COMPRIMIDOS[codificacao]
+        ext = f"{ext}.{ext_comp}"
+    elif comprimir:
+        headers["Content-Encoding"] = codificacao
+    if not explicita and formato in FORMATOS_COMPRIMIVEIS:
+        headers["Vary"] = "Accept-Encoding"
+    headers["Content-Disposition"] = f'attachment; filename="form_{formulario_id}_respostas.{ext}"'
+
+    chave_cache = None
+    if chave_desde is None and cache_exportacoes.ativo:
+        chave_cache = cache_exportacoes.chave(
+            inicio=inicio, fim=fim, formato=formato, modo=modo, fuso=fuso, separador=separador,
+            apenas_ativas=apenas_ativas, compressao=codificacao if comprimir else None,
+            esquema=[layout.colunas, layout.tipos, [str(pid) for pid in layout.indices]],
+            marca=[contar_respostas_export(db, formulario_id, inicio, fim), ate],
+        )
+        caminho = cache_exportacoes.obter(formulario_id, chave_cache)
+        if caminho:
+            return FileResponse(caminho, media_type=media_type, headers=headers)
+
+    if modo == "copy":
+        consulta = montar_consulta_copy(formulario_id, layout, inicio, fim, apenas_ativas=apenas_ativas, desde=chave_desde, ate=ate)
+        generator = stream_copy_csv(consulta, layout.colunas, separador, fuso)
+    elif formato in FORMATOS_COLUNARES:
+        schema = schema_arrow(layout, tz)
+        rows = _iter_export_rows(
+            db, formulario_id, layout, inicio, fim, tz=tz, apenas_ativas=apenas_ativas,
+            desde=chave_desde, ate=ate, formatar_data=False,
+        )
+        if formato == "parquet":
+            generator = _iterar_arquivo(_gerar_parquet(rows, schema))
+        else:
+            generator = stream_arrow(rows, schema)
+    else:
+        rows = _iter_export_rows(db, formulario_id, layout, inicio, fim, tz=tz, apenas_ativas=apenas_ativas, desde=chave_desde, ate=ate)
+        if formato == "csv":
+            generator = _stream_csv(rows, layout.colunas, separador)
+        elif formato == "ndjson":
+            generator = _stream_ndjson(rows, layout.colunas)
+        else:
+            generator = _iterar_arquivo(_gerar_xlsx(rows, layout.colunas))
+
+    if comprimir:
+        generator = comprimir_stream(generator, codificacao)
+    if chave_cache:
+        generator = cache_exportacoes.gravando(formulario_id, chave_cache, generator)
+    return StreamingResponse(generator, media_type=media_type, headers=headers)
+
+def _partes_formulario_lote(
+    db: Session,
+    formulario_id: UUID,
+    layout: LayoutExport,
+    formato: str,
+    tz,
+    inicio: Optional[datetime],
+    fim: Optional[datetime],
+    separador: str,
+    apenas_ativas: bool,
+    schema=None,
+) -> Iterable[bytes]:
+    """Gera a exportação de um formulário do lote com seu próprio cursor, aberto só enquanto a entrada é escrita.
+
+    Roda numa thread do pool do servidor: a espera por um cursor livre é limitada a EXPORT_LOTE_ESPERA_CURSOR_S
+    e, esgotada, interrompe o ZIP em vez de prender a thread indefinidamente.
+    """
+    if not _cursores_lote.acquire(timeout=settings.EXPORT_LOTE_ESPERA_CURSOR_S):
+        print("[EXPORTACAO] lote interrompido: nenhum cursor livre para o formulário", formulario_id)
+        raise RuntimeError("Limite de exportações em lote simultâneas atingido")
+    try:
+        rows = _iter_export_rows(
+            db, formulario_id, layout, inicio, fim, tz=tz, apenas_ativas=apenas_ativas, formatar_data=formato != "arrow",
+        )
+        if formato == "arrow":
+            yield from stream_arrow(rows, schema)
+        elif formato == "ndjson":
+            yield from _stream_ndjson(rows, layout.colunas)
+        else:
+            yield from _stream_csv(rows, layout.colunas, separador)
+    finally:
+        _cursores_lote.release()
+
+def exportar_respostas_lote(
+    db: Session,
+    usuario: models.Usuario,
+    formulario_ids: list[UUID],
+    inicio: Optional[datetime],
+    fim: Optional[datetime],
+    formato: str,
+    fuso: str,
+    separador: str,
+    apenas_ativas: bool = False,
+):
+    """Exporta vários formulários em um ZIP gerado em streaming, com uma entrada por formulário.
+
+    Formulários e ACLs são verificados antes de enviar qualquer byte; cada entrada é produzida por um cursor
+    próprio, em sequência, e o número de cursores simultâneos no processo é limitado por EXPORT_LOTE_MAX_CURSORES.
+    Sem cursor livre no momento da requisição, responde 503 antes de começar o download.
+    """
+    tz, inicio, fim = normalizar_periodo(fuso, inicio, fim)
+    formato = (formato or "").lower()
+    if formato not in FORMATOS_LOTE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Formato inválido para exportação em lote; use csv, ndjson ou arrow")
+    if len(separador or "") != 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Separador deve ter exatamente um caractere")
+
+    ids = list(dict.fromkeys(formulario_ids))
+    if not ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Informe ao menos um formulário em ids")
+    if len(ids) > settings.EXPORT_LOTE_MAX_FORMULARIOS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Exportação em lote limitada a {settings.EXPORT_LOTE_MAX_FORMULARIOS} formulários",
+        )
+
+    existentes = {fid for (fid,) in db.query(models.Formulario.id).filter(models.Formulario.id.in_(ids))}
+    faltando = [str(fid) for fid in ids if fid not in existentes]
+    if faltando:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Formulários não encontrados: {', '.join(faltando)}")
+    negados = [str(fid) for fid in ids if not crud.tem_permissao_formulario(db, usuario, fid, "ver")]
+    if negados:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Sem permissão para ver os formulários: {', '.join(negados)}")
+
+    if not _cursores_lote.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Limite de exportações em lote simultâneas atingido; tente novamente",
+        )
+    _cursores_lote.release()
+
+    ext = FORMATOS_EXPORT[formato][0]
+    layouts = {fid: _layout_export(db, fid, apenas_ativas) for fid in ids}
+    schemas_arrow = {fid: schema_arrow(layout, tz) for fid, layout in layouts.items()} if formato == "arrow" else {}
+    entradas = (
+        (
+            f"form_{fid}_respostas.{ext}",
+            _partes_formulario_lote(
+                db, fid, layouts[fid], formato, tz, inicio, fim, separador, apenas_ativas, schemas_arrow.get(fid),
+            ),
+            formato in FORMATOS_COMPRIMIVEIS,
+        )
+        for fid in ids
+    )
+    return StreamingResponse(
+        stream_zip(entradas),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="formularios_respostas.zip"'},
+    )
@@ -0,0 +1,40 @@
+# app/crud/grafo_formulario.py
+from typing import Optional
+from uuid import UUID
+from sqlalchemy.orm import Session, selectinload, with_loader_criteria
+from app import models
+
+
+def opcoes_grafo_formulario(apenas_ativas: bool = True) -> list:
+    """Opções de carregamento do grafo do formulário: blocos, perguntas e opções via selectin (uma query por nível)."""
+    opcoes = [
+        selectinload(models.Formulario.blocos),
+        selectinload(models.Formulario.perguntas).selectinload(models.Pergunta.opcoes),
+    ]
+    if apenas_ativas:
+        opcoes.append(with_loader_criteria(models.Pergunta, models.Pergunta.ativa == True))
+    return opcoes
+
+
+def carregar_grafo_formulario(
+    db: Session,
+    formulario_id: Optional[UUID] = None,
+    slug: Optional[str] = None,
+    apenas_ativas: bool = True,
+) -> Optional[models.Formulario]:
+    """Carrega formulário, blocos, perguntas (ordenadas por ordem_exibicao) e opções em 4 queries fixas.
+
+    Informe `formulario_id` ou `slug`; com `apenas_ativas`, somente perguntas ativas são carregadas.
+    """
+    q = (
+        db.query(models.Formulario)
+        .options(*opcoes_grafo_formulario(apenas_ativas))
+        .execution_options(populate_existing=True)
+    )
+    if formulario_id is not None:
+        q = q.filter(models.Formulario.id == formulario_id)
+    elif slug is not None:
+        q = q.filter(models.Formulario.slug_publico == slug)
+    else:
+        return None
+    return q.first()
@@ -0,0 +1,182 @@
+# app/crud/identificadores.py
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+from uuid import UUID
+from fastapi import HTTPException
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app import models
+from app.core.config import settings
+
+CHAVES = ("email", "telefone", "cnpj")
+
+
+class FiltroBloom:
+    """Filtro de Bloom simples sobre bytearray, com k posições derivadas de um único blake2b."""
+
+    def __init__(self, capacidade: int, taxa_erro: float = 0.001):
+        capacidade = max(capacidade, 1)
+        self.m = max(8, int(-capacidade * math.log(taxa_erro) / (math.log(2) ** 2)))
+        self.k = max(1, round(self.m / capacidade * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+
+    def _posicoes(self, valor: str):
+        h = hashlib.blake2b(valor.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(h[:8], "little")
+        h2 = int.from_bytes(h[8:], "little") | 1
+        for i in range(self.k):
+            yield (h1 + i * h2) % self.m
+
+    def adicionar(self, valor: str) -> None:
+        for p in self._posicoes(valor):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, valor: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._posicoes(valor))
+
+
+class ConjuntoIdentificadores:
+    """Identificadores já usados em um formulário: conjunto exato para formulários pequenos, Bloom para os grandes."""
+
+    def __init__(self, valores: list, limite_exato: int):
+        self.limite_exato = limite_exato
+        self.criado = time.monotonic()
+        self.exato: Optional[set] = None
+        self.bloom: Optional[FiltroBloom] = None
+        if len(valores) <= limite_exato:
+            self.exato = set(valores)
+        else:
+            self._converter_para_bloom(valores)
+
+    def _converter_para_bloom(self, valores: Iterable[str]) -> None:
+        valores = list(valores)
+        self.bloom = FiltroBloom(len(valores) * 2)
+        for v in valores:
+            self.bloom.adicionar(v)
+        self.exato = None
+
+    @property
+    def aproximado(self) -> bool:
+        return self.bloom is not None
+
+    def contem(self, valor: str) -> bool:
+        return valor in self.bloom if self.bloom is not None else valor in self.exato
+
+    def adicionar(self, valor: str) -> None:
+        if self.bloom is not None:
+            self.bloom.adicionar(valor)
+            return
+        self.exato.add(valor)
+        if len(self.exato) > self.limite_exato:
+            self._converter_para_bloom(self.exato)
+
+    def remover(self, valor: str) -> None:
+        # Bloom não suporta remoção; o falso positivo resultante é descartado pela confirmação no banco.
+        if self.exato is not None:
+            self.exato.discard(valor)
+
+
+def _chave(campo: str, valor) -> str:
+    return f"{campo}:{valor}"
+
+
+def _identificadores(linha: dict) -> list:
+    return [_chave(c, linha.get(c)) for c in CHAVES if linha.get(c)]
+
+
+def _uuid(v) -> UUID:
+    return v if isinstance(v, UUID) else UUID(str(v))
+
+
+class CacheIdentificadores:
+    """Cache LRU por formulário dos identificadores únicos já gravados, aquecido sob demanda a partir do banco."""
+
+    def __init__(self, formularios_max: int, limite_exato: int, ttl: float):
+        self.formularios_max = formularios_max
+        self.limite_exato = limite_exato
+        self.ttl = ttl
+        self._conjuntos: "OrderedDict[UUID, ConjuntoIdentificadores]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _obter(self, formulario_id: UUID) -> Optional[ConjuntoIdentificadores]:
+        with self._lock:
+            conjunto = self._conjuntos.get(formulario_id)
+            if conjunto is None:
+                return None
+            if self.ttl and time.monotonic() - conjunto.criado > self.ttl:
+                del self._conjuntos[formulario_id]
+                return None
+            self._conjuntos.move_to_end(formulario_id)
+            return conjunto
+
+    def _aquecer(self, db: Session, formulario_id: UUID) -> ConjuntoIdentificadores:
+        R = models.Resposta
+        q = (
+            db.query(R.email, R.telefone, R.cnpj)
+            .filter(R.formulario_id == formulario_id, or_(R.email.isnot(None), R.telefone.isnot(None), R.cnpj.isnot(None)))
+            .yield_per(5000)
+        )
+        valores = []
+        for email, telefone, cnpj in q:
+            valores.extend(_identificadores({"email": email, "telefone": telefone, "cnpj": cnpj}))
+        conjunto = ConjuntoIdentificadores(valores, self.limite_exato)
+        with self._lock:
+            self._conjuntos[formulario_id] = conjunto
+            self._conjuntos.move_to_end(formulario_id)
+            while len(self._conjuntos) > self.formularios_max:
+                self._conjuntos.popitem(last=False)
+        return conjunto
+
+    def verificar(self, db: Session, resposta: dict) -> None:
+        """Rejeita com 409, antes de abrir transação de escrita, identificadores já usados no formulário."""
+        chaves = [(c, resposta.get(c)) for c in CHAVES if resposta.get(c)]
+        if not chaves:
+            return
+        formulario_id = _uuid(resposta["formulario_id"])
+        conjunto = self._obter(formulario_id) or self._aquecer(db, formulario_id)
+        for campo, valor in chaves:
+            if not conjunto.contem(_chave(campo, valor)):
+                continue
+            if conjunto.aproximado:
+                existe = (
+                    db.query(models.Resposta.id)
+                    .filter(models.Resposta.formulario_id == formulario_id, getattr(models.Resposta, campo) == valor)
+                    .limit(1)
+                    .first()
+                )
+                if not existe:
+                    continue
+            raise HTTPException(status_code=409, detail=f"Este identificador já respondeu a este formulário: {valor}")
+
+    def registrar(self, resposta: dict) -> None:
+        """Inclui os identificadores de uma resposta gravada no conjunto do formulário, se ele estiver aquecido."""
+        conjunto = self._obter(_uuid(resposta["formulario_id"]))
+        if conjunto is None:
+            return
+        with self._lock:
+            for v in _identificadores(resposta):
+                conjunto.adicionar(v)
+
+    def remover(self, resposta: dict) -> None:
+        """Retira os identificadores de uma resposta apagada do conjunto do formulário."""
+        conjunto = self._obter(_uuid(resposta["formulario_id"]))
+        if conjunto is None:
+            return
+        with self._lock:
+            for v in _identificadores(resposta):
+                conjunto.remover(v)
+
+    def invalidar(self, formulario_id) -> None:
+        with self._lock:
+            self._conjuntos.pop(_uuid(formulario_id), None)
+
+
+cache_identificadores = CacheIdentificadores(
+    settings.IDENTIFICADORES_CACHE_FORMULARIOS,
+    settings.IDENTIFICADORES_LIMITE_EXATO,
+    settings.IDENTIFICADORES_CACHE_TTL,
+)
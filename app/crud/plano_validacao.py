@@ -0,0 +1,180 @@
+# app/crud/plano_validacao.py
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+from uuid import UUID
+from sqlalchemy.orm import Session, selectinload
+from app import models
+from app.core.config import settings
+
+
+TIPOS_IDENTIFICADORES = {
+    models.TipoPergunta.email: "email",
+    models.TipoPergunta.telefone: "telefone",
+    models.TipoPergunta.cnpj: "cnpj",
+}
+
+
+@dataclass(frozen=True)
+class OpcaoPlano:
+    id: UUID
+    pergunta_id: UUID
+    texto: str
+    ordem: Optional[int]
+    personalizavel: bool
+
+
+@dataclass(frozen=True)
+class PerguntaPlano:
+    id: UUID
+    tipo: models.TipoPergunta
+    obrigatoria: bool
+    escala_min: int
+    escala_max: int
+    opcoes_ids: frozenset
+    opcoes: Mapping[UUID, OpcaoPlano]
+
+
+@dataclass(frozen=True)
+class PlanoValidacao:
+    formulario_id: UUID
+    slug_publico: Optional[str]
+    recebendo_respostas: bool
+    unico_por_chave_modo: str
+    perguntas: Mapping[UUID, PerguntaPlano]
+    obrigatorias: frozenset
+    identificadores: Mapping[UUID, str]
+
+
+def _compilar_plano(form: models.Formulario, perguntas: list) -> PlanoValidacao:
+    """Compila o formulário e suas perguntas ativas em um plano imutável, sem referências ao ORM."""
+    compiladas = {}
+    for p in perguntas:
+        opcoes = {
+            o.id: OpcaoPlano(id=o.id, pergunta_id=o.pergunta_id, texto=o.texto, ordem=o.ordem, personalizavel=bool(o.personalizavel))
+            for o in p.opcoes
+        }
+        compiladas[p.id] = PerguntaPlano(
+            id=p.id,
+            tipo=p.tipo,
+            obrigatoria=bool(p.obrigatoria),
+            escala_min=p.escala_min if p.escala_min is not None else 0,
+            escala_max=p.escala_max if p.escala_max is not None else 10,
+            opcoes_ids=frozenset(opcoes),
+            opcoes=MappingProxyType(opcoes),
+        )
+    return PlanoValidacao(
+        formulario_id=form.id,
+        slug_publico=form.slug_publico,
+        recebendo_respostas=bool(form.recebendo_respostas),
+        unico_por_chave_modo=(form.unico_por_chave_modo or "none").lower(),
+        perguntas=MappingProxyType(compiladas),
+        obrigatorias=frozenset(pid for pid, p in compiladas.items() if p.obrigatoria),
+        identificadores=MappingProxyType(
+            {pid: TIPOS_IDENTIFICADORES[p.tipo] for pid, p in compiladas.items() if p.tipo in TIPOS_IDENTIFICADORES}
+        ),
+    )
+
+
+class CachePlanos:
+    """Cache LRU em processo de planos de validação, indexado por id do formulário e por slug público."""
+
+    def __init__(self, tamanho: int, ttl: float):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self._planos: "OrderedDict[UUID, tuple[float, PlanoValidacao]]" = OrderedDict()
+        self._slugs: dict[str, UUID] = {}
+        self._lock = threading.Lock()
+
+    def obter(self, formulario_id: UUID) -> Optional[PlanoValidacao]:
+        """Retorna o plano em cache se existir e não estiver expirado."""
+        with self._lock:
+            entrada = self._planos.get(formulario_id)
+            if entrada is None:
+                return None
+            criado, plano = entrada
+            if self.ttl and time.monotonic() - criado > self.ttl:
+                self._remover(formulario_id)
+                return None
+            self._planos.move_to_end(formulario_id)
+            return plano
+
+    def obter_id_por_slug(self, slug: str) -> Optional[UUID]:
+        """Retorna o id do formulário associado ao slug, se conhecido."""
+        with self._lock:
+            return self._slugs.get(slug)
+
+    def guardar(self, plano: PlanoValidacao) -> None:
+        """Armazena o plano, descartando o menos usado quando o limite é atingido."""
+        with self._lock:
+            self._remover(plano.formulario_id)
+            self._planos[plano.formulario_id] = (time.monotonic(), plano)
+            if plano.slug_publico:
+                self._slugs[plano.slug_publico] = plano.formulario_id
+            while len(self._planos) > self.tamanho:
+                antigo = next(iter(self._planos))
+                self._remover(antigo)
+
+    def invalidar(self, formulario_id: UUID) -> None:
+        """Remove o plano do formulário do cache."""
+        with self._lock:
+            self._remover(formulario_id)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._planos.clear()
+            self._slugs.clear()
+
+    def _remover(self, formulario_id: UUID) -> None:
+        entrada = self._planos.pop(formulario_id, None)
+        if entrada and entrada[1].slug_publico:
+            self._slugs.pop(entrada[1].slug_publico, None)
+
+
+cache_planos = CachePlanos(settings.PLANO_VALIDACAO_CACHE_TAMANHO, settings.PLANO_VALIDACAO_CACHE_TTL)
+
+
+def _carregar_plano(db: Session, form: Optional[models.Formulario]) -> Optional[PlanoValidacao]:
+    if not form:
+        return None
+    perguntas = (
+        db.query(models.Pergunta)
+        .options(selectinload(models.Pergunta.opcoes))
+        .filter(models.Pergunta.formulario_id == form.id, models.Pergunta.ativa == True)
+        .all()
+    )
+    plano = _compilar_plano(form, perguntas)
+    cache_planos.guardar(plano)
+    return plano
+
+
+def obter_plano_validacao(db: Session, formulario_id: UUID) -> Optional[PlanoValidacao]:
+    """Retorna o plano de validação do formulário, consultando o banco apenas em caso de cache miss."""
+    plano = cache_planos.obter(formulario_id)
+    if plano is not None:
+        return plano
+    form = db.query(models.Formulario).filter(models.Formulario.id == formulario_id).first()
+    return _carregar_plano(db, form)
+
+
+def obter_plano_validacao_por_slug(db: Session, slug: str) -> Optional[PlanoValidacao]:
+    """Retorna o plano de validação do formulário identificado pelo slug público."""
+    formulario_id = cache_planos.obter_id_por_slug(slug)
+    if formulario_id is not None:
+        plano = cache_planos.obter(formulario_id)
+        if plano is not None and plano.slug_publico == slug:
+            return plano
+    form = db.query(models.Formulario).filter(models.Formulario.slug_publico == slug).first()
+    return _carregar_plano(db, form)
+
+
+def invalidar_plano_validacao(formulario_id) -> None:
+    """Descarta o plano em cache após alterações no formulário."""
+    try:
+        fid = formulario_id if isinstance(formulario_id, UUID) else UUID(str(formulario_id))
+    except ValueError:
+        return
+    cache_planos.invalidar(fid)
@@ -1,13 +1,23 @@
 # app/crud/respostas.py
 import re
-from collections import defaultdict
-from typing import List
-from uuid import UUID
+from datetime import datetime, timezone
+from typing import Any, List
+from uuid import UUID, uuid4
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
 from app import models, schemas
 from app.core.identidade import normalizar_email, normalizar_telefone, normalizar_cnpj
+from app.crud.plano_validacao import PerguntaPlano, PlanoValidacao, obter_plano_validacao
+from app.crud.identificadores import cache_identificadores
+from app.crud.estatisticas import registrar_estatisticas, descontar_estatisticas, recalcular_extremos
+from app.services.cache_exportacao import invalidar_cache_exportacao
+from app.services.agregados_ws import recarregar_agregados
+from app.crud.serie import invalidar_cache_serie
 
 
 TIPO_NPS = "nps"
@@ -21,6 +31,14 @@ IDENT_NORMALIZERS = {
     "cnpj": normalizar_cnpj,
 }
 
+PG_UNIQUE_VIOLATION = "23505"
+# índices únicos parciais de identificador (app/models/respostas.py) -> campo da resposta
+IDENT_CONSTRAINTS = {
+    "ux_respostas_form_email_partial": "email",
+    "ux_respostas_form_phone_partial": "telefone",
+    "ux_respostas_form_cnpj_partial": "cnpj",
+}
+
 MODE_PRIORITY = {
     "none": [],
     "email": ["email"],
@@ -54,19 +72,14 @@ def resolver_identificador_unico(modo: str, raw: dict) -> dict:
 
     raise HTTPException(400, "Informe o identificador requerido pelo formulário.")
 
-def _extrair_identificadores_do_payload(perguntas_map, itens_por_pergunta):
-    email = telefone = cnpj = None
-    for pid, grupo in itens_por_pergunta.items():
-        p = perguntas_map.get(pid)
-        if not p: 
-            continue
-        t = (getattr(p, "tipo", "") or "").lower()
-        for it in grupo:
-            v = getattr(it, "valor_texto", None)
-            if email is None and t == "email": email = v
-            if telefone is None and t == "telefone": telefone = v
-            if cnpj is None and t == "cnpj": cnpj = v
-    return {"email": email, "telefone": telefone, "cnpj": cnpj}
+def _extrair_identificadores_do_payload(plano: PlanoValidacao, itens) -> dict:
+    """Extrai o primeiro e-mail/telefone/CNPJ informado usando o mapa de identificadores do plano."""
+    out = {"email": None, "telefone": None, "cnpj": None}
+    for it in itens:
+        chave = plano.identificadores.get(it.pergunta_id)
+        if chave and out[chave] is None:
+            out[chave] = getattr(it, "valor_texto", None)
+    return out
 
 
 def _one_value(i):
@@ -82,165 +95,281 @@ def _one_value(i):
     count = (1 if has_text else 0) + (1 if has_num else 0) + (1 if has_date else 0) + opt_pair
     return count == 1
 
-def _validar_item_por_tipo(pergunta: "models.Pergunta", item: schemas.RespostaItemCreate) -> None:
+def _validar_opcao(pergunta: PerguntaPlano, item: schemas.RespostaItemCreate, msg: str) -> None:
+    if not item.valor_opcao_id and not item.valor_opcao_texto:
+        raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: {msg}")
+    if item.valor_opcao_id and item.valor_opcao_id not in pergunta.opcoes_ids:
+        raise HTTPException(status_code=422, detail=f"Opção não pertence à pergunta {pergunta.id}")
+
+def _validar_nps(pergunta: PerguntaPlano, item: schemas.RespostaItemCreate) -> None:
+    if item.valor_numero is None:
+        raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: NPS requer valor_numero")
+    mn, mx = pergunta.escala_min, pergunta.escala_max
+    if not (mn <= item.valor_numero <= mx):
+        raise HTTPException(status_code=422, detail=f"NPS fora da faixa [{mn},{mx}] na pergunta {pergunta.id}")
+
+def _validar_multipla_escolha(pergunta: PerguntaPlano, item: schemas.RespostaItemCreate) -> None:
+    _validar_opcao(pergunta, item, "múltipla escolha requer opção")
+
+def _validar_multipla_escolha_personalizada(pergunta: PerguntaPlano, item: schemas.RespostaItemCreate) -> None:
+    _validar_opcao(pergunta, item, "múltipla escolha personalizada requer opção ou texto personalizado")
+
+def _validar_caixa_selecao(pergunta: PerguntaPlano, item: schemas.RespostaItemCreate) -> None:
+    _validar_opcao(pergunta, item, "caixa_selecao requer opção")
+
+def _validar_texto(pergunta: PerguntaPlano, item: schemas.RespostaItemCreate) -> None:
+    if not item.valor_texto or not item.valor_texto.strip():
+        raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: texto requerido")
+
+def _validar_data(pergunta: PerguntaPlano, item: schemas.RespostaItemCreate) -> None:
+    if item.valor_data is None:
+        raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: data requerida")
+
+def _validar_numero(pergunta: PerguntaPlano, item: schemas.RespostaItemCreate) -> None:
+    if item.valor_numero is None:
+        raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: número requerido")
+
+def _validar_telefone(pergunta: PerguntaPlano, item: schemas.RespostaItemCreate) -> None:
+    if not item.valor_texto:
+        raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: telefone é obrigatório")
+    if not normalizar_telefone(item.valor_texto.strip()):
+        raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: telefone inválido")
+
+def _validar_email(pergunta: PerguntaPlano, item: schemas.RespostaItemCreate) -> None:
+    if not item.valor_texto:
+        raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: e-mail é obrigatório")
+    if not normalizar_email(item.valor_texto.strip().lower()):
+        raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: e-mail inválido")
+
+def _validar_cnpj(pergunta: PerguntaPlano, item: schemas.RespostaItemCreate) -> None:
+    if not item.valor_texto:
+        raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: CNPJ é obrigatório")
+    if not normalizar_cnpj(item.valor_texto.strip()):
+        raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: CNPJ inválido")
+
+VALIDADORES = {
+    models.TipoPergunta.nps: _validar_nps,
+    models.TipoPergunta.multipla_escolha: _validar_multipla_escolha,
+    models.TipoPergunta.multipla_escolha_personalizada: _validar_multipla_escolha_personalizada,
+    models.TipoPergunta.caixa_selecao: _validar_caixa_selecao,
+    models.TipoPergunta.texto_simples: _validar_texto,
+    models.TipoPergunta.texto_longo: _validar_texto,
+    models.TipoPergunta.data: _validar_data,
+    models.TipoPergunta.numero: _validar_numero,
+    models.TipoPergunta.telefone: _validar_telefone,
+    models.TipoPergunta.email: _validar_email,
+    models.TipoPergunta.cnpj: _validar_cnpj,
+}
+
+def _validar_item_por_tipo(pergunta: PerguntaPlano, item: schemas.RespostaItemCreate) -> None:
     if not _one_value(item):
         raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: envie exatamente 1 campo de valor")
-
-    t = pergunta.tipo
-    if t == models.TipoPergunta.nps:
-        if item.valor_numero is None:
-            raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: NPS requer valor_numero")
-        mn = pergunta.escala_min if pergunta.escala_min is not None else 0
-        mx = pergunta.escala_max if pergunta.escala_max is not None else 10
-        if not (mn <= item.valor_numero <= mx):
-            raise HTTPException(status_code=422, detail=f"NPS fora da faixa [{mn},{mx}] na pergunta {pergunta.id}")
-
-    elif t == models.TipoPergunta.multipla_escolha:
-        if not item.valor_opcao_id and not item.valor_opcao_texto:
-            raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: múltipla escolha requer opção")
-        if item.valor_opcao_id:
-            ids_validos = {o.id for o in pergunta.opcoes}
-            if item.valor_opcao_id not in ids_validos:
-                raise HTTPException(status_code=422, detail=f"Opção não pertence à pergunta {pergunta.id}")
-            
-    elif t == models.TipoPergunta.multipla_escolha_personalizada:
-        if not item.valor_opcao_id and not item.valor_opcao_texto:
-            raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: múltipla escolha personalizada requer opção ou texto personalizado")
-        if item.valor_opcao_id:
-            ids_validos = {o.id for o in pergunta.opcoes}
-            if item.valor_opcao_id not in ids_validos:
-                raise HTTPException(status_code=422, detail=f"Opção não pertence à pergunta {pergunta.id}")
-
-    elif t in {models.TipoPergunta.texto_simples, models.TipoPergunta.texto_longo}:
-        if not item.valor_texto or not item.valor_texto.strip():
-            raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: texto requerido")
-
-    elif t == models.TipoPergunta.data:
-        if item.valor_data is None:
-          raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: data requerida")
-
-    elif t == models.TipoPergunta.numero:
-        if item.valor_numero is None:
-            raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: número requerido")
-
-    elif t == models.TipoPergunta.caixa_selecao:
-        if not item.valor_opcao_id and not item.valor_opcao_texto:
-            raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: caixa_selecao requer opção")
-        if item.valor_opcao_id:
-            ids_validos = {o.id for o in pergunta.opcoes}
-            if item.valor_opcao_id not in ids_validos:
-                raise HTTPException(status_code=422, detail=f"Opção não pertence à pergunta {pergunta.id}")
-            
-    elif t == models.TipoPergunta.telefone:
-        if not item.valor_texto:
-            raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: telefone é obrigatório")
-        v = item.valor_texto.strip()
-        # digits = re.sub(r"\D+", "", v)
-        if not normalizar_telefone(v):
-            raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: telefone inválido")
-    
-    elif t == models.TipoPergunta.email:
-        if not item.valor_texto:
-            raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: e-mail é obrigatório")
-        v = item.valor_texto.strip().lower()
-        if not normalizar_email(v):
-            raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: e-mail inválido")
-    
-    elif t == models.TipoPergunta.cnpj:
-        if not item.valor_texto:
-            raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: CNPJ é obrigatório")
-        v = item.valor_texto.strip()
-        if not normalizar_cnpj(v):
-            raise HTTPException(status_code=422, detail=f"Pergunta {pergunta.id}: CNPJ inválido")
-
-        
-    else:
-        raise HTTPException(status_code=422, detail=f"Tipo não suportado: {t}")
-
-def _garantir_obrigatoria(pergunta: "models.Pergunta", item: schemas.RespostaItemCreate | None) -> None:
-    """Garante que perguntas obrigatórias tenham item válido presente."""
-    if not pergunta.obrigatoria:
-        return
-    if item is None:
-        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Pergunta obrigatória ausente: {pergunta.id}")
-
-def criar(db: Session, payload: schemas.RespostaCreate) -> models.Resposta:
-    """Cria uma resposta completa de um formulário com validação por tipo de pergunta e unicidade por e-mail/telefone."""
-    form = db.query(models.Formulario).filter(models.Formulario.id == payload.formulario_id).first()
-    if not form:
-        raise HTTPException(status_code=404, detail="Formulário não encontrado")
-    if not form.recebendo_respostas:
+    validador = VALIDADORES.get(pergunta.tipo)
+    if validador is None:
+        raise HTTPException(status_code=422, detail=f"Tipo não suportado: {pergunta.tipo}")
+    validador(pergunta, item)
+
+def validar_payload(plano: PlanoValidacao, payload: schemas.RespostaCreate) -> dict:
+    """Valida os itens do payload contra o plano do formulário e retorna os identificadores únicos resolvidos."""
+    if not plano.recebendo_respostas:
         raise HTTPException(status_code=403, detail="Formulário não está recebendo aceita respostas")
 
-    perguntas = (
-        db.query(models.Pergunta)
-        .options(selectinload(models.Pergunta.opcoes))
-        .filter(models.Pergunta.formulario_id == form.id, models.Pergunta.ativa == True)
-        .all()
+    presentes = set()
+    for item in payload.itens:
+        pergunta = plano.perguntas.get(item.pergunta_id)
+        if pergunta is None:
+            raise HTTPException(status_code=422, detail=f"Pergunta não pertence ao formulário: {item.pergunta_id}")
+        _validar_item_por_tipo(pergunta, item)
+        presentes.add(item.pergunta_id)
+
+    faltando = plano.obrigatorias - presentes
+    if faltando:
+        pid = next(pid for pid in plano.perguntas if pid in faltando)
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Pergunta obrigatória ausente: {pid}")
+
+    raw_ids = _extrair_identificadores_do_payload(plano, payload.itens)
+    return resolver_identificador_unico(plano.unico_por_chave_modo, raw_ids)
+
+def _opcao_out(pergunta: PerguntaPlano | None, opcao_id: UUID | None) -> schemas.OpcaoOut | None:
+    """Resolve a opção escolhida a partir dos rótulos em cache no plano."""
+    if pergunta is None or opcao_id is None:
+        return None
+    o = pergunta.opcoes.get(opcao_id)
+    if o is None:
+        return None
+    return schemas.OpcaoOut(id=o.id, pergunta_id=o.pergunta_id, texto=o.texto, ordem=o.ordem, personalizavel=o.personalizavel)
+
+def montar_resposta_out(plano: PlanoValidacao, resposta: dict, itens: List[dict]) -> schemas.RespostaOut:
+    """Monta o RespostaOut a partir dos valores já gravados, sem reconsultar o banco."""
+    return schemas.RespostaOut(
+        id=resposta["id"],
+        formulario_id=resposta["formulario_id"],
+        criado_em=resposta["criado_em"],
+        origem_ip=resposta["origem_ip"],
+        user_agent=resposta["user_agent"],
+        meta=resposta["meta"],
+        itens=[
+            schemas.RespostaItemOut(
+                id=i["id"],
+                pergunta_id=i["pergunta_id"],
+                valor_texto=i["valor_texto"],
+                valor_numero=i["valor_numero"],
+                valor_opcao_id=i["valor_opcao_id"],
+                valor_opcao_texto=i["valor_opcao_texto"],
+                valor_opcao=_opcao_out(plano.perguntas.get(i["pergunta_id"]), i["valor_opcao_id"]),
+            )
+            for i in itens
+        ],
     )
 
-    perguntas_map = {p.id: p for p in perguntas}
-    itens_por_pergunta = defaultdict(list)
-    for i in payload.itens:
-        itens_por_pergunta[i.pergunta_id].append(i)
-
-    for p in perguntas:
-        grupo = itens_por_pergunta.get(p.id, [])
-        _garantir_obrigatoria(p, grupo[0] if grupo else None)
-        for item in grupo:
-            _validar_item_por_tipo(p, item)
-
-    raw_ids = _extrair_identificadores_do_payload(perguntas_map, itens_por_pergunta)
-    ids = resolver_identificador_unico(getattr(form, "unico_por_chave_modo", "none"), raw_ids)
-
-
-    resp = models.Resposta(
-        formulario_id=form.id,
-        origem_ip=payload.origem_ip,
-        user_agent=payload.user_agent,
-        meta=payload.meta,
-        email=ids["email"],
-        telefone=ids["telefone"],
-        cnpj=ids["cnpj"],
-    )
-    db.add(resp)
+def _linhas_resposta(plano: PlanoValidacao, payload: schemas.RespostaCreate, ids: dict) -> tuple[dict, List[dict]]:
+    """Gera as linhas de respostas/respostas_itens com ids e timestamp definidos no lado da aplicação."""
+    resposta = {
+        "id": uuid4(),
+        "formulario_id": plano.formulario_id,
+        "criado_em": datetime.now(timezone.utc),
+        "origem_ip": payload.origem_ip,
+        "user_agent": payload.user_agent,
+        "meta": payload.meta,
+        "email": ids["email"],
+        "telefone": ids["telefone"],
+        "cnpj": ids["cnpj"],
+    }
+    itens = [
+        {
+            "id": uuid4(),
+            "resposta_id": resposta["id"],
+            "pergunta_id": i.pergunta_id,
+            "valor_texto": i.valor_texto,
+            "valor_numero": i.valor_numero,
+            "valor_opcao_id": i.valor_opcao_id,
+            "valor_opcao_texto": i.valor_opcao_texto,
+            "valor_data": i.valor_data,
+        }
+        for i in payload.itens
+    ]
+    return resposta, itens
+
+def preparar(db: Session, payload: schemas.RespostaCreate) -> tuple[PlanoValidacao, dict, List[dict]]:
+    """Valida o payload contra o plano do formulário e devolve as linhas prontas para gravação."""
+    plano = obter_plano_validacao(db, payload.formulario_id)
+    if not plano:
+        raise HTTPException(status_code=404, detail="Formulário não encontrado")
+    ids = validar_payload(plano, payload)
+    resposta, itens = _linhas_resposta(plano, payload, ids)
+    cache_identificadores.verificar(db, resposta)
+    return plano, resposta, itens
+
+def criar(db: Session, payload: schemas.RespostaCreate) -> schemas.RespostaOut:
+    """Cria uma resposta completa de um formulário com validação por tipo de pergunta e unicidade por e-mail/telefone.
+
+    Grava a resposta com INSERT ... RETURNING e todos os itens em um único executemany,
+    montando a saída a partir do payload validado e dos rótulos de opções em cache.
+    """
+    plano, resposta, itens = preparar(db, payload)
     try:
-        db.flush()
-    except IntegrityError:
+        resposta["criado_em"] = db.execute(
+            insert(models.Resposta).values(**resposta).returning(models.Resposta.criado_em)
+        ).scalar_one()
+        if itens:
+            db.execute(insert(models.RespostaItem), itens)
+        registrar_estatisticas(db, [resposta["id"]])
+        db.commit()
+    except IntegrityError as e:
         db.rollback()
-        ident = resp.email or resp.telefone or resp.cnpj
-        raise HTTPException(status_code=409, detail= f"Este identificador já respondeu a este formulário: {ident}")
-
-    itens_out: List[models.RespostaItem] = []
-    for i in payload.itens:
-        if i.pergunta_id not in perguntas_map:
-            raise HTTPException(status_code=422, detail=f"Pergunta não pertence ao formulário: {i.pergunta_id}")
-        itens_out.append(
-            models.RespostaItem(
-                resposta_id=resp.id,
-                pergunta_id=i.pergunta_id,
-                valor_texto=i.valor_texto,
-                valor_numero=i.valor_numero,
-                valor_opcao_id=i.valor_opcao_id,
-                valor_opcao_texto=i.valor_opcao_texto,
-                valor_data=i.valor_data,
+        diag = getattr(e.orig, "diag", None)
+        campo = IDENT_CONSTRAINTS.get(getattr(diag, "constraint_name", None))
+        if getattr(e.orig, "pgcode", None) != PG_UNIQUE_VIOLATION or campo is None:
+            raise
+        # só o identificador que de fato colidiu passa a constar no cache do formulário
+        cache_identificadores.registrar({"formulario_id": resposta["formulario_id"], campo: resposta[campo]})
+        raise HTTPException(status_code=409, detail= f"Este identificador já respondeu a este formulário: {resposta[campo]}")
+
+    cache_identificadores.registrar(resposta)
+    invalidar_cache_exportacao(resposta["formulario_id"])
+    return montar_resposta_out(plano, resposta, itens)
+
+def itens_com_valor(itens) -> List[dict]:
+    """Descarta itens enviados sem nenhum campo de valor preenchido."""
+    out = []
+    for i in itens or []:
+        d = i.model_dump() if hasattr(i, "model_dump") else dict(i)
+        if any(d.get(k) is not None for k in ("valor_texto", "valor_numero", "valor_opcao_id", "valor_opcao_texto", "valor_data")):
+            out.append(d)
+    return out
+
+def criar_lote(
+    db: Session,
+    plano: PlanoValidacao,
+    brutos: List[Any],
+    origem_ip: str | None = None,
+    inicio: int = 0,
+) -> tuple[List[dict], List[schemas.RespostaOut]]:
+    """Valida um lote de respostas contra um único plano e grava todas as válidas em um só INSERT.
+
+    Retorna o resultado por item (201 com id, ou 409/422 com detalhe) e as respostas criadas; `inicio` é o
+    índice do primeiro item quando o lote é um bloco de uma requisição maior.
+    """
+    resultados: List[dict] = [None] * len(brutos)
+    preparadas = []
+    vistos = set()
+    for posicao, bruto in enumerate(brutos):
+        indice = inicio + posicao
+        try:
+            publico = schemas.RespostaCreatePublico.model_validate(bruto)
+            payload = schemas.RespostaCreate(
+                formulario_id=plano.formulario_id,
+                itens=itens_com_valor(publico.itens),
+                origem_ip=publico.origem_ip or origem_ip,
+                user_agent=publico.user_agent,
+                meta=publico.meta,
             )
-        )
-    db.add_all(itens_out)
+            ids = validar_payload(plano, payload)
+            resposta, itens = _linhas_resposta(plano, payload, ids)
+            cache_identificadores.verificar(db, resposta)
+            chaves = {(k, resposta[k]) for k in ("email", "telefone", "cnpj") if resposta[k]}
+            if chaves & vistos:
+                ident = resposta["email"] or resposta["telefone"] or resposta["cnpj"]
+                raise HTTPException(status_code=409, detail=f"Este identificador já respondeu a este formulário: {ident}")
+            vistos |= chaves
+            preparadas.append((indice, resposta, itens))
+        except ValidationError as e:
+            resultados[posicao] = {"indice": indice, "status": 422, "detail": jsonable_encoder(e.errors(include_url=False, include_context=False))}
+        except HTTPException as e:
+            resultados[posicao] = {"indice": indice, "status": e.status_code, "detail": e.detail}
+
+    criadas: List[schemas.RespostaOut] = []
+    if not preparadas:
+        return resultados, criadas
+
     try:
+        stmt = (
+            pg_insert(models.Resposta)
+            .values([r for _, r, _ in preparadas])
+            .on_conflict_do_nothing()
+            .returning(models.Resposta.id)
+        )
+        inseridos = set(db.execute(stmt).scalars().all())
+        itens_inseridos = [i for _, r, its in preparadas if r["id"] in inseridos for i in its]
+        if itens_inseridos:
+            db.execute(insert(models.RespostaItem), itens_inseridos)
+        registrar_estatisticas(db, inseridos)
         db.commit()
-    except IntegrityError:
+    except Exception:
         db.rollback()
-        raise HTTPException(status_code=409, detail="Este identificador já respondeu a este formulário.")
-
-    db.refresh(resp)
-    created_resp = (
-        db.query(models.Resposta)
-        .options(selectinload(models.Resposta.itens).selectinload(models.RespostaItem.valor_opcao))
-        .filter(models.Resposta.id == resp.id)
-        .one()
-    )
-    return created_resp
+        raise
+    if inseridos:
+        invalidar_cache_exportacao(plano.formulario_id)
+
+    for indice, resposta, itens in preparadas:
+        cache_identificadores.registrar(resposta)
+        if resposta["id"] not in inseridos:
+            ident = resposta["email"] or resposta["telefone"] or resposta["cnpj"]
+            resultados[indice - inicio] = {"indice": indice, "status": 409, "detail": f"Este identificador já respondeu a este formulário: {ident}"}
+            continue
+        criadas.append(montar_resposta_out(plano, resposta, itens))
+        resultados[indice - inicio] = {"indice": indice, "status": 201, "id": resposta["id"]}
+    return resultados, criadas
 
 def listar_por_formulario_ws(db: Session, formulario_id: UUID) -> List[models.Resposta]:
     """Lista respostas de um formulário."""
@@ -287,6 +416,14 @@ def deletar(db: Session, resposta_id: UUID) -> bool:
     resp = db.query(models.Resposta).filter(models.Resposta.id == resposta_id).first()
     if not resp:
         return False
+    identificadores = {"formulario_id": resp.formulario_id, "email": resp.email, "telefone": resp.telefone, "cnpj": resp.cnpj}
+    numericas = descontar_estatisticas(db, [resposta_id])
     db.delete(resp)
+    db.flush()
+    recalcular_extremos(db, numericas)
     db.commit()
+    cache_identificadores.remover(identificadores)
+    invalidar_cache_exportacao(identificadores["formulario_id"])
+    recarregar_agregados(identificadores["formulario_id"])
+    invalidar_cache_serie(identificadores["formulario_id"])
     return True
@@ -0,0 +1,206 @@
+# app/crud/serie.py
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from uuid import UUID
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, func
+from sqlalchemy.orm import Session
+from app import models, schemas
+from app.core.config import settings
+from app.crud.forms import normalizar_periodo
+
+# largura máxima de um bucket (com folga para mudança de horário de verão), usada como limite de índice em criado_em
+LARGURA_MAXIMA = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(hours=26),
+    "week": timedelta(days=7, hours=2),
+}
+DETALHES = ("opcoes", "nps")
+
+
+@dataclass
+class SerieEmCache:
+    """Buckets fechados já calculados: todo bucket com início em [de, ate) está em `buckets` (ausente = zero)."""
+    de: datetime
+    ate: datetime
+    buckets: Dict[datetime, dict] = field(default_factory=dict)
+
+
+class CacheSeries:
+    """Cache LRU em processo dos buckets fechados por (formulário, bucket, fuso, detalhe).
+
+    Buckets fechados são imutáveis enquanto não houver exclusões; `invalidar` é chamado nesses casos.
+    """
+
+    def __init__(self, tamanho: int):
+        self.tamanho = tamanho
+        self._series: "OrderedDict[tuple, SerieEmCache]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave: tuple) -> Optional[SerieEmCache]:
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is not None:
+                self._series.move_to_end(chave)
+            return serie
+
+    def guardar(self, chave: tuple, serie: SerieEmCache) -> None:
+        if not self.tamanho:
+            return
+        with self._lock:
+            self._series[chave] = serie
+            self._series.move_to_end(chave)
+            while len(self._series) > self.tamanho:
+                self._series.popitem(last=False)
+
+    def invalidar(self, formulario_id) -> None:
+        with self._lock:
+            for chave in [c for c in self._series if c[0] == str(formulario_id)]:
+                del self._series[chave]
+
+
+cache_series = CacheSeries(settings.SERIE_CACHE_TAMANHO)
+
+
+def invalidar_cache_serie(formulario_id) -> None:
+    """Descarta os buckets em cache do formulário após exclusões de respostas ou mudanças de escala."""
+    if formulario_id is not None:
+        cache_series.invalidar(formulario_id)
+
+
+def _truncar(db: Session, bucket: str, instante: datetime, fuso: str) -> datetime:
+    return db.query(func.date_trunc(bucket, instante, fuso, type_=DateTime(timezone=True))).scalar()
+
+
+def _calcular(db: Session, formulario_id: UUID, bucket: str, fuso: str, detalhe: Optional[str], de: datetime, ate: datetime) -> Dict[datetime, dict]:
+    """Agrega os buckets com início em [de, ate), sempre inteiros, com GROUP BY no índice (formulario_id, criado_em)."""
+    R, RI, P = models.Resposta, models.RespostaItem, models.Pergunta
+    inicio = func.date_trunc(bucket, R.criado_em, fuso, type_=DateTime(timezone=True))
+
+    def _periodo(q):
+        return q.filter(
+            R.formulario_id == formulario_id,
+            R.criado_em >= de,
+            R.criado_em < ate + LARGURA_MAXIMA[bucket],
+            inicio >= de,
+            inicio < ate,
+        )
+
+    buckets: Dict[datetime, dict] = {}
+    for b, total in _periodo(db.query(inicio, func.count())).group_by(inicio):
+        buckets[b] = {"total": total, "opcoes": {}, "nps": {}}
+
+    if detalhe == "opcoes":
+        linhas = (
+            _periodo(db.query(inicio, RI.pergunta_id, RI.valor_opcao_id, func.count()).join(RI, RI.resposta_id == R.id))
+            .filter(RI.valor_opcao_id.isnot(None))
+            .group_by(inicio, RI.pergunta_id, RI.valor_opcao_id)
+        )
+        for b, pid, oid, total in linhas:
+            buckets[b]["opcoes"][(pid, oid)] = total
+    elif detalhe == "nps":
+        amplitude = P.escala_max - P.escala_min
+        relativo = (RI.valor_numero - P.escala_min) * 10
+        linhas = (
+            _periodo(
+                db.query(
+                    inicio,
+                    RI.pergunta_id,
+                    func.count().filter(relativo >= 9 * amplitude),
+                    func.count().filter(relativo >= 7 * amplitude, relativo < 9 * amplitude),
+                    func.count().filter(relativo < 7 * amplitude),
+                )
+                .join(RI, RI.resposta_id == R.id)
+                .join(P, P.id == RI.pergunta_id)
+            )
+            .filter(P.tipo == models.TipoPergunta.nps, RI.valor_numero.isnot(None))
+            .group_by(inicio, RI.pergunta_id)
+        )
+        for b, pid, promotores, neutros, detratores in linhas:
+            buckets[b]["nps"][pid] = (promotores, neutros, detratores)
+    return buckets
+
+
+def _bucket_out(inicio: datetime, dados: dict, detalhe: Optional[str]) -> schemas.SerieBucketOut:
+    out = schemas.SerieBucketOut(inicio=inicio, total=dados["total"])
+    if detalhe == "opcoes":
+        out.opcoes = [
+            schemas.ContagemOpcaoEstatisticaOut(pergunta_id=pid, opcao_id=oid, total=total)
+            for (pid, oid), total in dados["opcoes"].items()
+        ]
+    elif detalhe == "nps":
+        out.nps = []
+        for pid, (promotores, neutros, detratores) in dados["nps"].items():
+            total = promotores + neutros + detratores
+            out.nps.append(schemas.NpsEstatisticaOut(
+                pergunta_id=pid,
+                total=total,
+                promotores=promotores,
+                neutros=neutros,
+                detratores=detratores,
+                nps=round((promotores - detratores) * 100 / total, 2) if total else None,
+            ))
+    return out
+
+
+def serie_formulario(
+    db: Session,
+    formulario_id: UUID,
+    bucket: str,
+    fuso: str,
+    inicio: Optional[datetime] = None,
+    fim: Optional[datetime] = None,
+    detalhe: Optional[str] = None,
+) -> schemas.SerieOut:
+    """Contagem de respostas por bucket (hora, dia ou semana) no fuso pedido, opcionalmente por opção ou NPS.
+
+    `inicio` e `fim` selecionam buckets inteiros: entra todo bucket cujo início esteja em [trunc(inicio), fim).
+    Buckets fechados há mais de SERIE_MARGEM_S segundos vêm do cache; só o trecho ainda aberto é recalculado.
+    Buckets sem respostas são omitidos.
+    """
+    if bucket not in LARGURA_MAXIMA:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Bucket inválido; use hour, day ou week")
+    if detalhe is not None and detalhe not in DETALHES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Detalhe inválido; use opcoes ou nps")
+    _, inicio, fim = normalizar_periodo(fuso, inicio, fim)
+    existe = db.query(models.Formulario.id).filter(models.Formulario.id == formulario_id).first()
+    if not existe:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Formulário não encontrado")
+
+    agora = datetime.now(timezone.utc)
+    fim = min(fim, agora) if fim else agora
+    if inicio is None:
+        inicio = (
+            db.query(func.min(models.Resposta.criado_em))
+            .filter(models.Resposta.formulario_id == formulario_id)
+            .scalar()
+        )
+    saida = schemas.SerieOut(formulario_id=formulario_id, bucket=bucket, fuso=fuso, inicio=inicio, fim=fim, buckets=[])
+    if inicio is None or inicio >= fim:
+        return saida
+
+    de = _truncar(db, bucket, inicio, fuso)
+    # início do primeiro bucket ainda aberto (com margem para gravações atrasadas, ex.: ingestão assíncrona)
+    aberto = _truncar(db, bucket, agora - timedelta(seconds=settings.SERIE_MARGEM_S), fuso)
+    fechado_ate = min(aberto, fim)
+
+    chave = (str(formulario_id), bucket, fuso, detalhe)
+    cache = cache_series.obter(chave)
+    if cache is None or de > cache.ate or fechado_ate < cache.de:
+        cache = SerieEmCache(de=de, ate=de)
+
+    buckets = dict(cache.buckets)
+    if de < cache.de:
+        buckets.update(_calcular(db, formulario_id, bucket, fuso, detalhe, de, cache.de))
+    recentes = _calcular(db, formulario_id, bucket, fuso, detalhe, cache.ate, fim) if cache.ate < fim else {}
+    buckets.update(recentes)
+
+    novo_ate = max(cache.ate, fechado_ate)
+    fechados = {b: d for b, d in buckets.items() if b < novo_ate}
+    cache_series.guardar(chave, SerieEmCache(de=min(de, cache.de), ate=novo_ate, buckets=fechados))
+
+    saida.buckets = [_bucket_out(b, buckets[b], detalhe) for b in sorted(buckets) if de <= b < fim]
+    return saida
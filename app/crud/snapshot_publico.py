@@ -0,0 +1,113 @@
+# app/crud/snapshot_publico.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from uuid import UUID
+from sqlalchemy.orm import Session
+from app import models, schemas
+from app.core.config import settings
+from app.crud.grafo_formulario import carregar_grafo_formulario
+
+
+@dataclass(frozen=True)
+class SnapshotPublico:
+    formulario_id: UUID
+    etag: str
+    corpo: bytes
+    criado: float
+
+
+def serializar_formulario_publico(formulario: models.Formulario) -> bytes:
+    """Serializa o formulário no formato público (FormularioPublicoResponse) em bytes JSON."""
+    out = schemas.FormularioPublicoResponse.model_validate({
+        "titulo": formulario.titulo,
+        "descricao": formulario.descricao,
+        "blocos": formulario.blocos,
+        "perguntas": formulario.perguntas,
+    })
+    return out.model_dump_json().encode("utf-8")
+
+
+class CacheSnapshots:
+    """Cache LRU em processo do JSON público por slug, com ETag forte derivado do conteúdo."""
+
+    def __init__(self, tamanho: int, ttl: float):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self._snapshots: "OrderedDict[str, SnapshotPublico]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, slug: str) -> Optional[SnapshotPublico]:
+        with self._lock:
+            snap = self._snapshots.get(slug)
+            if snap is None:
+                return None
+            if self.ttl and time.monotonic() - snap.criado > self.ttl:
+                del self._snapshots[slug]
+                return None
+            self._snapshots.move_to_end(slug)
+            return snap
+
+    def guardar(self, slug: str, formulario: models.Formulario) -> SnapshotPublico:
+        corpo = serializar_formulario_publico(formulario)
+        snap = SnapshotPublico(
+            formulario_id=formulario.id,
+            etag='"' + hashlib.sha256(corpo).hexdigest()[:32] + '"',
+            corpo=corpo,
+            criado=time.monotonic(),
+        )
+        with self._lock:
+            self._snapshots[slug] = snap
+            self._snapshots.move_to_end(slug)
+            while len(self._snapshots) > self.tamanho:
+                self._snapshots.popitem(last=False)
+        return snap
+
+    def invalidar(self, formulario_id: UUID) -> None:
+        with self._lock:
+            for slug in [s for s, snap in self._snapshots.items() if snap.formulario_id == formulario_id]:
+                del self._snapshots[slug]
+
+
+cache_snapshots = CacheSnapshots(settings.SNAPSHOT_PUBLICO_CACHE_TAMANHO, settings.SNAPSHOT_PUBLICO_CACHE_TTL)
+
+
+def obter_snapshot_publico(db: Session, slug: str) -> Optional[SnapshotPublico]:
+    """Retorna o snapshot público do formulário, carregando e serializando o grafo apenas em cache miss."""
+    snap = cache_snapshots.obter(slug)
+    if snap is not None:
+        return snap
+    formulario = carregar_grafo_formulario(db, slug=slug)
+    if not formulario:
+        return None
+    return cache_snapshots.guardar(slug, formulario)
+
+
+def aquecer_snapshots_publicos(db: Session) -> int:
+    """Pré-carrega no cache o snapshot de todos os formulários publicados."""
+    slugs = [
+        slug
+        for (slug,) in db.query(models.Formulario.slug_publico)
+        .filter(
+            models.Formulario.slug_publico.isnot(None),
+            models.Formulario.recebendo_respostas.is_(True),
+            models.Formulario.ativo.is_(True),
+        )
+        .limit(settings.SNAPSHOT_PUBLICO_CACHE_TAMANHO)
+        .all()
+    ]
+    for slug in slugs:
+        obter_snapshot_publico(db, slug)
+    return len(slugs)
+
+
+def invalidar_snapshot_publico(formulario_id) -> None:
+    """Descarta os snapshots públicos do formulário após alterações."""
+    try:
+        fid = formulario_id if isinstance(formulario_id, UUID) else UUID(str(formulario_id))
+    except ValueError:
+        return
+    cache_snapshots.invalidar(fid)
@@ -0,0 +1,19 @@
+import argparse
+from uuid import UUID
+from app.db.database import SessionLocal
+from app.crud.estatisticas import reconstruir_estatisticas
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstrói as tabelas respostas_stats_* a partir das respostas gravadas.")
+    parser.add_argument("--formulario", type=UUID, default=None, help="reconstrói apenas este formulário")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        reconstruir_estatisticas(db, args.formulario)
+    finally:
+        db.close()
+    print(f"[ESTATISTICAS] rollups reconstruídos ({args.formulario or 'todos os formulários'})")
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,13 @@ from app.db.database import engine, criar_tabelas, SessionLocal
 from app.core.config import settings
 from app.core.version import get_app_version
 from contextlib import asynccontextmanager
-from app.routers import integracoes, user, auth, setup, perfil, grupo, permissao, forms, respostas, empresa
+from app.routers import integracoes, user, auth, setup, perfil, grupo, permissao, forms, respostas, empresa, exportacoes as exportacoes_router
 from app.utils.seed import seed_grupo_admin_e_permissoes
+from app.services.ingestao import fila_ingestao
+from app.services.exportacao_jobs import exportacoes
+from app.services.cache_exportacao import cache_exportacoes
+from app.services.agregados_ws import agregados_ao_vivo
+from app.crud.snapshot_publico import aquecer_snapshots_publicos
 from .websockets import forms as forms_ws
 from .websockets import respostas as respostas_ws
 
@@ -37,7 +42,15 @@ async def lifespan(app: FastAPI):
     await wait_for_db()
     with SessionLocal() as db:
         seed_grupo_admin_e_permissoes(db)
+        aquecer_snapshots_publicos(db)
+    if settings.INGESTAO_ASSINCRONA:
+        await fila_ingestao.iniciar()
+    await exportacoes.iniciar()
+    cache_exportacoes.limpar_temporarios()
     yield
+    await exportacoes.parar()
+    await agregados_ao_vivo.parar()
+    await fila_ingestao.parar()
 
 
 app = FastAPI(lifespan=lifespan,title="Sistema de Pesquisa e Formulários")
@@ -97,6 +110,7 @@ app.include_router(perfil.router)
 app.include_router(grupo.router)
 app.include_router(permissao.router)
 app.include_router(forms.router)
+app.include_router(exportacoes_router.router)
 app.include_router(respostas.router)
 app.include_router(forms_ws.router)
 app.include_router(respostas_ws.router)
@@ -6,4 +6,5 @@ from .perguntas import Pergunta, TipoPergunta
 from .respostas import Resposta, RespostaItem
 from .opcao import Opcao
 from .empresa import Empresa
-from .bloco import Bloco
\ No newline at end of file
+from .bloco import Bloco
+from .estatisticas import RespostasStatsDia, RespostasStatsOpcao, RespostasStatsNps, RespostasStatsNumero
@@ -0,0 +1,51 @@
+from sqlalchemy import Column, ForeignKey, Integer, BigInteger, Date, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+
+
+class RespostasStatsDia(Base):
+    """Quantidade de respostas por formulário e dia (UTC)."""
+    __tablename__ = "respostas_stats_dia"
+
+    formulario_id = Column(UUID(as_uuid=True), ForeignKey("formularios.id", ondelete="CASCADE"), primary_key=True)
+    dia = Column(Date, primary_key=True)
+    total = Column(BigInteger, nullable=False, default=0)
+
+
+class RespostasStatsOpcao(Base):
+    """Quantidade de itens respondidos por opção."""
+    __tablename__ = "respostas_stats_opcoes"
+
+    pergunta_id = Column(UUID(as_uuid=True), ForeignKey("perguntas.id", ondelete="CASCADE"), primary_key=True)
+    opcao_id = Column(UUID(as_uuid=True), ForeignKey("opcoes.id", ondelete="CASCADE"), primary_key=True)
+    formulario_id = Column(UUID(as_uuid=True), ForeignKey("formularios.id", ondelete="CASCADE"), nullable=False)
+    total = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_respostas_stats_opcoes_formulario_id", "formulario_id"),)
+
+
+class RespostasStatsNps(Base):
+    """Contadores de promotores, neutros e detratores por pergunta NPS."""
+    __tablename__ = "respostas_stats_nps"
+
+    pergunta_id = Column(UUID(as_uuid=True), ForeignKey("perguntas.id", ondelete="CASCADE"), primary_key=True)
+    formulario_id = Column(UUID(as_uuid=True), ForeignKey("formularios.id", ondelete="CASCADE"), nullable=False)
+    promotores = Column(BigInteger, nullable=False, default=0)
+    neutros = Column(BigInteger, nullable=False, default=0)
+    detratores = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_respostas_stats_nps_formulario_id", "formulario_id"),)
+
+
+class RespostasStatsNumero(Base):
+    """Soma, quantidade e extremos das respostas de perguntas numéricas."""
+    __tablename__ = "respostas_stats_numeros"
+
+    pergunta_id = Column(UUID(as_uuid=True), ForeignKey("perguntas.id", ondelete="CASCADE"), primary_key=True)
+    formulario_id = Column(UUID(as_uuid=True), ForeignKey("formularios.id", ondelete="CASCADE"), nullable=False)
+    total = Column(BigInteger, nullable=False, default=0)
+    soma = Column(BigInteger, nullable=False, default=0)
+    minimo = Column(Integer, nullable=True)
+    maximo = Column(Integer, nullable=True)
+
+    __table_args__ = (Index("ix_respostas_stats_numeros_formulario_id", "formulario_id"),)
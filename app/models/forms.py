@@ -36,7 +36,7 @@ class Formulario(Base):
     perguntas = relationship(
         "Pergunta",
         back_populates="formulario",
-        lazy="joined",
+        order_by="Pergunta.ordem_exibicao",
         cascade="all, delete-orphan",
         passive_deletes=True,
     )
@@ -45,6 +45,7 @@ class Formulario(Base):
     blocos = relationship(
         "Bloco",
         back_populates="form",
+        order_by="Bloco.ordem",
         cascade="all,delete-orphan",
     )
 
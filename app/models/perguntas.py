@@ -45,6 +45,7 @@ class Pergunta(Base):
     opcoes = relationship(
         "Opcao",
         back_populates="pergunta",
+        order_by="Opcao.ordem",
         cascade="all, delete-orphan",
         passive_deletes=True,
     )
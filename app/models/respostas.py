@@ -23,6 +23,7 @@ class Resposta(Base):
     __table_args__ = (
         Index("ix_respostas_formulario_id", "formulario_id"),
         Index("ix_respostas_criado_em", "criado_em"),
+        Index("ix_respostas_form_criado_id", "formulario_id", "criado_em", "id"),
         Index(
         "ux_respostas_form_email_partial",
         "formulario_id", "email",
@@ -60,3 +61,14 @@ class RespostaItem(Base):
     resposta = relationship("Resposta", back_populates="itens")
     pergunta = relationship("Pergunta", back_populates="itens_resposta")
     valor_opcao = relationship("Opcao")
+
+    __table_args__ = (
+        Index("ix_respostas_itens_resposta_id", "resposta_id"),
+        Index("ix_respostas_itens_pergunta_numero", "pergunta_id", "valor_numero"),
+        Index(
+        "ix_respostas_itens_busca",
+        text("to_tsvector('portuguese', valor_texto)"),
+        postgresql_using="gin",
+        postgresql_where=text("valor_texto IS NOT NULL"),
+    ),
+    )
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse, JSONResponse
+from sqlalchemy.orm import Session
+from uuid import UUID
+from app import schemas, crud, models
+from app.db.database import get_db
+from app.dependencies.auth import get_current_user
+from app.services.exportacao_jobs import exportacoes
+
+router = APIRouter(prefix="/exports", tags=["Exportações"])
+
+@router.get(
+    "/{job_id}",
+    response_class=FileResponse,
+    responses={status.HTTP_202_ACCEPTED: {"model": schemas.ExportacaoJobOut}},
+)
+def baixar_exportacao(job_id: UUID, db: Session = Depends(get_db), usuario: models.Usuario = Depends(get_current_user)):
+    """Entrega o arquivo de uma exportação concluída; enquanto o job roda, responde 202 com o progresso."""
+    job = exportacoes.obter(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Exportação não encontrada ou expirada")
+    if job.usuario_id != usuario.id and not crud.tem_permissao_formulario(db, usuario, job.formulario_id, "ver"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Sem permissão para ver este formulário")
+    if job.status == "erro":
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=job.erro)
+    if job.status != "concluida":
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job.para_saida().model_dump(mode="json"))
+    return FileResponse(job.caminho, media_type=job.media_type, filename=job.nome_arquivo)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Request
 from fastapi import Query
 from sqlalchemy.orm import Session
 from uuid import UUID
@@ -7,9 +7,14 @@ from app.db.database import get_db
 from app.dependencies.auth import get_current_user
 from app.dependencies.permissoes import require_permission
 from app.utils.slugs import gerar_slug_publico
+from app.crud.identificadores import cache_identificadores
+from app.services.exportacao_jobs import exportacoes
+from app.services.cache_exportacao import invalidar_cache_exportacao
+from app.services.agregados_ws import recarregar_agregados
 from datetime import datetime
-from typing import Optional
-from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
+from fastapi.responses import StreamingResponse, Response
+import anyio
 
 router = APIRouter(prefix="/formularios", tags=["Formulários"])
 
@@ -27,6 +32,35 @@ def listar_formularios(incluir_inativos: bool = False, db: Session = Depends(get
     grupo_id = usuario.grupo.id
     return crud.forms.listar_formularios(db, grupo_id, incluir_inativos)
 
+@router.get("/export-lote", dependencies=[require_permission("formularios:ver")])
+def exportar_respostas_lote(
+    ids: List[str] = Query(...),
+    inicio: Optional[datetime] = Query(None),
+    fim: Optional[datetime] = Query(None),
+    formato: str = Query("csv"),
+    fuso: str = Query("America/Bahia"),
+    separador: str = Query(","),
+    apenas_ativas: bool = Query(False),
+    db: Session = Depends(get_db),
+    usuario: models.Usuario = Depends(get_current_user),
+):
+    """Exporta vários formulários em um único ZIP; `ids` aceita parâmetros repetidos ou separados por vírgula."""
+    try:
+        formulario_ids = [UUID(parte.strip()) for valor in ids for parte in valor.split(",") if parte.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids deve conter UUIDs de formulários")
+    return crud.forms.exportar_respostas_lote(
+        db=db,
+        usuario=usuario,
+        formulario_ids=formulario_ids,
+        inicio=inicio,
+        fim=fim,
+        formato=formato,
+        fuso=fuso,
+        separador=separador,
+        apenas_ativas=apenas_ativas,
+    )
+
 @router.get("/{formulario_id}", response_model=schemas.FormularioOut, dependencies=[require_permission("formularios:ver")])
 def buscar_formulario(formulario_id: UUID, db: Session = Depends(get_db), current_user: models.Usuario = Depends(get_current_user)):
     formulario = crud.buscar_formulario_por_id(db, formulario_id)
@@ -88,7 +122,12 @@ def apagar_respostas_formulario(
     for r in respostas:
         db.delete(r)
 
+    crud.zerar_estatisticas(db, formulario_id)
     db.commit()
+    cache_identificadores.invalidar(formulario_id)
+    invalidar_cache_exportacao(formulario_id)
+    recarregar_agregados(formulario_id)
+    crud.invalidar_cache_serie(formulario_id)
 
 @router.get("/{formulario_id}/slug", response_model=schemas.FormularioSlug, dependencies=[require_permission("formularios:ver")])
 def obter_slug_formulario(formulario_id: UUID, db: Session = Depends(get_db)):
@@ -117,32 +156,34 @@ def restaurar_formulario_route(
         raise HTTPException(status_code=404, detail="Formulário não encontrado ou já ativo")
     
 @router.get("/publico/{slug}", response_model=schemas.FormularioPublicoResponse)
-def obter_formulario_publico(slug: str, db: Session = Depends(get_db)):
-    formulario = crud.forms.obter_formulario_publico_por_slug(db, slug)
-    if not formulario:
+def obter_formulario_publico(slug: str, request: Request, db: Session = Depends(get_db)):
+    """Retorna o formulário público a partir do snapshot em cache, respondendo 304 quando o ETag confere."""
+    snap = crud.obter_snapshot_publico(db, slug)
+    if not snap:
         raise HTTPException(status_code=404, detail="Formulário não encontrado")
-    return {
-        "titulo": formulario.titulo,
-        "descricao": formulario.descricao,
-        "unico_por_chave_modo": formulario.unico_por_chave_modo,
-        "blocos": formulario.blocos,
-        "perguntas": formulario.perguntas,
-        "ativo": formulario.ativo,
-    }
+    headers = {"ETag": snap.etag, "Cache-Control": "public, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and any(t.strip() in (snap.etag, "*") for t in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=snap.corpo, media_type="application/json", headers=headers)
 
 @router.get("/{formulario_id}/export", dependencies=[require_permission("formularios:ver")])
 def exportar_respostas_formulario(
     formulario_id: UUID,
+    request: Request,
     inicio: Optional[datetime] = Query(None),
     fim: Optional[datetime] = Query(None),
     formato: str = Query("csv"),
     fuso: str = Query("America/Bahia"),
     separador: str = Query(","),
     apenas_ativas: bool = Query(False),
+    modo: str = Query("padrao"),
+    desde: Optional[str] = Query(None),
+    compressao: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     usuario: models.Usuario = Depends(get_current_user),
 ):
-    """Exporta as respostas de um formulário em CSV, NDJSON ou XLSX, delegando a geração ao módulo CRUD."""
+    """Exporta as respostas de um formulário em CSV, NDJSON, XLSX, Parquet ou Arrow, delegando a geração ao módulo CRUD."""
     if not crud.tem_permissao_formulario(db, usuario, formulario_id, "ver"):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Sem permissão para ver este formulário")
     return crud.forms.exportar_respostas(
@@ -154,8 +195,115 @@ def exportar_respostas_formulario(
         fuso=fuso,
         separador=separador,
         apenas_ativas=apenas_ativas,
+        modo=modo,
+        desde=desde,
+        compressao=compressao,
+        accept_encoding=request.headers.get("accept-encoding"),
     )
 
+@router.get("/{formulario_id}/analytics", response_model=schemas.AnaliseFormularioOut, dependencies=[require_permission("formularios:ver")])
+def analisar_respostas_formulario(
+    formulario_id: UUID,
+    inicio: Optional[datetime] = Query(None),
+    fim: Optional[datetime] = Query(None),
+    fuso: str = Query("America/Bahia"),
+    apenas_ativas: bool = Query(False),
+    db: Session = Depends(get_db),
+    usuario: models.Usuario = Depends(get_current_user),
+):
+    """Retorna NPS, distribuição de opções e resumos numéricos das respostas, agregados no banco."""
+    if not crud.tem_permissao_formulario(db, usuario, formulario_id, "ver"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Sem permissão para ver este formulário")
+    return crud.analisar_formulario(db, formulario_id, inicio, fim, fuso, apenas_ativas=apenas_ativas)
+
+@router.get("/{formulario_id}/estatisticas", response_model=schemas.EstatisticasFormularioOut, dependencies=[require_permission("formularios:ver")])
+def estatisticas_formulario(
+    formulario_id: UUID,
+    db: Session = Depends(get_db),
+    usuario: models.Usuario = Depends(get_current_user),
+):
+    """Retorna os indicadores principais (totais por dia, NPS, opções e números) lidos das tabelas de rollup."""
+    if not crud.tem_permissao_formulario(db, usuario, formulario_id, "ver"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Sem permissão para ver este formulário")
+    return crud.ler_estatisticas(db, formulario_id)
+
+@router.get("/{formulario_id}/serie", response_model=schemas.SerieOut, dependencies=[require_permission("formularios:ver")])
+def serie_respostas_formulario(
+    formulario_id: UUID,
+    bucket: Literal["hour", "day", "week"] = Query("day"),
+    fuso: str = Query("America/Bahia"),
+    inicio: Optional[datetime] = Query(None),
+    fim: Optional[datetime] = Query(None),
+    detalhe: Optional[Literal["opcoes", "nps"]] = Query(None),
+    db: Session = Depends(get_db),
+    usuario: models.Usuario = Depends(get_current_user),
+):
+    """Retorna a contagem de respostas por hora, dia ou semana no fuso informado, com buckets fechados em cache."""
+    if not crud.tem_permissao_formulario(db, usuario, formulario_id, "ver"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Sem permissão para ver este formulário")
+    return crud.serie_formulario(db, formulario_id, bucket, fuso, inicio, fim, detalhe)
+
+@router.get("/{formulario_id}/respostas/busca", response_model=schemas.BuscaRespostasOut, dependencies=[require_permission("respostas:ver")])
+def buscar_respostas_formulario(
+    formulario_id: UUID,
+    q: str = Query(..., min_length=1, max_length=500),
+    pagina: int = Query(1, ge=1),
+    por_pagina: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    usuario: models.Usuario = Depends(get_current_user),
+):
+    """Busca textual nas respostas de texto do formulário, com trechos destacados e o `resposta_id` de cada item."""
+    if not crud.tem_permissao_formulario(db, usuario, formulario_id, "ver"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Sem permissão para ver as respostas deste formulário")
+    return crud.buscar_respostas(db, formulario_id, q, pagina, por_pagina)
+
+@router.get("/{formulario_id}/crosstab", response_model=schemas.CrosstabOut, dependencies=[require_permission("formularios:ver")])
+def crosstab_formulario(
+    formulario_id: UUID,
+    linha: UUID = Query(...),
+    coluna: UUID = Query(...),
+    inicio: Optional[datetime] = Query(None),
+    fim: Optional[datetime] = Query(None),
+    fuso: str = Query("America/Bahia"),
+    formato: Literal["json", "csv"] = Query("json"),
+    separador: str = Query(","),
+    db: Session = Depends(get_db),
+    usuario: models.Usuario = Depends(get_current_user),
+):
+    """Cruza duas perguntas (opções ou NPS) em uma matriz densa calculada no banco; `formato=csv` devolve a matriz em CSV."""
+    if not crud.tem_permissao_formulario(db, usuario, formulario_id, "ver"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Sem permissão para ver este formulário")
+    tabela = crud.cruzar_perguntas(db, formulario_id, linha, coluna, inicio, fim, fuso)
+    if formato == "csv":
+        return Response(
+            content=crud.crosstab_csv(tabela, separador),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": f'attachment; filename="form_{formulario_id}_crosstab.csv"'},
+        )
+    return tabela
+
+@router.post(
+    "/{formulario_id}/exports",
+    response_model=schemas.ExportacaoJobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[require_permission("formularios:ver")],
+)
+async def criar_exportacao(
+    formulario_id: UUID,
+    consulta: schemas.ExportQuery,
+    db: Session = Depends(get_db),
+    usuario: models.Usuario = Depends(get_current_user),
+):
+    """Enfileira a exportação em segundo plano; o progresso é publicado em /ws/formularios/{id}/exportacoes."""
+    def _validar():
+        if not crud.tem_permissao_formulario(db, usuario, formulario_id, "ver"):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Sem permissão para ver este formulário")
+        crud.forms.validar_exportacao(db, formulario_id, consulta)
+
+    await anyio.to_thread.run_sync(_validar)
+    job = exportacoes.enfileirar(formulario_id, usuario.id, consulta)
+    return job.para_saida()
+
 @router.post("/{formulario_id}/publicar", status_code=status.HTTP_200_OK, dependencies=[require_permission("formularios:editar")])
 def publicar_formulario(formulario_id: UUID, db: Session = Depends(get_db), usuario: models.Usuario = Depends(get_current_user)):
     """Ativa o acesso público do formulário e garante um slug público."""
@@ -174,6 +322,7 @@ def publicar_formulario(formulario_id: UUID, db: Session = Depends(get_db), usua
         form.slug_publico = gerar_slug_publico()
     form.recebendo_respostas = True
     db.commit()
+    crud.invalidar_caches_formulario(formulario_id)
     db.refresh(form)
     return {"slug_publico": form.slug_publico, "recebendo_respostas": form.recebendo_respostas}
 
@@ -193,4 +342,5 @@ def despublicar_formulario(formulario_id: UUID, db: Session = Depends(get_db), u
         raise HTTPException(status_code=404, detail="Formulário não encontrado")
     form.recebendo_respostas = False
     db.commit()
+    crud.invalidar_caches_formulario(formulario_id)
     return {"slug_publico": form.slug_publico, "recebendo_respostas": form.recebendo_respostas}
\ No newline at end of file
@@ -1,49 +1,137 @@
 # app/routers/respostas.py
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.orm import Session
 from uuid import UUID
-from app.db.database import get_db
+from app.db.database import get_db, SessionLocal
+from app.core.config import settings
 from app import schemas, dependencies, crud
-from app.websockets.conexoes import gerenciador
+from app.websockets.conexoes import gerenciador, mensagem_com_dados
+from app.services.ingestao import fila_ingestao
+from app.services.agregados_ws import agregados_ao_vivo
+from app.utils.json_incremental import iterar_objetos_json
 from app import models
 import anyio
 
 
 router = APIRouter(prefix="/respostas", tags=["Respostas"])
 
-@router.post("/{form_slug}", response_model=schemas.RespostaOut, status_code=status.HTTP_201_CREATED)
-async def criar_resposta(form_slug: str, payload: schemas.RespostaCreatePublico, request: Request, db: Session = Depends(get_db)):
-    """Cria uma resposta para um formulário (acessado por slug) e publica o evento em tempo real."""
-    form = crud.obter_formulario_publico_por_slug(db, slug=form_slug)
-    if not form:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Formulário não encontrado ou não está recebendo respostas.")
+limitador_respostas = anyio.CapacityLimiter(settings.RESPOSTAS_MAX_THREADS)
 
+@router.post(
+    "/{form_slug}",
+    response_model=schemas.RespostaOut,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_202_ACCEPTED: {"model": schemas.RespostaRecibo}},
+)
+async def criar_resposta(form_slug: str, payload: schemas.RespostaCreatePublico, request: Request):
+    """Cria uma resposta para um formulário (acessado por slug) e publica o evento em tempo real.
+
+    O acesso ao banco roda em thread dedicada para não bloquear o event loop que atende os WebSockets.
+    O RespostaOut é serializado uma única vez e o mesmo JSON serve de corpo HTTP e de frame do broadcast.
+    Com INGESTAO_ASSINCRONA ativa, a resposta validada é enfileirada para gravação em lote e o endpoint
+    devolve 202 com o recibo; o evento `resposta_criada` é publicado após o commit do lote.
+    """
     if not payload.origem_ip:
         payload.origem_ip = request.client.host if request and request.client else None
             
-    def _item_tem_valor(i: dict) -> bool:
-        return any(
-            i.get(k) is not None
-            for k in ("valor_texto", "valor_numero", "valor_opcao_id", "valor_opcao_texto", "valor_data")
+    itens_filtrados = crud.repostas.itens_com_valor(payload.itens)
+
+    def _payload_completo(db: Session) -> schemas.RespostaCreate:
+        plano = crud.obter_plano_validacao_por_slug(db, slug=form_slug)
+        if not plano:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Formulário não encontrado ou não está recebendo respostas.")
+        return schemas.RespostaCreate(
+            formulario_id=plano.formulario_id,
+            itens=itens_filtrados,
+            origem_ip=payload.origem_ip,
+            user_agent=payload.user_agent,
+            meta=payload.meta,
         )
 
-    itens_raw = [i.model_dump() for i in (payload.itens or [])]
-    itens_filtrados = [i for i in itens_raw if _item_tem_valor(i)]
-    
-    full_payload = schemas.RespostaCreate(
-        formulario_id=form.id,
-        itens=itens_filtrados,
-        origem_ip=payload.origem_ip,
-        user_agent=payload.user_agent,
-        meta=payload.meta,
-    )
-    
-    resp = crud.criar(db, full_payload)
-    sala_id = f"respostas:{resp.formulario_id}"
-    out = jsonable_encoder(schemas.RespostaOut.model_validate(resp))
-    await gerenciador.enviar_para_sala(sala_id, {"tipo": "resposta_criada", "dados": out})
-    return resp
+    if settings.INGESTAO_ASSINCRONA:
+        def _preparar():
+            db = SessionLocal()
+            try:
+                plano, resposta, itens = crud.repostas.preparar(db, _payload_completo(db))
+                out = crud.repostas.montar_resposta_out(plano, resposta, itens)
+                return jsonable_encoder({"resposta": resposta, "itens": itens, "dados": out})
+            finally:
+                db.close()
+
+        entrada = await anyio.to_thread.run_sync(_preparar, limiter=limitador_respostas)
+        await fila_ingestao.enfileirar(entrada)
+        recibo = schemas.RespostaRecibo(recibo=entrada["resposta"]["id"])
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=jsonable_encoder(recibo))
+
+    def _criar():
+        db = SessionLocal()
+        try:
+            return crud.criar(db, _payload_completo(db))
+        finally:
+            db.close()
+
+    resp = await anyio.to_thread.run_sync(_criar, limiter=limitador_respostas)
+    corpo = resp.model_dump_json()
+    await gerenciador.enviar_para_sala(f"respostas:{resp.formulario_id}", mensagem_com_dados("resposta_criada", corpo))
+    agregados_ao_vivo.registrar(resp.formulario_id, [resp])
+    return Response(content=corpo, media_type="application/json", status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/{form_slug}/lote", response_model=list[schemas.RespostaLoteResultado])
+async def criar_respostas_lote(form_slug: str, request: Request):
+    """Recebe um array JSON ou NDJSON de respostas, valida contra o formulário uma única vez e grava as válidas em lote.
+
+    O corpo é lido de forma incremental e validado/gravado em blocos de RESPOSTAS_LOTE_CHUNK itens, à medida
+    que chegam; o resultado traz, por item, o id criado ou o erro (409/422). Um corpo rejeitado no meio
+    (400/413) mantém os blocos já gravados.
+    """
+    origem_ip = request.client.host if request and request.client else None
+
+    def _plano():
+        db = SessionLocal()
+        try:
+            plano = crud.obter_plano_validacao_por_slug(db, slug=form_slug)
+            if not plano:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Formulário não encontrado ou não está recebendo respostas.")
+            if not plano.recebendo_respostas:
+                raise HTTPException(status_code=403, detail="Formulário não está recebendo aceita respostas")
+            return plano
+        finally:
+            db.close()
+
+    plano = await anyio.to_thread.run_sync(_plano, limiter=limitador_respostas)
+    resultados: list = []
+
+    async def _gravar(bloco: list) -> None:
+        def _criar_lote():
+            db = SessionLocal()
+            try:
+                return crud.repostas.criar_lote(db, plano, bloco, origem_ip, inicio=len(resultados))
+            finally:
+                db.close()
+
+        parcial, criadas = await anyio.to_thread.run_sync(_criar_lote, limiter=limitador_respostas)
+        resultados.extend(parcial)
+        if criadas:
+            await gerenciador.enviar_para_sala(
+                f"respostas:{plano.formulario_id}",
+                {"tipo": "respostas_lote_criadas", "dados": jsonable_encoder(criadas)},
+            )
+            agregados_ao_vivo.registrar(plano.formulario_id, criadas)
+
+    bloco: list = []
+    async for obj in iterar_objetos_json(
+        request.stream(), settings.RESPOSTAS_LOTE_MAX_BYTES_ITEM, settings.RESPOSTAS_LOTE_MAX_ITENS
+    ):
+        bloco.append(obj)
+        if len(bloco) >= settings.RESPOSTAS_LOTE_CHUNK:
+            await _gravar(bloco)
+            bloco = []
+    if bloco:
+        await _gravar(bloco)
+    return resultados
 
 
 @router.get("/formulario/{formulario_id}", response_model=list[schemas.RespostaOut], dependencies=[dependencies.require_permission("respostas:ver")])
@@ -3,8 +3,10 @@ from .auth import LoginInput, LoginResponse, RefreshRequest
 from .grupo import PermissaoGrupoInput, GrupoErroResponse, GrupoResponse, GrupoBase, GrupoCreate, GrupoComPermissoesResponse, GrupoUpdate
 from .permissao import PermissaoResponse, FormularioPermissaoIn, FormularioPermissaoOut, FormularioPermissaoBatchIn
 from .forms import FormularioBase, FormularioCreate, FormularioOut, FormularioVersaoBase, FormularioVersaoCreate, FormularioVersaoOut, EdicaoFormularioBase, EdicaoFormularioCreate, EdicaoFormularioOut, FormularioPublicoResponse, FormularioUpdatePayload, FormularioSlug
-from .respostas import RespostaCreate, RespostaOut, RespostaItemCreate, RespostaItemOut, RespostaCreatePublico
+from .respostas import RespostaCreate, RespostaOut, RespostaItemCreate, RespostaItemOut, RespostaCreatePublico, RespostaRecibo, RespostaLoteResultado, BuscaRespostaItemOut, BuscaRespostasOut
 from .perguntas import PerguntaBase, PerguntaCreate, PerguntaOut, PerguntaUpdatePayload
 from .empresa import EmpresaCreate, EmpresaResponse
 from .blocos import BlocoOut
-from .exportacao import ExportQuery, ExportRow
+from .opcoes import OpcaoOut
+from .exportacao import ExportQuery, ExportacaoJobOut
+from .analise import AnaliseFormularioOut, NpsPerguntaOut, DistribuicaoOpcoesOut, ContagemOpcaoOut, ResumoNumericoOut, EstatisticasFormularioOut, ContagemDiaOut, NpsEstatisticaOut, ContagemOpcaoEstatisticaOut, NumeroEstatisticaOut, SerieBucketOut, SerieOut, CrosstabOut, EixoCrosstabOut, CategoriaCrosstabOut
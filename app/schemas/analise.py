@@ -0,0 +1,136 @@
+from datetime import date, datetime
+from typing import List, Optional
+from uuid import UUID
+from pydantic import BaseModel
+
+
+class NpsPerguntaOut(BaseModel):
+    """NPS de uma pergunta: promotores, neutros e detratores pela escala da pergunta."""
+    pergunta_id: UUID
+    texto: str
+    escala_min: int
+    escala_max: int
+    total: int
+    promotores: int
+    neutros: int
+    detratores: int
+    nps: Optional[float] = None
+
+
+class ContagemOpcaoOut(BaseModel):
+    opcao_id: Optional[UUID] = None
+    texto: str
+    total: int
+
+
+class DistribuicaoOpcoesOut(BaseModel):
+    """Contagem de respostas por opção; `outros` soma os valores livres sem opção cadastrada."""
+    pergunta_id: UUID
+    texto: str
+    tipo: str
+    respostas: int
+    opcoes: List[ContagemOpcaoOut]
+    outros: int = 0
+
+
+class ResumoNumericoOut(BaseModel):
+    pergunta_id: UUID
+    texto: str
+    total: int
+    minimo: Optional[float] = None
+    maximo: Optional[float] = None
+    media: Optional[float] = None
+    mediana: Optional[float] = None
+    desvio_padrao: Optional[float] = None
+
+
+class AnaliseFormularioOut(BaseModel):
+    """Indicadores agregados das respostas de um formulário no período."""
+    formulario_id: UUID
+    inicio: Optional[datetime] = None
+    fim: Optional[datetime] = None
+    total_respostas: int
+    nps: List[NpsPerguntaOut]
+    distribuicoes: List[DistribuicaoOpcoesOut]
+    numeros: List[ResumoNumericoOut]
+
+
+class ContagemDiaOut(BaseModel):
+    dia: date
+    total: int
+
+
+class NpsEstatisticaOut(BaseModel):
+    pergunta_id: UUID
+    total: int
+    promotores: int
+    neutros: int
+    detratores: int
+    nps: Optional[float] = None
+
+
+class ContagemOpcaoEstatisticaOut(BaseModel):
+    pergunta_id: UUID
+    opcao_id: UUID
+    total: int
+
+
+class NumeroEstatisticaOut(BaseModel):
+    pergunta_id: UUID
+    total: int
+    soma: int
+    media: Optional[float] = None
+    minimo: Optional[int] = None
+    maximo: Optional[int] = None
+
+
+class EstatisticasFormularioOut(BaseModel):
+    """Indicadores principais lidos das tabelas de rollup (dias em UTC, sem filtro de período)."""
+    formulario_id: UUID
+    total_respostas: int
+    por_dia: List[ContagemDiaOut]
+    nps: List[NpsEstatisticaOut]
+    opcoes: List[ContagemOpcaoEstatisticaOut]
+    numeros: List[NumeroEstatisticaOut]
+
+
+class SerieBucketOut(BaseModel):
+    inicio: datetime
+    total: int
+    opcoes: Optional[List[ContagemOpcaoEstatisticaOut]] = None
+    nps: Optional[List[NpsEstatisticaOut]] = None
+
+
+class SerieOut(BaseModel):
+    """Respostas por bucket de tempo; buckets sem respostas são omitidos."""
+    formulario_id: UUID
+    bucket: str
+    fuso: str
+    inicio: Optional[datetime] = None
+    fim: datetime
+    buckets: List[SerieBucketOut]
+
+
+class CategoriaCrosstabOut(BaseModel):
+    chave: str
+    rotulo: str
+
+
+class EixoCrosstabOut(BaseModel):
+    pergunta_id: UUID
+    texto: str
+    tipo: str
+    categorias: List[CategoriaCrosstabOut]
+
+
+class CrosstabOut(BaseModel):
+    """Tabela cruzada densa: `celulas[i][j]` conta respostas na categoria i da linha e j da coluna."""
+    formulario_id: UUID
+    inicio: Optional[datetime] = None
+    fim: Optional[datetime] = None
+    linha: EixoCrosstabOut
+    coluna: EixoCrosstabOut
+    celulas: List[List[int]]
+    total_linhas: List[int]
+    total_colunas: List[int]
+    nps_linhas: Optional[List[Optional[float]]] = None
@@ -1,5 +1,6 @@
 from datetime import datetime
-from typing import Any, Dict, Optional, Literal
+from typing import Optional, Literal
+from uuid import UUID
 from pydantic import BaseModel, Field
 
 
@@ -7,13 +8,21 @@ class ExportQuery(BaseModel):
     """Parâmetros de exportação de respostas de um formulário."""
     inicio: Optional[datetime] = Field(default=None)
     fim: Optional[datetime] = Field(default=None)
-    formato: Literal["csv", "ndjson", "xlsx"] = "csv"
+    formato: Literal["csv", "ndjson", "xlsx", "parquet", "arrow"] = "csv"
     fuso: str = "America/Bahia"
     separador: str = ","
+    apenas_ativas: bool = False
 
 
-class ExportRow(BaseModel):
-    """Linha lógica de exportação contendo metadados e campos achatados da resposta."""
-    id: str
+class ExportacaoJobOut(BaseModel):
+    """Estado de uma exportação em segundo plano."""
+    id: UUID
+    formulario_id: UUID
+    formato: str
+    status: Literal["pendente", "executando", "concluida", "erro"]
+    linhas: int = 0
+    total: Optional[int] = None
+    erro: Optional[str] = None
     criado_em: datetime
-    dados: Dict[str, Any]
\ No newline at end of file
+    expira_em: Optional[datetime] = None
+    url: str
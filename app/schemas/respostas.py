@@ -2,7 +2,7 @@
 from uuid import UUID
 from datetime import datetime, date
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, List
+from typing import Any, Optional, List
 
 class RespostaItemCreate(BaseModel):
     pergunta_id: UUID
@@ -26,6 +26,16 @@ class RespostaCreatePublico(BaseModel):
     user_agent: Optional[str] = None
     meta: Optional[dict] = None
 
+class RespostaRecibo(BaseModel):
+    recibo: UUID
+    status: str = "enfileirada"
+
+class RespostaLoteResultado(BaseModel):
+    indice: int
+    status: int
+    id: Optional[UUID] = None
+    detail: Optional[Any] = None
+
 from app.schemas.opcoes import OpcaoOut
 
 class RespostaItemOut(BaseModel):
@@ -50,3 +60,22 @@ class RespostaOut(BaseModel):
     itens: List[RespostaItemOut]
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class BuscaRespostaItemOut(BaseModel):
+    resposta_id: UUID
+    item_id: UUID
+    pergunta_id: UUID
+    pergunta_texto: str
+    criado_em: datetime
+    rank: float
+    trecho: str
+
+class BuscaRespostasOut(BaseModel):
+    """Página de resultados da busca textual; `trecho` traz os termos encontrados entre <mark></mark> (texto escapado)."""
+    formulario_id: UUID
+    q: str
+    pagina: int
+    por_pagina: int
+    total: int
+    resultados: List[BuscaRespostaItemOut]
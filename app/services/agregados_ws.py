@@ -0,0 +1,207 @@
+# app/services/agregados_ws.py
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Set, Tuple
+import anyio
+from app import models
+from app.core.config import settings
+from app.crud.estatisticas import ler_estatisticas
+from app.db.database import SessionLocal
+from app.websockets.conexoes import gerenciador
+
+
+def sala_agregados(formulario_id) -> str:
+    return f"agregados:{formulario_id}"
+
+
+Chave = Tuple[str, ...]
+
+
+@dataclass
+class EstadoAgregados:
+    """Contadores correntes de um formulário, em chaves planas como ("nps", pergunta_id, "promotores")."""
+    perguntas: Dict[str, tuple] = field(default_factory=dict)
+    contadores: Dict[Chave, float] = field(default_factory=dict)
+    alterados: Set[Chave] = field(default_factory=set)
+    sincronizado_em: float = 0.0
+
+    def somar(self, chave: Chave, valor: float) -> None:
+        self.contadores[chave] = self.contadores.get(chave, 0) + valor
+        self.alterados.add(chave)
+
+    def substituir(self, contadores: Dict[Chave, float]) -> None:
+        """Troca os contadores pelos recém-lidos do banco, marcando como alterados só os que mudaram."""
+        for chave in set(self.contadores) | set(contadores):
+            if self.contadores.get(chave, 0) != contadores.get(chave, 0):
+                self.alterados.add(chave)
+        self.contadores = dict(contadores)
+
+    def _nps(self, pergunta_id: str) -> Optional[float]:
+        p = self.contadores.get(("nps", pergunta_id, "promotores"), 0)
+        n = self.contadores.get(("nps", pergunta_id, "neutros"), 0)
+        d = self.contadores.get(("nps", pergunta_id, "detratores"), 0)
+        total = p + n + d
+        return round((p - d) * 100 / total, 2) if total else None
+
+    def _aninhar(self, chaves: Iterable[Chave]) -> dict:
+        saida: dict = {}
+        for chave in chaves:
+            destino = saida
+            for parte in chave[:-1]:
+                destino = destino.setdefault(parte, {})
+            destino[chave[-1]] = self.contadores.get(chave, 0)
+        for pergunta_id in {c[1] for c in chaves if c[0] == "nps"}:
+            saida["nps"][pergunta_id]["nps"] = self._nps(pergunta_id)
+        return saida
+
+    def completo(self) -> dict:
+        return self._aninhar(list(self.contadores))
+
+    def delta(self) -> Optional[dict]:
+        """Valores atuais apenas dos contadores alterados desde o último envio (None quando nada mudou)."""
+        if not self.alterados:
+            return None
+        chaves, self.alterados = self.alterados, set()
+        return self._aninhar(chaves)
+
+
+def _carregar(formulario_id: str) -> Tuple[Dict[str, tuple], Dict[Chave, float]]:
+    """Lê os contadores iniciais das tabelas de rollup e os metadados das perguntas para classificar novos itens."""
+    db = SessionLocal()
+    try:
+        P = models.Pergunta
+        perguntas = {
+            str(pid): (tipo.value, mn, mx)
+            for pid, tipo, mn, mx in db.query(P.id, P.tipo, P.escala_min, P.escala_max).filter(P.formulario_id == formulario_id)
+        }
+        stats = ler_estatisticas(db, formulario_id)
+    finally:
+        db.close()
+
+    contadores: Dict[Chave, float] = {("total_respostas",): stats.total_respostas}
+    for n in stats.nps:
+        for campo in ("promotores", "neutros", "detratores"):
+            contadores[("nps", str(n.pergunta_id), campo)] = getattr(n, campo)
+    for o in stats.opcoes:
+        contadores[("opcoes", str(o.pergunta_id), str(o.opcao_id))] = o.total
+    for n in stats.numeros:
+        contadores[("numeros", str(n.pergunta_id), "total")] = n.total
+        contadores[("numeros", str(n.pergunta_id), "soma")] = n.soma
+    return perguntas, contadores
+
+
+class AgregadosAoVivo:
+    """Agregados em memória por formulário para a sala `agregados:{id}`, enviados como deltas a cada intervalo.
+
+    O estado só existe enquanto há inscritos. Cada resposta publicada soma nos contadores e, a cada `intervalo_ms`,
+    cada sala recebe no máximo uma mensagem com os contadores que mudaram. O estado é relido das tabelas de rollup
+    a cada `ressincronizar_s` (ou após exclusões), o que corrige qualquer divergência com o banco.
+    """
+
+    def __init__(self, intervalo_ms: int, ressincronizar_s: int):
+        self.intervalo = intervalo_ms / 1000
+        self.ressincronizar = ressincronizar_s
+        self._estados: Dict[str, EstadoAgregados] = {}
+        self._recarregar: Set[str] = set()
+        self._tarefa: Optional[asyncio.Task] = None
+
+    async def _sincronizar(self, formulario_id: str) -> EstadoAgregados:
+        perguntas, contadores = await anyio.to_thread.run_sync(_carregar, formulario_id)
+        estado = self._estados.setdefault(formulario_id, EstadoAgregados())
+        estado.perguntas = perguntas
+        estado.substituir(contadores)
+        estado.sincronizado_em = time.monotonic()
+        return estado
+
+    async def inscrever(self, formulario_id: str) -> dict:
+        """Garante o estado do formulário (semeado do banco na primeira inscrição) e retorna o retrato completo."""
+        formulario_id = str(formulario_id)
+        estado = self._estados.get(formulario_id)
+        if estado is None:
+            estado = await self._sincronizar(formulario_id)
+            estado.alterados.clear()
+        if self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._executar())
+        return estado.completo()
+
+    def registrar(self, formulario_id, respostas: Iterable) -> None:
+        """Soma respostas recém-gravadas (RespostaOut ou o dict equivalente) no estado do formulário, se houver inscritos."""
+        estado = self._estados.get(str(formulario_id))
+        if estado is None:
+            return
+        for r in respostas:
+            r = r.model_dump(mode="json") if hasattr(r, "model_dump") else r
+            estado.somar(("total_respostas",), 1)
+            for item in r.get("itens") or []:
+                pid = str(item["pergunta_id"])
+                pergunta = estado.perguntas.get(pid)
+                if pergunta is None:
+                    # pergunta criada depois da semeadura: relê o formulário no próximo ciclo
+                    self._recarregar.add(str(formulario_id))
+                    continue
+                tipo, mn, mx = pergunta
+                if item.get("valor_opcao_id"):
+                    estado.somar(("opcoes", pid, str(item["valor_opcao_id"])), 1)
+                valor = item.get("valor_numero")
+                if valor is None:
+                    continue
+                if tipo == models.TipoPergunta.nps.value and mn is not None and mx is not None and mx > mn:
+                    relativo = (valor - mn) * 10
+                    if relativo >= 9 * (mx - mn):
+                        estado.somar(("nps", pid, "promotores"), 1)
+                    elif relativo >= 7 * (mx - mn):
+                        estado.somar(("nps", pid, "neutros"), 1)
+                    else:
+                        estado.somar(("nps", pid, "detratores"), 1)
+                elif tipo == models.TipoPergunta.numero.value:
+                    estado.somar(("numeros", pid, "total"), 1)
+                    estado.somar(("numeros", pid, "soma"), valor)
+
+    def recarregar(self, formulario_id) -> None:
+        """Agenda a releitura do formulário (ex.: após exclusões); seguro para chamar de threads."""
+        if formulario_id is not None:
+            self._recarregar.add(str(formulario_id))
+
+    async def _executar(self) -> None:
+        while True:
+            await asyncio.sleep(self.intervalo)
+            for formulario_id in list(self._estados):
+                sala = sala_agregados(formulario_id)
+                if not gerenciador.contar_conexoes(sala):
+                    del self._estados[formulario_id]
+                    self._recarregar.discard(formulario_id)
+                    continue
+                try:
+                    estado = self._estados[formulario_id]
+                    if formulario_id in self._recarregar or time.monotonic() - estado.sincronizado_em >= self.ressincronizar:
+                        self._recarregar.discard(formulario_id)
+                        estado = await self._sincronizar(formulario_id)
+                    delta = estado.delta()
+                    if delta:
+                        await gerenciador.enviar_para_sala(
+                            sala, {"tipo": "agregados_delta", "dados": {"formulario_id": formulario_id, **delta}}
+                        )
+                except Exception as e:
+                    print("[AGREGADOS] falha ao atualizar", formulario_id, ":", e)
+            if not self._estados:
+                self._tarefa = None
+                return
+
+    async def parar(self) -> None:
+        if self._tarefa is None:
+            return
+        self._tarefa.cancel()
+        try:
+            await self._tarefa
+        except asyncio.CancelledError:
+            pass
+        self._tarefa = None
+
+
+agregados_ao_vivo = AgregadosAoVivo(settings.WS_AGREGADOS_INTERVALO_MS, settings.WS_AGREGADOS_RESSINCRONIZAR_S)
+
+
+def recarregar_agregados(formulario_id) -> None:
+    """Marca os agregados ao vivo do formulário para releitura após exclusões de respostas."""
+    agregados_ao_vivo.recarregar(formulario_id)
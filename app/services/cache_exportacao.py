@@ -0,0 +1,152 @@
+# app/services/cache_exportacao.py
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Iterable, Iterator, Optional
+from uuid import UUID
+from app.core.config import settings
+
+
+class CacheExportacoes:
+    """Cache em disco de arquivos de exportação já gerados, endereçados pelo hash da chave da exportação.
+
+    Os arquivos ficam em `<formulario_id>/<hash>`, então invalidar um formulário é remover um diretório
+    (e custa só um stat quando não há nada em cache, o caso comum na gravação de respostas).
+    O uso é registrado no mtime do arquivo e, acima de `max_bytes`, os menos usados são removidos (LRU).
+    """
+
+    # temporários sem escrita há mais tempo que isso são sobras de um processo que caiu no meio da gravação
+    IDADE_TEMPORARIO_ORFAO = 3600
+
+    def __init__(self, diretorio: str, max_bytes: int):
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # só formulários com gravação em andamento: geração de invalidação e número de gravações
+        self._geracoes: dict = {}
+        self._gravacoes: dict = {}
+
+    @property
+    def ativo(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def chave(**partes) -> str:
+        """Hash estável dos parâmetros que determinam o conteúdo do arquivo."""
+        bruto = json.dumps(partes, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(bruto.encode("utf-8")).hexdigest()
+
+    def _caminho(self, formulario_id: UUID, chave: str) -> str:
+        return os.path.join(self.diretorio, str(formulario_id), chave)
+
+    def obter(self, formulario_id: UUID, chave: str) -> Optional[str]:
+        """Retorna o caminho do arquivo em cache (marcando-o como usado) ou None."""
+        if not self.ativo:
+            return None
+        caminho = self._caminho(formulario_id, chave)
+        try:
+            os.utime(caminho)
+        except FileNotFoundError:
+            return None
+        return caminho
+
+    def gravando(self, formulario_id: UUID, chave: str, partes: Iterable[bytes]) -> Iterator[bytes]:
+        """Repassa o stream ao cliente enquanto o grava em disco; só publica no cache se o stream terminar inteiro."""
+        if not self.ativo:
+            yield from partes
+            return
+        os.makedirs(self.diretorio, exist_ok=True)
+        fid = str(formulario_id)
+        with self._lock:
+            self._gravacoes[fid] = self._gravacoes.get(fid, 0) + 1
+            geracao = self._geracoes.setdefault(fid, 0)
+        temporario = os.path.join(self.diretorio, f".tmp_{uuid.uuid4().hex}")
+        completo = False
+        try:
+            with open(temporario, "wb") as destino:
+                for parte in partes:
+                    destino.write(parte)
+                    yield parte
+            completo = True
+        finally:
+            if hasattr(partes, "close"):
+                partes.close()
+            with self._lock:
+                # invalidado durante a geração: o arquivo pode refletir o esquema antigo e é descartado
+                publicar = completo and self._geracoes[fid] == geracao
+                self._gravacoes[fid] -= 1
+                if not self._gravacoes[fid]:
+                    del self._gravacoes[fid]
+                    del self._geracoes[fid]
+            if publicar:
+                caminho = self._caminho(formulario_id, chave)
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                os.replace(temporario, caminho)
+                self._aplicar_limite()
+            else:
+                try:
+                    os.remove(temporario)
+                except FileNotFoundError:
+                    pass
+
+    def invalidar(self, formulario_id) -> None:
+        """Remove todos os arquivos em cache do formulário."""
+        with self._lock:
+            if str(formulario_id) in self._geracoes:
+                self._geracoes[str(formulario_id)] += 1
+        diretorio = os.path.join(self.diretorio, str(formulario_id))
+        if os.path.isdir(diretorio):
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+    def limpar_temporarios(self) -> None:
+        """Remove `.tmp_*` deixados por gravações interrompidas (queda do processo durante o download)."""
+        if not os.path.isdir(self.diretorio):
+            return
+        limite = time.time() - self.IDADE_TEMPORARIO_ORFAO
+        for entrada in os.scandir(self.diretorio):
+            if not entrada.name.startswith(".tmp_"):
+                continue
+            try:
+                if entrada.stat().st_mtime < limite:
+                    os.remove(entrada.path)
+            except FileNotFoundError:
+                pass
+
+    def _aplicar_limite(self) -> None:
+        with self._lock:
+            arquivos = []
+            for pasta in os.scandir(self.diretorio):
+                if not pasta.is_dir():
+                    continue
+                try:
+                    entradas = list(os.scandir(pasta.path))
+                except FileNotFoundError:
+                    continue
+                for entrada in entradas:
+                    try:
+                        info = entrada.stat()
+                    except FileNotFoundError:
+                        continue
+                    arquivos.append((info.st_mtime, info.st_size, entrada.path))
+            total = sum(tamanho for _, tamanho, _ in arquivos)
+            for _, tamanho, caminho in sorted(arquivos):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(caminho)
+                except FileNotFoundError:
+                    pass
+                total -= tamanho
+
+
+cache_exportacoes = CacheExportacoes(settings.EXPORT_CACHE_DIR, settings.EXPORT_CACHE_MAX_BYTES)
+
+
+def invalidar_cache_exportacao(formulario_id) -> None:
+    """Descarta as exportações em cache do formulário após novas respostas, exclusões ou alterações no esquema."""
+    if formulario_id is not None:
+        cache_exportacoes.invalidar(formulario_id)
@@ -0,0 +1,202 @@
+# app/services/exportacao.py
+import csv
+import io
+import queue
+import threading
+import time
+import zipfile
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Tuple
+from uuid import UUID
+from psycopg2 import sql
+from app.db.database import engine
+from app.utils.exportacao import LayoutExport
+
+COPY_CHUNK_BYTES = 64 * 1024
+COPY_FILA_CHUNKS = 16
+
+_FIM = object()
+
+
+class _ExportacaoCancelada(Exception):
+    pass
+
+
+def montar_consulta_copy(
+    formulario_id: UUID,
+    layout: LayoutExport,
+    inicio: Optional[datetime],
+    fim: Optional[datetime],
+    apenas_ativas: bool = False,
+    desde: Optional[tuple] = None,
+    ate: Optional[tuple] = None,
+) -> sql.Composed:
+    """Monta o SELECT pivotado (uma coluna por pergunta do layout) usado pelo COPY, com os valores já inlinados."""
+    valor = sql.SQL(
+        "COALESCE(i.valor_opcao_texto, o.texto, i.valor_texto, i.valor_numero::text, i.valor_data::text)"
+    )
+    colunas = [
+        sql.SQL("r.id"),
+        # mesmo formato de datetime.isoformat(): microssegundos só quando diferentes de zero
+        sql.SQL(
+            """CASE WHEN extract(microseconds FROM r.criado_em)::int % 1000000 = 0"""
+            """ THEN to_char(r.criado_em, 'YYYY-MM-DD"T"HH24:MI:SSTZH:TZM')"""
+            """ ELSE to_char(r.criado_em, 'YYYY-MM-DD"T"HH24:MI:SS.USTZH:TZM') END"""
+        ),
+    ]
+    for n, pid in enumerate(layout.indices, start=1):
+        colunas.append(
+            sql.SQL("string_agg({valor}, '; ' ORDER BY o.ordem NULLS LAST, i.id) FILTER (WHERE i.pergunta_id = {pid}::uuid) AS {alias}").format(
+                valor=valor, pid=sql.Literal(str(pid)), alias=sql.Identifier(f"c{n}")
+            )
+        )
+
+    juncao = sql.SQL("i.resposta_id = r.id")
+    if apenas_ativas:
+        juncao = sql.SQL(
+            "{} AND i.pergunta_id IN (SELECT p.id FROM perguntas p WHERE p.formulario_id = {}::uuid AND p.ativa)"
+        ).format(juncao, sql.Literal(str(formulario_id)))
+
+    filtros = [sql.SQL("r.formulario_id = {}::uuid").format(sql.Literal(str(formulario_id)))]
+    if inicio:
+        filtros.append(sql.SQL("r.criado_em >= {}").format(sql.Literal(inicio)))
+    if fim:
+        filtros.append(sql.SQL("r.criado_em < {}").format(sql.Literal(fim)))
+    if desde:
+        filtros.append(sql.SQL("(r.criado_em, r.id) > ({}, {}::uuid)").format(sql.Literal(desde[0]), sql.Literal(str(desde[1]))))
+    if ate:
+        filtros.append(sql.SQL("(r.criado_em, r.id) <= ({}, {}::uuid)").format(sql.Literal(ate[0]), sql.Literal(str(ate[1]))))
+
+    return sql.SQL(
+        "SELECT {colunas} FROM respostas r "
+        "LEFT JOIN respostas_itens i ON {juncao} "
+        "LEFT JOIN opcoes o ON o.id = i.valor_opcao_id "
+        "WHERE {filtros} "
+        "GROUP BY r.id, r.criado_em "
+        "ORDER BY r.criado_em, r.id"
+    ).format(
+        colunas=sql.SQL(", ").join(colunas),
+        juncao=juncao,
+        filtros=sql.SQL(" AND ").join(filtros),
+    )
+
+
+class _EscritorFila:
+    """Destino do COPY TO STDOUT: agrupa os bytes em blocos e os entrega à fila limitada do consumidor."""
+
+    def __init__(self, fila: queue.Queue, cancelado: threading.Event):
+        self.fila = fila
+        self.cancelado = cancelado
+        self.buf = bytearray()
+
+    def _entregar(self, dados: bytes) -> None:
+        while True:
+            if self.cancelado.is_set():
+                raise _ExportacaoCancelada()
+            try:
+                self.fila.put(dados, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def write(self, dados) -> None:
+        self.buf.extend(dados)
+        if len(self.buf) >= COPY_CHUNK_BYTES:
+            self._entregar(bytes(self.buf))
+            self.buf.clear()
+
+    def flush(self) -> None:
+        if self.buf:
+            self._entregar(bytes(self.buf))
+            self.buf.clear()
+
+
+def stream_copy_csv(consulta: sql.Composed, colunas: list[str], separador: str, fuso: str) -> Iterator[bytes]:
+    """Transmite em blocos a saída de `COPY (consulta) TO STDOUT` em CSV, sem processamento por linha em Python.
+
+    O COPY roda em thread própria com conexão dedicada; a fila limitada aplica contrapressão e, se o cliente
+    desconectar, a cópia é abortada e a conexão descartada.
+    """
+    fila: queue.Queue = queue.Queue(maxsize=COPY_FILA_CHUNKS)
+    cancelado = threading.Event()
+    escritor = _EscritorFila(fila, cancelado)
+    copy = sql.SQL("COPY ({}) TO STDOUT WITH (FORMAT csv, DELIMITER {})").format(consulta, sql.Literal(separador))
+
+    def _copiar():
+        conn = engine.raw_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(sql.SQL("SET LOCAL TIME ZONE {}").format(sql.Literal(fuso)))
+            cur.copy_expert(copy, escritor)
+            escritor.flush()
+            conn.rollback()
+            escritor._entregar(_FIM)
+        except BaseException as exc:
+            conn.invalidate()
+            if not cancelado.is_set():
+                fila.put(exc)
+        finally:
+            conn.close()
+
+    cabecalho = io.StringIO()
+    # COPY termina as linhas com \n; o cabeçalho segue o mesmo terminador
+    csv.writer(cabecalho, delimiter=separador, quoting=csv.QUOTE_MINIMAL, lineterminator="\n").writerow(colunas)
+    yield cabecalho.getvalue().encode("utf-8")
+
+    thread = threading.Thread(target=_copiar, name="export-copy", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = fila.get()
+            if item is _FIM:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        cancelado.set()
+        while thread.is_alive():
+            try:
+                fila.get_nowait()
+            except queue.Empty:
+                thread.join(0.1)
+
+
+class _BufferZip:
+    """Destino sem seek para o ZipFile: o zipfile passa a usar data descriptors e nunca volta atrás no stream."""
+
+    def __init__(self):
+        self.dados = bytearray()
+
+    def write(self, dados) -> int:
+        self.dados.extend(dados)
+        return len(dados)
+
+    def flush(self) -> None:
+        pass
+
+    def drenar(self) -> bytes:
+        dados = bytes(self.dados)
+        self.dados.clear()
+        return dados
+
+
+def stream_zip(entradas: Iterable[Tuple[str, Iterable[bytes], bool]]) -> Iterator[bytes]:
+    """Gera um ZIP em streaming a partir de `(nome, partes, comprimir)`, sem arquivos temporários.
+
+    Cada entrada é escrita à medida que suas partes são geradas e a saída é emitida em blocos de ~64 KiB.
+    Entradas já comprimidas (`comprimir=False`) são armazenadas sem deflate.
+    """
+    buffer = _BufferZip()
+    data_hora = time.localtime()[:6]
+    with zipfile.ZipFile(buffer, "w", allowZip64=True) as zf:
+        for nome, partes, comprimir in entradas:
+            info = zipfile.ZipInfo(nome, date_time=data_hora)
+            info.compress_type = zipfile.ZIP_DEFLATED if comprimir else zipfile.ZIP_STORED
+            with zf.open(info, "w", force_zip64=True) as destino:
+                for parte in partes:
+                    destino.write(parte)
+                    if len(buffer.dados) >= COPY_CHUNK_BYTES:
+                        yield buffer.drenar()
+    if buffer.dados:
+        yield buffer.drenar()
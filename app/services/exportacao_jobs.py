@@ -0,0 +1,185 @@
+# app/services/exportacao_jobs.py
+import asyncio
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from uuid import UUID, uuid4
+import anyio
+from fastapi import HTTPException, status
+from app import schemas
+from app.core.config import settings
+from app.crud.forms import gerar_arquivo_exportacao, FORMATOS_EXPORT
+from app.db.database import SessionLocal
+from app.websockets.conexoes import gerenciador
+
+
+def sala_exportacoes(formulario_id) -> str:
+    return f"exportacoes:{formulario_id}"
+
+
+@dataclass
+class JobExportacao:
+    id: UUID
+    formulario_id: UUID
+    usuario_id: UUID
+    consulta: schemas.ExportQuery
+    status: str = "pendente"
+    linhas: int = 0
+    total: Optional[int] = None
+    erro: Optional[str] = None
+    caminho: Optional[str] = None
+    criado_em: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    expira: Optional[float] = None
+
+    @property
+    def nome_arquivo(self) -> str:
+        ext, _ = FORMATOS_EXPORT[self.consulta.formato]
+        return f"form_{self.formulario_id}_respostas.{ext}"
+
+    @property
+    def media_type(self) -> str:
+        return FORMATOS_EXPORT[self.consulta.formato][1]
+
+    def para_saida(self) -> schemas.ExportacaoJobOut:
+        expira_em = None
+        if self.expira is not None:
+            expira_em = datetime.fromtimestamp(self.expira, timezone.utc)
+        return schemas.ExportacaoJobOut(
+            id=self.id,
+            formulario_id=self.formulario_id,
+            formato=self.consulta.formato,
+            status=self.status,
+            linhas=self.linhas,
+            total=self.total,
+            erro=self.erro,
+            criado_em=self.criado_em,
+            expira_em=expira_em,
+            url=f"/exports/{self.id}",
+        )
+
+
+class GerenciadorExportacoes:
+    """Executa exportações em segundo plano com poucos workers dedicados, gravando os arquivos em disco.
+
+    Os workers usam um CapacityLimiter próprio, então exportações longas não ocupam as threads nem as conexões
+    usadas pela ingestão de respostas. Jobs e arquivos expiram após `ttl` segundos.
+    """
+
+    def __init__(self, diretorio: str, workers: int, fila_max: int, ttl: int, intervalo_progresso: int):
+        self.diretorio = diretorio
+        self.workers = workers
+        self.fila_max = fila_max
+        self.ttl = ttl
+        self.intervalo_progresso = intervalo_progresso
+        self.jobs: Dict[UUID, JobExportacao] = {}
+        self._fila: Optional[asyncio.Queue] = None
+        self._limitador: Optional[anyio.CapacityLimiter] = None
+        self._tarefas: List[asyncio.Task] = []
+
+    async def iniciar(self) -> None:
+        """Limpa artefatos de execuções anteriores e inicia os workers e a limpeza periódica."""
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._fila = asyncio.Queue(maxsize=self.fila_max)
+        self._limitador = anyio.CapacityLimiter(self.workers)
+        self._tarefas = [asyncio.create_task(self._executar()) for _ in range(self.workers)]
+        self._tarefas.append(asyncio.create_task(self._limpar_periodicamente()))
+
+    async def parar(self) -> None:
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        for tarefa in self._tarefas:
+            try:
+                await tarefa
+            except asyncio.CancelledError:
+                pass
+        self._tarefas = []
+        self._fila = None
+
+    def enfileirar(self, formulario_id: UUID, usuario_id: UUID, consulta: schemas.ExportQuery) -> JobExportacao:
+        """Registra o job e o coloca na fila; responde 503 quando a fila está cheia."""
+        if self._fila is None:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Exportação em segundo plano indisponível")
+        if self._fila.full():
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Fila de exportações cheia; tente novamente")
+        job = JobExportacao(id=uuid4(), formulario_id=formulario_id, usuario_id=usuario_id, consulta=consulta)
+        self.jobs[job.id] = job
+        self._fila.put_nowait(job)
+        return job
+
+    def obter(self, job_id: UUID) -> Optional[JobExportacao]:
+        job = self.jobs.get(job_id)
+        if job is not None and job.expira is not None and time.time() > job.expira:
+            self._remover(job)
+            return None
+        return job
+
+    def _remover(self, job: JobExportacao) -> None:
+        self.jobs.pop(job.id, None)
+        if job.caminho:
+            try:
+                os.remove(job.caminho)
+            except FileNotFoundError:
+                pass
+
+    async def _publicar(self, job: JobExportacao, tipo: str) -> None:
+        await gerenciador.enviar_para_sala(
+            sala_exportacoes(job.formulario_id),
+            {"tipo": tipo, "dados": job.para_saida().model_dump(mode="json")},
+        )
+
+    def _gerar(self, job: JobExportacao) -> None:
+        def _progresso(feitas: int, total: int) -> None:
+            job.linhas, job.total = feitas, total
+            anyio.from_thread.run(self._publicar, job, "exportacao_progresso")
+
+        db = SessionLocal()
+        try:
+            gerar_arquivo_exportacao(
+                db, job.formulario_id, job.consulta, job.caminho,
+                progresso=_progresso, intervalo_progresso=self.intervalo_progresso,
+            )
+        finally:
+            db.close()
+
+    async def _executar(self) -> None:
+        while True:
+            job = await self._fila.get()
+            if job.id not in self.jobs:
+                continue
+            job.status = "executando"
+            job.caminho = os.path.join(self.diretorio, f"{job.id}.{FORMATOS_EXPORT[job.consulta.formato][0]}")
+            await self._publicar(job, "exportacao_iniciada")
+            try:
+                await anyio.to_thread.run_sync(self._gerar, job, limiter=self._limitador)
+                job.status = "concluida"
+            except Exception as e:
+                print("[EXPORTACAO] falha no job", job.id, ":", e)
+                job.status = "erro"
+                job.erro = e.detail if isinstance(e, HTTPException) else "Falha ao gerar exportação"
+                try:
+                    os.remove(job.caminho)
+                except FileNotFoundError:
+                    pass
+                job.caminho = None
+            job.expira = time.time() + self.ttl
+            await self._publicar(job, "exportacao_concluida" if job.status == "concluida" else "exportacao_erro")
+
+    async def _limpar_periodicamente(self) -> None:
+        while True:
+            await asyncio.sleep(60)
+            agora = time.time()
+            for job in [j for j in self.jobs.values() if j.expira is not None and agora > j.expira]:
+                self._remover(job)
+
+
+exportacoes = GerenciadorExportacoes(
+    settings.EXPORT_JOBS_DIR,
+    settings.EXPORT_JOBS_MAX_CONCORRENTES,
+    settings.EXPORT_JOBS_FILA_MAX,
+    settings.EXPORT_JOBS_TTL,
+    settings.EXPORT_JOBS_PROGRESSO_LINHAS,
+)
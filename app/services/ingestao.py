@@ -0,0 +1,348 @@
+# app/services/ingestao.py
+import asyncio
+import io
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import anyio
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.db.database import engine
+from app.crud.identificadores import CHAVES, cache_identificadores
+from app.crud.estatisticas import aplicar_estatisticas
+from app.crud.serie import invalidar_cache_serie
+from app.services.cache_exportacao import invalidar_cache_exportacao
+from app.websockets.conexoes import gerenciador
+from app.services.agregados_ws import agregados_ao_vivo
+
+COLUNAS_RESPOSTAS = ("id", "formulario_id", "criado_em", "origem_ip", "user_agent", "meta", "email", "telefone", "cnpj")
+COLUNAS_ITENS = ("id", "resposta_id", "pergunta_id", "valor_texto", "valor_numero", "valor_opcao_id", "valor_opcao_texto", "valor_data")
+
+
+def _csv_valor(v) -> str:
+    """Serializa um valor para COPY CSV: NULL como campo vazio, demais valores sempre entre aspas."""
+    if v is None:
+        return ""
+    if isinstance(v, (dict, list)):
+        v = json.dumps(v, ensure_ascii=False)
+    return '"' + str(v).replace('"', '""') + '"'
+
+
+def _csv(linhas: List[dict], colunas: tuple) -> io.StringIO:
+    buf = io.StringIO()
+    for linha in linhas:
+        buf.write(",".join(_csv_valor(linha.get(c)) for c in colunas))
+        buf.write("\n")
+    buf.seek(0)
+    return buf
+
+
+def gravar_lote(entradas: List[dict]) -> Tuple[set, set]:
+    """Grava um lote de respostas via COPY em tabelas temporárias e retorna os ids inseridos e os em conflito.
+
+    Duplicidades são descartadas com ON CONFLICT DO NOTHING: um id já gravado torna a regravação do journal
+    idempotente; uma resposta que não foi gravada por repetir um identificador único volta como conflito.
+    """
+    respostas = [e["resposta"] for e in entradas]
+    itens = [i for e in entradas for i in e["itens"]]
+    cols_r = ", ".join(COLUNAS_RESPOSTAS)
+    cols_i = ", ".join(COLUNAS_ITENS)
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("CREATE TEMP TABLE _ingestao_respostas (LIKE respostas) ON COMMIT DROP")
+        cur.execute("CREATE TEMP TABLE _ingestao_itens (LIKE respostas_itens) ON COMMIT DROP")
+        cur.copy_expert(f"COPY _ingestao_respostas ({cols_r}) FROM STDIN WITH (FORMAT csv)", _csv(respostas, COLUNAS_RESPOSTAS))
+        if itens:
+            cur.copy_expert(f"COPY _ingestao_itens ({cols_i}) FROM STDIN WITH (FORMAT csv)", _csv(itens, COLUNAS_ITENS))
+        cur.execute(
+            f"INSERT INTO respostas ({cols_r}) SELECT {cols_r} FROM _ingestao_respostas "
+            "ON CONFLICT DO NOTHING RETURNING id"
+        )
+        inseridos = [str(r[0]) for r in cur.fetchall()]
+        if inseridos and itens:
+            cur.execute(
+                f"INSERT INTO respostas_itens ({cols_i}) SELECT {cols_i} FROM _ingestao_itens "
+                "WHERE resposta_id = ANY(%s::uuid[])",
+                (inseridos,),
+            )
+        cur.execute(
+            "SELECT t.id FROM _ingestao_respostas t WHERE NOT EXISTS (SELECT 1 FROM respostas r WHERE r.id = t.id)"
+        )
+        conflitos = {str(r[0]) for r in cur.fetchall()}
+        aplicar_estatisticas(cur, inseridos)
+        conn.commit()
+        inseridos = set(inseridos)
+        for formulario_id in {r["formulario_id"] for r in respostas if str(r["id"]) in inseridos}:
+            invalidar_cache_exportacao(formulario_id)
+        return inseridos, conflitos
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _chaves_identificadores(entrada: dict) -> List[tuple]:
+    resposta = entrada["resposta"]
+    return [(str(resposta["formulario_id"]), c, resposta[c]) for c in CHAVES if resposta.get(c)]
+
+
+class FilaIngestao:
+    """Fila limitada em processo que grava respostas em lote, com journal append-only para recuperação após queda.
+
+    O journal guarda só as respostas ainda não gravadas: é compactado a cada lote gravado. Lotes que falham
+    `tentativas` vezes são gravados resposta a resposta e as que ainda falham vão para o arquivo de dead-letter.
+    """
+
+    def __init__(
+        self,
+        caminho_journal: str,
+        tamanho_max: int,
+        lote_max: int,
+        intervalo_ms: int,
+        tentativas: int = 3,
+        caminho_dead_letter: Optional[str] = None,
+    ):
+        self.caminho_journal = caminho_journal
+        self.caminho_dead_letter = caminho_dead_letter or caminho_journal + ".dead"
+        self.tamanho_max = tamanho_max
+        self.lote_max = lote_max
+        self.intervalo = intervalo_ms / 1000
+        self.tentativas = max(tentativas, 1)
+        self._fila: Optional[asyncio.Queue] = None
+        self._tarefa: Optional[asyncio.Task] = None
+        self._journal = None
+        # respostas já no journal e ainda não gravadas (nem enviadas ao dead-letter), por id; protegido por _lock_journal
+        self._pendentes: Dict[str, dict] = {}
+        self._lock_journal = threading.Lock()
+        # vagas reservadas por enfileiramentos com escrita no journal em andamento
+        self._reservas = 0
+        # identificadores das respostas enfileiradas: (formulario_id, campo, valor) -> id da resposta
+        self._identificadores: Dict[tuple, str] = {}
+
+    @property
+    def ativa(self) -> bool:
+        return self._tarefa is not None
+
+    def _ler_journal(self) -> List[dict]:
+        if not os.path.exists(self.caminho_journal):
+            return []
+        entradas: Dict[str, dict] = {}
+        with open(self.caminho_journal, "r", encoding="utf-8") as f:
+            for linha in f:
+                linha = linha.strip()
+                if not linha:
+                    continue
+                try:
+                    entrada = json.loads(linha)
+                except ValueError:
+                    # última linha truncada por uma queda no meio da escrita
+                    continue
+                # uma compactação concorrente com um enfileiramento pode repetir a mesma resposta
+                entradas[str(entrada["resposta"]["id"])] = entrada
+        return list(entradas.values())
+
+    def _escrever_journal(self, entrada: dict) -> None:
+        linha = json.dumps(entrada, ensure_ascii=False) + "\n"
+        with self._lock_journal:
+            self._journal.write(linha)
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._pendentes[str(entrada["resposta"]["id"])] = entrada
+
+    def _compactar_journal(self, concluidos: List[str]) -> None:
+        """Retira as respostas concluídas e substitui o journal pelas ainda pendentes (temporário + rename atômico).
+
+        A lista de pendentes é lida sob o mesmo lock da escrita: uma resposta registrada durante a compactação
+        está no arquivo novo ou é escrita nele depois.
+        """
+        temporario = self.caminho_journal + ".tmp"
+        with self._lock_journal:
+            for rid in concluidos:
+                self._pendentes.pop(rid, None)
+            with open(temporario, "w", encoding="utf-8") as f:
+                for entrada in self._pendentes.values():
+                    f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, self.caminho_journal)
+            self._journal.close()
+            self._journal = open(self.caminho_journal, "a", encoding="utf-8")
+
+    def _enviar_dead_letter(self, entrada: dict, erro) -> None:
+        with open(self.caminho_dead_letter, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"erro": str(erro), "entrada": entrada}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def _desviar_conflitos(self, lote: List[dict], conflitos: set) -> None:
+        """Envia ao dead-letter as respostas já aceitas (202) que não foram gravadas por identificador repetido."""
+        for entrada in lote:
+            rid = str(entrada["resposta"]["id"])
+            if rid in conflitos:
+                print("[INGESTAO] resposta enviada ao dead-letter por identificador duplicado:", rid)
+                await anyio.to_thread.run_sync(
+                    self._enviar_dead_letter, entrada, "Este identificador já respondeu a este formulário"
+                )
+
+    async def _gravar(self, lote: List[dict]) -> set:
+        """Grava o lote com até `tentativas` tentativas; depois, resposta a resposta, desviando as que falharem.
+
+        Respostas em conflito de identificador também vão para o dead-letter. Retorna os ids inseridos.
+        """
+        espera = 1
+        for tentativa in range(1, self.tentativas + 1):
+            try:
+                inseridos, conflitos = await anyio.to_thread.run_sync(gravar_lote, lote)
+                await self._desviar_conflitos(lote, conflitos)
+                return inseridos
+            except Exception as e:
+                print(f"[INGESTAO] falha ao gravar lote ({tentativa}/{self.tentativas}):", e)
+                if tentativa < self.tentativas:
+                    await asyncio.sleep(espera)
+                    espera = min(espera * 2, 5)
+
+        inseridos = set()
+        for entrada in lote:
+            try:
+                gravados, conflitos = await anyio.to_thread.run_sync(gravar_lote, [entrada])
+                inseridos |= gravados
+                await self._desviar_conflitos([entrada], conflitos)
+            except Exception as e:
+                rid = entrada["resposta"]["id"]
+                print("[INGESTAO] resposta enviada ao dead-letter:", rid, e)
+                await anyio.to_thread.run_sync(self._enviar_dead_letter, entrada, e)
+        return inseridos
+
+    async def iniciar(self) -> None:
+        """Regrava pendências do journal e inicia o gravador em segundo plano."""
+        os.makedirs(os.path.dirname(self.caminho_journal) or ".", exist_ok=True)
+        pendentes = self._ler_journal()
+        for i in range(0, len(pendentes), self.lote_max):
+            await self._gravar(pendentes[i:i + self.lote_max])
+        if pendentes:
+            print("[INGESTAO] journal recuperado:", len(pendentes), "respostas")
+        self._journal = open(self.caminho_journal, "a", encoding="utf-8")
+        self._journal.truncate(0)
+        self._pendentes = {}
+        self._identificadores = {}
+        self._fila = asyncio.Queue(maxsize=self.tamanho_max)
+        self._tarefa = asyncio.create_task(self._executar())
+
+    async def parar(self) -> None:
+        """Interrompe o gravador e tenta gravar o que restou na fila.
+
+        O journal não é truncado aqui: um lote interrompido no meio é regravado de forma idempotente na próxima subida.
+        """
+        if self._tarefa is None:
+            return
+        self._tarefa.cancel()
+        try:
+            await self._tarefa
+        except asyncio.CancelledError:
+            pass
+        self._tarefa = None
+        restantes = []
+        while not self._fila.empty():
+            restantes.append(self._fila.get_nowait())
+        try:
+            for i in range(0, len(restantes), self.lote_max):
+                lote = restantes[i:i + self.lote_max]
+                _, conflitos = await anyio.to_thread.run_sync(gravar_lote, lote)
+                await self._desviar_conflitos(lote, conflitos)
+        except Exception as e:
+            print("[INGESTAO] falha ao esvaziar a fila no desligamento; pendências ficam no journal:", e)
+        self._journal.close()
+        self._journal = None
+
+    async def enfileirar(self, entrada: dict) -> None:
+        """Registra a resposta no journal (com fsync, fora do event loop) e a coloca na fila.
+
+        Responde 503 quando a fila está cheia, com a vaga reservada antes da escrita no journal, e 409 quando um
+        identificador da resposta já está em outra resposta enfileirada (as já gravadas são barradas em `preparar`).
+        """
+        if self._fila is None:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Ingestão assíncrona indisponível")
+        if len(self._pendentes) + self._reservas >= self.tamanho_max:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Fila de ingestão cheia; tente novamente")
+        rid = str(entrada["resposta"]["id"])
+        chaves = _chaves_identificadores(entrada)
+        for chave in chaves:
+            if chave in self._identificadores:
+                raise HTTPException(status_code=409, detail=f"Este identificador já respondeu a este formulário: {chave[2]}")
+        for chave in chaves:
+            self._identificadores[chave] = rid
+        self._reservas += 1
+        try:
+            await anyio.to_thread.run_sync(self._escrever_journal, entrada)
+        except BaseException:
+            self._liberar_identificadores(entrada)
+            raise
+        finally:
+            self._reservas -= 1
+        self._fila.put_nowait(entrada)
+
+    def _liberar_identificadores(self, entrada: dict) -> None:
+        rid = str(entrada["resposta"]["id"])
+        for chave in _chaves_identificadores(entrada):
+            if self._identificadores.get(chave) == rid:
+                del self._identificadores[chave]
+
+    async def _coletar_lote(self) -> List[dict]:
+        loop = asyncio.get_running_loop()
+        lote = [await self._fila.get()]
+        prazo = loop.time() + self.intervalo
+        while len(lote) < self.lote_max:
+            restante = prazo - loop.time()
+            if restante <= 0:
+                break
+            try:
+                lote.append(await asyncio.wait_for(self._fila.get(), restante))
+            except asyncio.TimeoutError:
+                break
+        return lote
+
+    async def _executar(self) -> None:
+        while True:
+            lote = await self._coletar_lote()
+            inseridos = await self._gravar(lote)
+
+            for e in lote:
+                self._liberar_identificadores(e)
+            try:
+                await anyio.to_thread.run_sync(self._compactar_journal, [str(e["resposta"]["id"]) for e in lote])
+            except Exception as e:
+                # sem compactação o journal só cresce; a regravação na subida continua idempotente
+                print("[INGESTAO] falha ao compactar o journal:", e)
+
+            # respostas que caíram em buckets que a série já pode ter guardado como fechados
+            limite = datetime.now(timezone.utc) - timedelta(seconds=settings.SERIE_MARGEM_S)
+            for formulario_id in {
+                e["resposta"]["formulario_id"]
+                for e in lote
+                if str(e["resposta"]["id"]) in inseridos and datetime.fromisoformat(e["resposta"]["criado_em"]) < limite
+            }:
+                invalidar_cache_serie(formulario_id)
+
+            for e in lote:
+                rid = str(e["resposta"]["id"])
+                if rid not in inseridos:
+                    # já gravada antes (regravação) ou desviada ao dead-letter em `_gravar`
+                    continue
+                cache_identificadores.registrar(e["resposta"])
+                sala_id = f"respostas:{e['resposta']['formulario_id']}"
+                await gerenciador.enviar_para_sala(sala_id, {"tipo": "resposta_criada", "dados": e["dados"]})
+                agregados_ao_vivo.registrar(e["resposta"]["formulario_id"], [e["dados"]])
+
+
+fila_ingestao = FilaIngestao(
+    settings.INGESTAO_JOURNAL,
+    settings.INGESTAO_FILA_MAX,
+    settings.INGESTAO_LOTE_MAX,
+    settings.INGESTAO_INTERVALO_MS,
+    settings.INGESTAO_TENTATIVAS,
+    settings.INGESTAO_DEAD_LETTER,
+)
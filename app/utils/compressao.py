@@ -0,0 +1,99 @@
+import zlib
+from typing import Iterable, Iterator, Optional
+from fastapi import HTTPException, status
+
+try:
+    import zstandard
+except ImportError:  # dependência opcional: sem ela, apenas gzip é oferecido
+    zstandard = None
+
+COMPRESSAO_CHUNK_BYTES = 64 * 1024
+GZIP_NIVEL = 6
+ZSTD_NIVEL = 3
+
+# extensão e media type do arquivo quando a compressão é pedida explicitamente via `compressao=`
+ARQUIVOS_COMPRIMIDOS = {
+    "gzip": ("gz", "application/gzip"),
+    "zstd": ("zst", "application/zstd"),
+}
+
+
+def compressoes_disponiveis() -> list[str]:
+    """Codificações suportadas pelo servidor, em ordem de preferência."""
+    return (["zstd"] if zstandard is not None else []) + ["gzip"]
+
+
+def _validar_compressao(compressao: str) -> Optional[str]:
+    compressao = compressao.strip().lower()
+    if compressao in ("", "nenhuma", "identity"):
+        return None
+    if compressao not in ARQUIVOS_COMPRIMIDOS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Compressão inválida; use gzip, zstd ou nenhuma")
+    if compressao not in compressoes_disponiveis():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Compressão zstd exige o pacote zstandard instalado no servidor",
+        )
+    return compressao
+
+
+def negociar_compressao(accept_encoding: Optional[str]) -> Optional[str]:
+    """Escolhe a codificação a partir do cabeçalho Accept-Encoding (respeitando q=0); None quando nenhuma serve."""
+    if not accept_encoding:
+        return None
+    pesos = {}
+    for item in accept_encoding.split(","):
+        nome, _, params = item.strip().partition(";")
+        nome = nome.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            chave, _, valor = param.strip().partition("=")
+            if chave.strip().lower() == "q":
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        if nome:
+            pesos[nome] = q
+    melhor, melhor_q = None, 0.0
+    for codificacao in compressoes_disponiveis():
+        q = pesos.get(codificacao, pesos.get("*", 0.0))
+        if q > melhor_q:
+            melhor, melhor_q = codificacao, q
+    return melhor
+
+
+def escolher_compressao(compressao: Optional[str], accept_encoding: Optional[str]) -> tuple[Optional[str], bool]:
+    """Retorna `(codificacao, explicita)`: o parâmetro `compressao` tem precedência sobre o Accept-Encoding."""
+    if compressao is not None:
+        return _validar_compressao(compressao), True
+    return negociar_compressao(accept_encoding), False
+
+
+def _compressor(codificacao: str):
+    if codificacao == "gzip":
+        return zlib.compressobj(GZIP_NIVEL, zlib.DEFLATED, 31)
+    return zstandard.ZstdCompressor(level=ZSTD_NIVEL).compressobj()
+
+
+def comprimir_stream(
+    partes: Iterable[bytes],
+    codificacao: str,
+    tamanho: int = COMPRESSAO_CHUNK_BYTES,
+) -> Iterator[bytes]:
+    """Comprime o stream incrementalmente, acumulando a saída e emitindo blocos de ~`tamanho` bytes."""
+    compressor = _compressor(codificacao)
+    buffer = bytearray()
+    try:
+        for parte in partes:
+            buffer += compressor.compress(parte)
+            if len(buffer) >= tamanho:
+                yield bytes(buffer)
+                buffer.clear()
+    finally:
+        # repassa o encerramento (ex.: cliente desconectou) ao gerador de origem
+        if hasattr(partes, "close"):
+            partes.close()
+    buffer += compressor.flush()
+    if buffer:
+        yield bytes(buffer)
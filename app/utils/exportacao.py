@@ -1,58 +1,86 @@
-from datetime import datetime
-from typing import Dict, Any, Optional, Set
-from app.schemas import ExportRow
-import json
-
-
-def _flatten(obj: Dict[str, Any], parent_key: str = "", sep: str = ".") -> Dict[str, Any]:
-    """Achata um dicionário aninhado em chaves com notação pontilhada."""
-    items = []
-    for k, v in obj.items():
-        new_key = f"{parent_key}{sep}{k}" if parent_key else k
-        if isinstance(v, dict):
-            items.extend(_flatten(v, new_key, sep=sep).items())
-        elif isinstance(v, list):
-            items.append((new_key, str(v)))
-        else:
-            items.append((new_key, v))
-    return dict(items)
-
-
-def resposta_para_export_row(resposta, perguntas_ids_permitidas: Optional[Set[str]] = None, label_attr: str = "texto") -> ExportRow:
-    """Transforma Resposta em ExportRow.
-    - Usa o texto da pergunta como chave (ex.: `Pergunta.texto`).
-    - Se `perguntas_ids_permitidas` for fornecido, só inclui itens cujo `pergunta_id` esteja no conjunto.
+import base64
+from dataclasses import dataclass
+from datetime import datetime, tzinfo
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+from fastapi import HTTPException, status
+
+
+def codificar_cursor(criado_em: datetime, resposta_id) -> str:
+    """Codifica a chave (criado_em, id) da última resposta exportada em um cursor opaco."""
+    bruto = f"{criado_em.isoformat()}|{resposta_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(bruto).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decodifica um cursor de `codificar_cursor`; cursores malformados resultam em 400."""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        criado, rid = bruto.split("|", 1)
+        criado_em = datetime.fromisoformat(criado)
+        if criado_em.tzinfo is None:
+            raise ValueError("cursor sem timezone")
+        return criado_em, UUID(rid)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+
+
+@dataclass(frozen=True)
+class LayoutExport:
+    """Colunas da exportação definidas pelo esquema do formulário: `id`, `criado_em` e uma coluna por pergunta."""
+    colunas: List[str]
+    indices: Dict[UUID, int]
+    tipos: List[Optional[str]]
+
+
+def montar_layout_export(perguntas: Iterable[tuple]) -> LayoutExport:
+    """Monta o layout a partir de (id, texto[, tipo]) das perguntas já ordenadas; textos repetidos recebem sufixo " (n)"."""
+    colunas = ["id", "criado_em"]
+    tipos: List[Optional[str]] = [None, None]
+    indices: Dict[UUID, int] = {}
+    usados: Dict[str, int] = {}
+    for pid, texto, *resto in perguntas:
+        label = texto or str(pid)
+        usados[label] = usados.get(label, 0) + 1
+        if usados[label] > 1:
+            label = f"{label} ({usados[label]})"
+        indices[pid] = len(colunas)
+        colunas.append(label)
+        tipo = resto[0] if resto else None
+        tipos.append(getattr(tipo, "value", tipo))
+    return LayoutExport(colunas=colunas, indices=indices, tipos=tipos)
+
+
+def pivotar_linhas_export(
+    linhas: Iterable,
+    layout: LayoutExport,
+    tz: Optional[tzinfo] = None,
+    formatar_data: bool = True,
+) -> Iterator[list]:
+    """Agrupa linhas (resposta_id, criado_em, pergunta_id, valor_texto, valor_numero, valor_data), já ordenadas
+    por resposta, em uma lista por resposta na ordem de `layout.colunas`.
+    - `criado_em` é convertido para `tz` e, com `formatar_data`, formatado em ISO 8601.
+    - Perguntas com vários itens (caixa de seleção) têm os valores unidos por "; ".
     """
-    dados: Dict[str, Any] = {}
-    itens = getattr(resposta, "itens", []) or []
-    for item in itens:
-        pid = getattr(item, "pergunta_id", None)
-        if perguntas_ids_permitidas is not None and (pid is None or str(pid) not in perguntas_ids_permitidas):
+    largura = len(layout.colunas)
+    indices = layout.indices
+    atual = None
+    linha: list = []
+    for rid, criado, pid, texto, numero, data in linhas:
+        if rid != atual:
+            if atual is not None:
+                yield linha
+            atual = rid
+            linha = [None] * largura
+            linha[0] = str(rid)
+            criado = criado.astimezone(tz) if tz is not None else criado
+            linha[1] = criado.isoformat() if formatar_data else criado
+        idx = indices.get(pid)
+        if idx is None:
+            continue
+        valor = texto if texto is not None else numero if numero is not None else data
+        if valor is None:
             continue
-        label = None
-        if hasattr(item, "pergunta") and item.pergunta is not None:
-            # tenta usar atributo de rótulo (por padrão, `texto`), senão cai para o id
-            if hasattr(item.pergunta, label_attr) and getattr(item.pergunta, label_attr):
-                label = str(getattr(item.pergunta, label_attr))
-            elif hasattr(item.pergunta, "id") and item.pergunta.id is not None:
-                label = str(item.pergunta.id)
-        if label is None:
-            label = str(pid) if pid is not None else ""
-        valor = getattr(item, "valor", None)
-        if valor is None and hasattr(item, "conteudo"):
-            valor = getattr(item, "conteudo")
-        if isinstance(valor, (dict, list)):
-            valor = json.dumps(valor, ensure_ascii=False)
-        dados[label] = valor
-    criado = getattr(resposta, "criado_em", None)
-    if isinstance(criado, datetime):
-        criado_dt = criado
-    else:
-        criado_dt = datetime.fromisoformat(str(criado)) if criado else datetime.utcnow()
-    rid = getattr(resposta, "id", None)
-    rid_str = str(rid) if rid is not None else ""
-    return ExportRow(
-        id=rid_str,
-        criado_em=criado_dt,
-        dados=dados,
-    )
\ No newline at end of file
+        linha[idx] = valor if linha[idx] is None else f"{linha[idx]}; {valor}"
+    if atual is not None:
+        yield linha
@@ -0,0 +1,127 @@
+import io
+from datetime import date, tzinfo
+from typing import Iterable, Iterator, List, Optional
+from fastapi import HTTPException, status
+from app.utils.exportacao import LayoutExport
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # dependência opcional: só os formatos parquet/arrow dependem dela
+    pa = pa_ipc = pq = None
+
+LINHAS_POR_LOTE = 10000
+
+TIPOS_INTEIROS = {"nps", "numero"}
+TIPOS_DATA = {"data"}
+TIPOS_CATEGORICOS = {"multipla_escolha", "caixa_selecao", "multipla_escolha_personalizada"}
+
+
+def _exigir_pyarrow() -> None:
+    if pa is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Formatos parquet/arrow exigem o pacote pyarrow instalado no servidor",
+        )
+
+
+def schema_arrow(layout: LayoutExport, tz: Optional[tzinfo] = None) -> "pa.Schema":
+    """Schema Arrow tipado pelo TipoPergunta de cada coluna: inteiros, datas, categorias (dictionary) ou texto."""
+    _exigir_pyarrow()
+    campos = [
+        pa.field("id", pa.string(), nullable=False),
+        pa.field("criado_em", pa.timestamp("us", tz=str(tz) if tz is not None else "UTC"), nullable=False),
+    ]
+    for nome, tipo in zip(layout.colunas[2:], layout.tipos[2:]):
+        if tipo in TIPOS_INTEIROS:
+            tipo_arrow = pa.int64()
+        elif tipo in TIPOS_DATA:
+            tipo_arrow = pa.date32()
+        elif tipo in TIPOS_CATEGORICOS:
+            tipo_arrow = pa.dictionary(pa.int32(), pa.string())
+        else:
+            tipo_arrow = pa.string()
+        campos.append(pa.field(nome, tipo_arrow))
+    return pa.schema(campos)
+
+
+def _inteiro(v):
+    if v is None or isinstance(v, int):
+        return v
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _data(v):
+    if v is None or isinstance(v, date):
+        return v
+    try:
+        return date.fromisoformat(str(v))
+    except ValueError:
+        return None
+
+
+def _texto(v):
+    return v if v is None or isinstance(v, str) else str(v)
+
+
+def _lote(linhas: List[list], schema: "pa.Schema") -> "pa.RecordBatch":
+    arrays = []
+    for i, campo in enumerate(schema):
+        valores = [linha[i] for linha in linhas]
+        if pa.types.is_dictionary(campo.type):
+            arrays.append(pa.array([_texto(v) for v in valores], type=pa.string()).dictionary_encode())
+        elif pa.types.is_integer(campo.type):
+            arrays.append(pa.array([_inteiro(v) for v in valores], type=campo.type))
+        elif pa.types.is_date(campo.type):
+            arrays.append(pa.array([_data(v) for v in valores], type=campo.type))
+        elif pa.types.is_timestamp(campo.type):
+            arrays.append(pa.array(valores, type=campo.type))
+        else:
+            arrays.append(pa.array([_texto(v) for v in valores], type=campo.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _lotes(rows: Iterable[list], schema: "pa.Schema") -> Iterator["pa.RecordBatch"]:
+    """Agrupa as linhas (com `criado_em` como datetime) em RecordBatches de até LINHAS_POR_LOTE linhas."""
+    buffer: List[list] = []
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) >= LINHAS_POR_LOTE:
+            yield _lote(buffer, schema)
+            buffer = []
+    if buffer:
+        yield _lote(buffer, schema)
+
+
+def escrever_parquet(rows: Iterable[list], schema: "pa.Schema", destino) -> None:
+    """Grava Parquet com compressão zstd, um row group por lote, sem materializar a exportação inteira."""
+    _exigir_pyarrow()
+    with pq.ParquetWriter(destino, schema, compression="zstd") as writer:
+        escreveu = False
+        for lote in _lotes(rows, schema):
+            writer.write_batch(lote)
+            escreveu = True
+        if not escreveu:
+            writer.write_table(schema.empty_table())
+
+
+def stream_arrow(rows: Iterable[list], schema: "pa.Schema") -> Iterator[bytes]:
+    """Gera um Arrow IPC stream, emitindo os bytes de cada RecordBatch assim que ele é escrito."""
+    _exigir_pyarrow()
+    sink = io.BytesIO()
+
+    def _drenar() -> bytes:
+        dados = sink.getvalue()
+        sink.seek(0)
+        sink.truncate(0)
+        return dados
+
+    with pa_ipc.new_stream(sink, schema, options=pa_ipc.IpcWriteOptions(compression="zstd")) as writer:
+        for lote in _lotes(rows, schema):
+            writer.write_batch(lote)
+            yield _drenar()
+    yield _drenar()
@@ -0,0 +1,61 @@
+import codecs
+import json
+from typing import Any, AsyncIterator
+from fastapi import HTTPException, status
+
+_ESPACOS = " \t\r\n"
+
+
+async def iterar_objetos_json(chunks: AsyncIterator[bytes], limite_bytes: int, limite_itens: int) -> AsyncIterator[Any]:
+    """Decodifica incrementalmente um array JSON ou um corpo NDJSON, emitindo um valor por vez.
+
+    O buffer guarda apenas o item em leitura; itens maiores que `limite_bytes` ou corpos com mais de
+    `limite_itens` itens são rejeitados com 413, e JSON malformado com 400.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    decoder = json.JSONDecoder()
+    buf = ""
+    modo = None
+    fechado = False
+    total = 0
+
+    def _proximos(final: bool):
+        nonlocal buf, modo, fechado, total
+        while True:
+            buf = buf.lstrip(_ESPACOS + ("," if modo == "array" else ""))
+            if not buf:
+                return
+            if fechado:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Conteúdo após o fim do array JSON")
+            if modo is None:
+                modo = "array" if buf[0] == "[" else "ndjson"
+                if modo == "array":
+                    buf = buf[1:]
+                continue
+            if modo == "array" and buf[0] == "]":
+                fechado = True
+                buf = buf[1:]
+                continue
+            try:
+                valor, fim = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                if final:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="JSON inválido no corpo do lote")
+                if len(buf) > limite_bytes:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Item do lote excede o tamanho máximo")
+                return
+            total += 1
+            if total > limite_itens:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Lote excede o máximo de {limite_itens} itens")
+            buf = buf[fim:]
+            yield valor
+
+    async for chunk in chunks:
+        buf += utf8.decode(chunk)
+        for valor in _proximos(final=False):
+            yield valor
+    buf += utf8.decode(b"", final=True)
+    for valor in _proximos(final=True):
+        yield valor
+    if modo == "array" and not fechado:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Array JSON não foi fechado")
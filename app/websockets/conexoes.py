@@ -1,8 +1,20 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 from fastapi import WebSocket
+from fastapi.encoders import jsonable_encoder
 import asyncio
+import orjson
+
+
+def codificar_mensagem(mensagem: dict) -> str:
+    """Serializa a mensagem uma única vez para JSON (texto do frame WebSocket)."""
+    return orjson.dumps(mensagem, default=jsonable_encoder).decode("utf-8")
+
+
+def mensagem_com_dados(tipo: str, dados_json: str) -> str:
+    """Monta o frame `{"tipo": ..., "dados": ...}` reaproveitando dados já serializados em JSON."""
+    return '{"tipo":' + orjson.dumps(tipo).decode("utf-8") + ',"dados":' + dados_json + "}"
 
 @dataclass
 class Conexao:
@@ -37,6 +49,17 @@ class GerenciadorConexoes:
         except Exception:
             pass
 
+    async def mover(self, origem: str, destino: str, websocket: WebSocket) -> None:
+        """Transfere uma conexão já aceita para outra sala, sem fechá-la."""
+        async with self._lock:
+            conexao = next((c for c in self.salas.get(origem, []) if c.websocket is websocket), None)
+            if conexao is None:
+                return
+            self.salas[origem] = [c for c in self.salas[origem] if c.websocket is not websocket]
+            if not self.salas[origem]:
+                del self.salas[origem]
+            self.salas.setdefault(destino, []).append(conexao)
+
     def lista_usuarios_na_sala(self, sala_id: str) -> List[dict]:
         """Retorna a lista de payloads de usuário presentes na sala."""
         return [c.usuario for c in self.salas.get(sala_id, [])]
@@ -48,8 +71,8 @@ class GerenciadorConexoes:
                 return c
         return None
 
-    async def enviar_para_sala(self, sala_id: str, mensagem: dict) -> None:
-        """Envia uma mensagem a todos na sala, removendo conexões quebradas."""
+    async def enviar_para_sala(self, sala_id: str, mensagem: Union[dict, str]) -> None:
+        """Envia uma mensagem (dict ou JSON já serializado) a todos na sala, removendo conexões quebradas."""
         await self._broadcast(sala_id, mensagem, excluir_ws=None)
 
     async def enviar_para_outros(self, sala_id: str, remetente: WebSocket, mensagem: dict) -> None:
@@ -70,16 +93,22 @@ class GerenciadorConexoes:
             return len(self.salas.get(sala_id, []))
         return sum(len(lst) for lst in self.salas.values())
 
-    async def _broadcast(self, sala_id: str, mensagem: dict, excluir_ws: Optional[WebSocket]) -> None:
-        """Envia mensagem para a sala com tolerância a falhas e remoção de sockets inválidos."""
+    async def _broadcast(self, sala_id: str, mensagem: Union[dict, str], excluir_ws: Optional[WebSocket]) -> None:
+        """Envia mensagem para a sala com tolerância a falhas e remoção de sockets inválidos.
+
+        A mensagem é serializada uma única vez e o mesmo texto é reutilizado para todas as conexões.
+        """
         conexoes_snapshot: List[Conexao] = list(self.salas.get(sala_id, []))
         print("[WS] conectado:", sala_id, "conexoes:", self.contar_conexoes(sala_id))
+        if not conexoes_snapshot:
+            return
+        texto = mensagem if isinstance(mensagem, str) else codificar_mensagem(mensagem)
         desconectar: List[WebSocket] = []
         for c in conexoes_snapshot:
             if excluir_ws is not None and c.websocket is excluir_ws:
                 continue
             try:
-                await c.websocket.send_json(mensagem)
+                await c.websocket.send_text(texto)
             except Exception:
                 desconectar.append(c.websocket)
         if desconectar:
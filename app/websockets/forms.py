@@ -1,5 +1,6 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from sqlalchemy.orm import joinedload
+from app.crud.grafo_formulario import opcoes_grafo_formulario
+from app.services.exportacao_jobs import exportacoes, sala_exportacoes
 from app import crud, schemas, models
 from .conexoes import gerenciador
 from app.db.database import SessionLocal, get_db
@@ -112,7 +113,7 @@ async def ws_formularios(websocket: WebSocket):
                               models.FormularioPermissao.grupo_id == grupo_id,
                               models.FormularioPermissao.pode_ver.is_(True),
                           )
-                          .options(joinedload(models.Formulario.perguntas))
+                          .options(*opcoes_grafo_formulario())
                           .distinct()
                     )
                     if not incluir:
@@ -154,3 +155,30 @@ async def ws_formularios(websocket: WebSocket):
     except WebSocketDisconnect:
         await gerenciador.desconectar(SALA_LISTA_FORMULARIOS, websocket)
 
+
+@router.websocket("/formularios/{formulario_id}/exportacoes")
+async def socket_exportacoes(websocket: WebSocket, formulario_id: str):
+    """Publica o progresso das exportações em segundo plano do formulário."""
+    usuario = await require_permission_ws(websocket, "formularios:ver", formulario_id, "pode_ver")
+    if not usuario:
+        return
+
+    sala_id = sala_exportacoes(formulario_id)
+    await gerenciador.conectar(
+        sala_id,
+        websocket,
+        {"id": str(usuario.id), "nome": usuario.nome, "username": usuario.username}
+    )
+    try:
+        jobs = [
+            j.para_saida().model_dump(mode="json")
+            for j in list(exportacoes.jobs.values())
+            if str(j.formulario_id) == formulario_id
+        ]
+        await gerenciador.enviar_para_usuario(websocket, {"tipo": "exportacoes", "dados": jobs})
+        while True:
+            data = await websocket.receive_json()
+            if data.get("tipo") == "ping":
+                await gerenciador.enviar_para_usuario(websocket, {"tipo": "pong"})
+    except WebSocketDisconnect:
+        await gerenciador.desconectar(sala_id, websocket)
@@ -1,7 +1,6 @@
 # app/ws/notificadores_formularios.py
-from sqlalchemy.orm import joinedload
 from app.db.database import SessionLocal
-from app import models, schemas
+from app import schemas
 from .conexoes import gerenciador
 
 SALA_LISTA_FORMULARIOS = "formularios"
@@ -13,14 +12,11 @@ def _filtrar_perguntas_ativas(payload: dict) -> dict:
 
 async def notificar_formulario_criado(formulario_id: str) -> None:
     """Envia evento de criação para a sala geral de formulários."""
+    from app.crud.grafo_formulario import carregar_grafo_formulario  # app.crud importa este módulo
+
     db = SessionLocal()
     try:
-        f = (
-            db.query(models.Formulario)
-              .options(joinedload(models.Formulario.perguntas))
-              .filter(models.Formulario.id == formulario_id)
-              .first()
-        )
+        f = carregar_grafo_formulario(db, formulario_id=formulario_id)
         if not f:
             return
         out = schemas.FormularioOut.model_validate(f).model_dump(mode="json")
@@ -31,14 +27,11 @@ async def notificar_formulario_criado(formulario_id: str) -> None:
 
 async def notificar_formulario_atualizado(formulario_id: str) -> None:
     """Envia evento de atualização para a sala geral de formulários."""
+    from app.crud.grafo_formulario import carregar_grafo_formulario  # app.crud importa este módulo
+
     db = SessionLocal()
     try:
-        f = (
-            db.query(models.Formulario)
-              .options(joinedload(models.Formulario.perguntas))
-              .filter(models.Formulario.id == formulario_id)
-              .first()
-        )
+        f = carregar_grafo_formulario(db, formulario_id=formulario_id)
         if not f:
             return
         out = schemas.FormularioOut.model_validate(f).model_dump(mode="json")
@@ -7,19 +7,26 @@ from .conexoes import gerenciador
 from app import schemas, crud
 from app.dependencies.auth import get_current_user_ws
 from app.dependencies.permissoes import require_permission_ws
+from app.services.agregados_ws import agregados_ao_vivo, sala_agregados
 
 router = APIRouter(prefix="/ws/respostas", tags=["WebSocket Respostas"])
 
 @router.websocket("/formulario/{formulario_id}")
 async def ws_respostas_formulario(websocket: WebSocket, formulario_id: str):
     print("[WS] import gerenciador no WS:", hex(id(gerenciador)))
-    """Entrega respostas em tempo real de um formulário com bootstrap inicial e presença por sala dedicada."""
+    """Entrega respostas em tempo real de um formulário com bootstrap inicial e presença por sala dedicada.
+
+    Com `{"tipo": "subscribe_agregados"}` a conexão passa para a sala de agregados: recebe o retrato completo
+    (`agregados`) e depois, no máximo uma vez por intervalo, apenas os contadores alterados (`agregados_delta`),
+    em vez de cada `resposta_criada`. `{"tipo": "unsubscribe_agregados"}` volta ao fluxo de respostas.
+    """
     usuario = await get_current_user_ws(websocket)
     # usuario = await require_permission_ws(websocket, "formularios:ver", None, "pode_ver")
     if not usuario:
         return
 
     sala_id = f"respostas:{formulario_id}"
+    sala_atual = sala_id
     await gerenciador.conectar(
         sala_id,
         websocket,
@@ -45,10 +52,21 @@ async def ws_respostas_formulario(websocket: WebSocket, formulario_id: str):
 
         while True:
             msg = await websocket.receive_json()
-            await gerenciador.enviar_para_usuario(websocket, {"tipo": "ack", "dados": msg})
+            tipo = msg.get("tipo") if isinstance(msg, dict) else None
+            if tipo == "subscribe_agregados":
+                await gerenciador.mover(sala_atual, sala_agregados(form_uuid), websocket)
+                sala_atual = sala_agregados(form_uuid)
+                dados = await agregados_ao_vivo.inscrever(form_uuid)
+                await gerenciador.enviar_para_usuario(websocket, {"tipo": "agregados", "dados": {"formulario_id": str(form_uuid), **dados}})
+            elif tipo == "unsubscribe_agregados":
+                await gerenciador.mover(sala_atual, sala_id, websocket)
+                sala_atual = sala_id
+                await gerenciador.enviar_para_usuario(websocket, {"tipo": "ack", "dados": msg})
+            else:
+                await gerenciador.enviar_para_usuario(websocket, {"tipo": "ack", "dados": msg})
 
     except WebSocketDisconnect:
-        await gerenciador.desconectar(sala_id, websocket)
+        await gerenciador.desconectar(sala_atual, websocket)
         await gerenciador.enviar_para_sala(
             sala_id,
             {"tipo": "usuario_desconectado_respostas", "usuarios": gerenciador.lista_usuarios_na_sala(sala_id)}
@@ -0,0 +1,37 @@
+"""índice GIN de busca textual (português) em respostas_itens.valor_texto
+
+Revision ID: a3d8e6f2c4b1
+Revises: f1a9c3e5b7d2
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a3d8e6f2c4b1"
+down_revision: Union[str, Sequence[str], None] = "f1a9c3e5b7d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_respostas_itens_busca",
+            "respostas_itens",
+            [sa.text("to_tsvector('portuguese', valor_texto)")],
+            postgresql_using="gin",
+            postgresql_where=sa.text("valor_texto IS NOT NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_respostas_itens_busca", table_name="respostas_itens", postgresql_concurrently=True, if_exists=True)
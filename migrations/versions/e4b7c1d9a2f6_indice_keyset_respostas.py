@@ -0,0 +1,34 @@
+"""índice keyset (formulario_id, criado_em, id) em respostas
+
+Revision ID: e4b7c1d9a2f6
+Revises: klasdjc787asy
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b7c1d9a2f6"
+down_revision: Union[str, Sequence[str], None] = "klasdjc787asy"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_respostas_form_criado_id",
+            "respostas",
+            ["formulario_id", "criado_em", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_respostas_form_criado_id", table_name="respostas", postgresql_concurrently=True, if_exists=True)
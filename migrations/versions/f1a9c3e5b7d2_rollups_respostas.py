@@ -0,0 +1,87 @@
+"""tabelas de rollup respostas_stats_* e índices em respostas_itens
+
+Revision ID: f1a9c3e5b7d2
+Revises: e4b7c1d9a2f6
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "f1a9c3e5b7d2"
+down_revision: Union[str, Sequence[str], None] = "e4b7c1d9a2f6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _fk_formulario():
+    return sa.Column("formulario_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("formularios.id", ondelete="CASCADE"), nullable=False)
+
+
+def _fk_pergunta():
+    return sa.Column("pergunta_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("perguntas.id", ondelete="CASCADE"), primary_key=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "respostas_stats_dia",
+        sa.Column("formulario_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("formularios.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("dia", sa.Date(), primary_key=True),
+        sa.Column("total", sa.BigInteger(), nullable=False),
+    )
+    op.create_table(
+        "respostas_stats_opcoes",
+        _fk_pergunta(),
+        sa.Column("opcao_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("opcoes.id", ondelete="CASCADE"), primary_key=True),
+        _fk_formulario(),
+        sa.Column("total", sa.BigInteger(), nullable=False),
+    )
+    op.create_table(
+        "respostas_stats_nps",
+        _fk_pergunta(),
+        _fk_formulario(),
+        sa.Column("promotores", sa.BigInteger(), nullable=False),
+        sa.Column("neutros", sa.BigInteger(), nullable=False),
+        sa.Column("detratores", sa.BigInteger(), nullable=False),
+    )
+    op.create_table(
+        "respostas_stats_numeros",
+        _fk_pergunta(),
+        _fk_formulario(),
+        sa.Column("total", sa.BigInteger(), nullable=False),
+        sa.Column("soma", sa.BigInteger(), nullable=False),
+        sa.Column("minimo", sa.Integer(), nullable=True),
+        sa.Column("maximo", sa.Integer(), nullable=True),
+    )
+    for tabela in ("respostas_stats_opcoes", "respostas_stats_nps", "respostas_stats_numeros"):
+        op.create_index(f"ix_{tabela}_formulario_id", tabela, ["formulario_id"])
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_respostas_itens_resposta_id",
+            "respostas_itens",
+            ["resposta_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_respostas_itens_pergunta_numero",
+            "respostas_itens",
+            ["pergunta_id", "valor_numero"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_respostas_itens_pergunta_numero", table_name="respostas_itens", postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_respostas_itens_resposta_id", table_name="respostas_itens", postgresql_concurrently=True, if_exists=True)
+    for tabela in ("respostas_stats_numeros", "respostas_stats_nps", "respostas_stats_opcoes", "respostas_stats_dia"):
+        op.drop_table(tabela)